@@ -0,0 +1,419 @@
+"""
+End-to-end load and latency benchmark of the API.
+
+Replays multi-turn conversations against `/chatbot`, creates and reads back
+complaints through `/complaints` and times `/upload_docs` jobs, each at a
+configurable concurrency. Reports throughput and p50 / p95 / p99 latency per
+endpoint and per chatbot stage (taken from the Server-Timing header of
+`/chatbot`), writes them as JSON and, given a baseline, fails on p95
+regressions.
+`--startup-runs` also times `import main` in fresh interpreters.
+
+Fully offline, with the mock LLM server and Milvus Lite:
+    python mock_llm_server.py
+    OPENAI_ENDPOINT=http://localhost:8090 OPENAI_API_KEY=mock MILVUS_URI=./data/milvus_lite.db python main.py
+    python benchmark.py --upload-runs 1 --conversations 50 --concurrency 10
+
+Recorded traffic can be replayed with `--conversations-file`, a JSONL file
+with one `{"turns": ["...", "..."]}` conversation per line.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+QUERIES = [
+    "My website hosting server has been down since morning",
+    "I was charged twice for my cloud subscription this month",
+    "How do I reset the password of my control panel?",
+    "The SSL certificate on my domain expired and renewal failed",
+    "My email service is not receiving any messages",
+    "What are the backup options available for my VPS?",
+    "The GPU instance I launched is stuck in provisioning",
+    "I want to upgrade my dedicated server plan",
+    "Mera server subah se down hai, kya aap check kar sakte hain?",
+    "मेरे क्लाउड सब्सक्रिप्शन का बिल इस महीने दो बार कट गया है",
+]
+NAMES = ["Rahul Sharma", "Priya Verma", "Amit Kumar", "Sneha Iyer", "Arjun Mehta"]
+STAGES = [
+    "memory",
+    "intent",
+    "language",
+    "embedding",
+    "faq_match",
+    "retrieval",
+    "rerank",
+    "generation",
+    "persistence",
+]
+# Modules that should only be loaded once the feature using them runs
+HEAVY_MODULES = ["docling", "pandas", "pyodbc", "torch"]
+STARTUP_SCRIPT = """
+import json, sys, time
+start_time = time.perf_counter()
+import main
+print(json.dumps({
+    "import_ms": round((time.perf_counter() - start_time) * 1000, 1),
+    "adapters": {name: adapter.initialized for name, adapter in main.ADAPTERS.items()},
+    "heavy_modules": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of `values`, `q` in [0, 100].
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(
+    latencies_ms: List[float], wall_seconds: Optional[float] = None
+) -> Dict[str, Any]:
+    summary = {"count": len(latencies_ms)}
+    if wall_seconds:
+        summary["throughput_rps"] = round(len(latencies_ms) / wall_seconds, 2)
+    return {
+        **summary,
+        "mean_ms": (
+            round(sum(latencies_ms) / len(latencies_ms), 1) if latencies_ms else None
+        ),
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+        "max_ms": max(latencies_ms) if latencies_ms else None,
+    }
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    timings = {}
+    for entry in filter(None, (part.strip() for part in header.split(","))):
+        name, *params = entry.split(";")
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "dur":
+                timings[name.strip()] = float(value)
+    return timings
+
+
+def synthetic_conversations(count: int, seed: int) -> List[List[str]]:
+    """
+    Complaint conversations: the query, then name, phone number and email one turn each.
+    """
+    generator = random.Random(seed)
+    conversations = []
+    for index in range(count):
+        name = generator.choice(NAMES)
+        conversations.append(
+            [
+                generator.choice(QUERIES),
+                name,
+                f"{generator.randint(6, 9)}{generator.randint(100000000, 999999999)}",
+                f"{name.split()[0].lower()}.{index}@example.com",
+            ]
+        )
+    return conversations
+
+
+def load_conversations(path: str) -> List[List[str]]:
+    with open(path, "r", encoding="utf-8") as conversations_file:
+        return [
+            json.loads(line)["turns"] for line in conversations_file if line.strip()
+        ]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(
+        self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs
+    ) -> Optional[httpx.Response]:
+        start_time = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            response.raise_for_status()
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(
+            round((time.perf_counter() - start_time) * 1000, 1)
+        )
+        return response
+
+
+async def run_pool(concurrency: int, jobs: List[Any], worker) -> float:
+    """
+    Runs `worker(job)` over the jobs with at most `concurrency` in flight, returns the wall time.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    async def consume():
+        while not queue.empty():
+            await worker(queue.get_nowait())
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(consume() for _ in range(max(1, concurrency))))
+    return time.perf_counter() - start_time
+
+
+async def bench_chatbot(
+    client: httpx.AsyncClient, conversations: List[List[str]], concurrency: int
+) -> Dict[str, Any]:
+    recorder = Recorder()
+    stages: Dict[str, List[float]] = defaultdict(list)
+
+    async def converse(turns: List[str]):
+        user_id = f"bench-{uuid.uuid4().hex[:12]}"
+        for turn in turns:
+            response = await recorder.request(
+                client,
+                "chatbot",
+                "POST",
+                "/chatbot",
+                json={"user_id": user_id, "user_text": turn},
+            )
+            if response is None:
+                return
+            for stage, duration in parse_server_timing(
+                response.headers.get("server-timing", "")
+            ).items():
+                stages[stage].append(duration)
+
+    wall_seconds = await run_pool(concurrency, conversations, converse)
+    return {
+        "conversations": len(conversations),
+        "errors": recorder.errors["chatbot"],
+        "wall_seconds": round(wall_seconds, 2),
+        "latency": summarize(recorder.latencies["chatbot"], wall_seconds),
+        "stages": {
+            stage: summarize(stages[stage])
+            for stage in STAGES + sorted(set(stages) - set(STAGES))
+            if stages.get(stage)
+        },
+    }
+
+
+async def bench_complaints(
+    client: httpx.AsyncClient, count: int, concurrency: int, seed: int
+) -> Dict[str, Any]:
+    recorder = Recorder()
+    generator = random.Random(seed)
+
+    async def create_and_read(index: int):
+        name = generator.choice(NAMES)
+        response = await recorder.request(
+            client,
+            "create",
+            "POST",
+            "/complaints",
+            json={
+                "name": name,
+                "phone_number": f"9{generator.randint(100000000, 999999999)}",
+                "email": f"bench.{index}@example.com",
+                "complaint_details": generator.choice(QUERIES),
+            },
+        )
+        if response is not None:
+            await recorder.request(
+                client, "read", "GET", f"/complaints/{response.json()['complaint_id']}"
+            )
+
+    wall_seconds = await run_pool(concurrency, list(range(count)), create_and_read)
+    return {
+        "requests": count,
+        "wall_seconds": round(wall_seconds, 2),
+        **{
+            name: dict(
+                summarize(recorder.latencies[name], wall_seconds),
+                errors=recorder.errors[name],
+            )
+            for name in ("create", "read")
+        },
+    }
+
+
+async def bench_upload(
+    client: httpx.AsyncClient, runs: int, poll_seconds: float = 1.0
+) -> Dict[str, Any]:
+    """
+    Submits `runs` ingestion jobs one after the other and times each until it finishes.
+    """
+    recorder = Recorder()
+    job_ms: List[float] = []
+    failed = 0
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        submitted_at = time.perf_counter()
+        response = await recorder.request(client, "upload_docs", "POST", "/upload_docs")
+        if response is None:
+            continue
+        job = response.json()
+        while job["status"] in ("queued", "running"):
+            await asyncio.sleep(poll_seconds)
+            job = (await client.get(f"/upload_docs/jobs/{job['job_id']}")).json()
+        if job["status"] == "succeeded":
+            job_ms.append(round((time.perf_counter() - submitted_at) * 1000, 1))
+        else:
+            failed += 1
+    wall_seconds = time.perf_counter() - start_time
+    return {
+        "submit": dict(
+            summarize(recorder.latencies["upload_docs"]),
+            errors=recorder.errors["upload_docs"],
+        ),
+        "job": dict(summarize(job_ms, wall_seconds), errors=failed),
+    }
+
+
+def bench_startup(runs: int) -> Dict[str, Any]:
+    """
+    Times `import main` in `runs` fresh interpreters, without the adapter warm-up.
+    """
+    import_ms, last = [], {}
+    env = dict(os.environ, STARTUP_WARMUP="false")
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, "-c", STARTUP_SCRIPT % HEAVY_MODULES], env=env
+        )
+        last = json.loads(output.decode().strip().splitlines()[-1])
+        import_ms.append(last["import_ms"])
+    return dict(
+        summarize(import_ms),
+        adapters_initialized=[name for name, ready in last["adapters"].items() if ready],
+        heavy_modules=last["heavy_modules"],
+    )
+
+
+def find_regressions(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, path=""
+) -> List[str]:
+    """
+    Every p95 of `results` more than `tolerance` (relative) above the same p95 of `baseline`.
+    """
+    regressions = []
+    for key, value in results.items():
+        if key not in baseline:
+            continue
+        if isinstance(value, dict) and isinstance(baseline[key], dict):
+            regressions += find_regressions(
+                value, baseline[key], tolerance, f"{path}{key}."
+            )
+        elif key == "p95_ms" and value and baseline[key]:
+            if value > baseline[key] * (1 + tolerance):
+                regressions.append(
+                    f"{path}{key}: {baseline[key]} -> {value} ms (+{(value / baseline[key] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+            )
+            .decode()
+            .strip()
+        )
+    except Exception:
+        return None
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    conversations = (
+        load_conversations(args.conversations_file)
+        if args.conversations_file
+        else synthetic_conversations(args.conversations, args.seed)
+    )
+    results = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "base_url": args.base_url,
+        "concurrency": args.concurrency,
+    }
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    if args.startup_runs:
+        results["startup"] = bench_startup(args.startup_runs)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, timeout=timeout, limits=limits
+    ) as client:
+        if args.upload_runs:
+            results["upload_docs"] = await bench_upload(client, args.upload_runs)
+        if conversations:
+            results["chatbot"] = await bench_chatbot(
+                client, conversations, args.concurrency
+            )
+        if args.complaints:
+            results["complaints"] = await bench_complaints(
+                client, args.complaints, args.concurrency, args.seed
+            )
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8083")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--conversations", type=int, default=20, help="Synthetic conversations"
+    )
+    parser.add_argument("--conversations-file", help="JSONL of recorded conversations")
+    parser.add_argument("--complaints", type=int, default=100)
+    parser.add_argument("--upload-runs", type=int, default=0)
+    parser.add_argument(
+        "--startup-runs", type=int, default=0, help="Times `import main` N times"
+    )
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Results JSON path")
+    parser.add_argument("--baseline", help="Results JSON to compare p95 latencies to")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    output = args.output or os.path.join(
+        "data",
+        "benchmarks",
+        f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            regressions = find_regressions(
+                results, json.load(baseline_file), args.tolerance
+            )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
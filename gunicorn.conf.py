@@ -0,0 +1,41 @@
+"""
+gunicorn settings of the multi-worker mode:
+    gunicorn main:app -c gunicorn.conf.py
+
+Every worker is a uvicorn event loop with its own adapters (SQL engine,
+OpenAI clients, Milvus client). Caches that should survive across workers
+(sessions, embeddings) are on the shared CACHE_BACKEND.
+"""
+
+import os
+
+from config import AppConfig
+
+
+def available_cores() -> int:
+    # The cores this process may run on, which is what a container is granted
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+app_config = AppConfig()
+
+# A turn spends most of its time waiting on the LLM and Milvus in the worker's
+# thread pool, the event loop itself needs about one core: one worker per core.
+workers = int(os.getenv("WORKERS", available_cores()))
+# Exported before the workers are forked, so that each of them takes its share
+# of the OpenAI rate limits and picks a cache backend shared by all workers
+os.environ["WORKERS"] = str(workers)
+
+bind = f"{app_config.APP_HOST}:{app_config.APP_PORT}"
+worker_class = "uvicorn.workers.UvicornWorker"
+# Not preloaded: the log listener thread and the clients must be created in each worker
+preload_app = False
+# The LLM calls of a turn can take tens of seconds
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+# Recycles workers periodically, with jitter so they do not restart together
+max_requests = 5000
+max_requests_jitter = 500
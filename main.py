@@ -1,16 +1,91 @@
+import codecs
+import json
+import tempfile
+import threading
+import time
 import warnings
 
 warnings.filterwarnings("ignore")
 
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI
-from src.types import ComplaintModel, ChatBotModel
-from src.upload_helper import upload_docs
-from src.utils import generate_complaint, get_complaint_client, create_sql_tables
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from config import AppConfig, SqlConfig
+from src.types import (
+    ComplaintModel,
+    ChatBotModel,
+    ComplaintStatusUpdateModel,
+    ComplaintBatchLookupModel,
+)
+from src.ingestion import (
+    submit_ingestion_job,
+    get_ingestion_job,
+    list_ingestion_jobs,
+    cancel_ingestion_job,
+    resume_ingestion_jobs,
+    shutdown_ingestion_workers,
+)
+from src.utils import (
+    generate_complaint,
+    get_complaint_client,
+    create_sql_tables,
+    insert_complaint_chunk,
+    iter_complaints_export,
+    update_complaint_status,
+    get_complaints_batch,
+    list_complaints,
+)
 from src.bot import ChatBot
-from dotenv import load_dotenv
+from src.metrics import http_request_duration, registry
+from src.adapters.loggingmanager import logger
+from src.adapters.milvusmanager import milvus_manager
+from src.adapters.openaimanager import openai_manager
+from src.adapters.sqllitemanager import sql_manager
+from src.language import query_translator
+from src.reranker import reranker
+
+ADAPTERS = {
+    "openai": openai_manager,
+    "sql": sql_manager,
+    "milvus": milvus_manager,
+    "reranker": reranker,
+    "query_translator": query_translator,
+}
+
+
+def warm_up_adapters():
+    """
+    Builds the adapters ahead of the first request. One that fails (e.g.
+    Milvus unreachable) is retried on its first use instead.
+    """
+    for name, adapter in ADAPTERS.items():
+        try:
+            adapter.get()
+        except Exception as exc:
+            logger.warning(f"[warm_up_adapters] - {name} adapter unavailable: {exc}")
 
-load_dotenv(override=True)
+
+def resume_jobs():
+    try:
+        resume_ingestion_jobs()
+    except Exception as exc:
+        logger.warning(f"[resume_jobs] - Ingestion jobs not resumed: {exc}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # In a thread, so the server accepts requests while the clients connect
+    if AppConfig().STARTUP_WARMUP:
+        threading.Thread(
+            target=warm_up_adapters, name="adapter-warmup", daemon=True
+        ).start()
+    threading.Thread(target=resume_jobs, name="resume-jobs", daemon=True).start()
+    yield
+    shutdown_ingestion_workers()
 
 
 app = FastAPI(
@@ -18,6 +93,7 @@ app = FastAPI(
     description=(
         "Cyfuture AI Bot provides endpoints for managing chatbot conversations,"
     ),
+    lifespan=lifespan,
 )
 
 # Enable CORS middleware
@@ -30,15 +106,80 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    # Streaming endpoints are timed up to their first byte
+    start_time = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    http_request_duration.observe(
+        time.perf_counter() - start_time,
+        method=request.method,
+        route=route.path if route else "unmatched",
+        status=str(response.status_code),
+    )
+    return response
+
+
 @app.get("/", tags=["General"])
 def read_root():
     return {"Response": "Welcome to the Cyfuture AI Bot!"}
 
 
-@app.post("/upload_docs", tags=["Upload"])
+@app.get("/health", tags=["General"])
+def health():
+    """
+    Liveness, plus which adapters have been initialized so far.
+    """
+    return {
+        "status": "ok",
+        "adapters": {name: adapter.initialized for name, adapter in ADAPTERS.items()},
+    }
+
+
+@app.get("/metrics", tags=["General"], response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Prometheus metrics of this process: stage / function / HTTP latency
+    histograms, LLM token and cost counters and OpenAI client gauges.
+    """
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@app.post("/upload_docs", tags=["Upload"], status_code=202)
 def upload_documents():
-    res = {"message": upload_docs()}
-    return res
+    """
+    Queues a rebuild of the Milvus collection, poll /upload_docs/jobs/{job_id} for its progress.
+    """
+    try:
+        return submit_ingestion_job()
+    except ValueError as value_exc:
+        raise HTTPException(status_code=409, detail=str(value_exc))
+
+
+@app.get("/upload_docs/jobs", tags=["Upload"])
+def get_ingestion_jobs(limit: int = 20):
+    return list_ingestion_jobs(limit)
+
+
+@app.get("/upload_docs/jobs/{job_id}", tags=["Upload"])
+def get_ingestion_job_status(job_id: str):
+    try:
+        return get_ingestion_job(job_id)
+    except LookupError as lookup_exc:
+        raise HTTPException(status_code=404, detail=str(lookup_exc))
+
+
+@app.post("/upload_docs/jobs/{job_id}/cancel", tags=["Upload"])
+def cancel_ingestion(job_id: str):
+    try:
+        return cancel_ingestion_job(job_id)
+    except LookupError as lookup_exc:
+        raise HTTPException(status_code=404, detail=str(lookup_exc))
+    except ValueError as value_exc:
+        raise HTTPException(status_code=409, detail=str(value_exc))
 
 
 @app.post("/create_tables", tags=["Database"])
@@ -48,6 +189,32 @@ def create_tables():
     return {"message": "Table creation failed"}
 
 
+@app.get("/complaints", tags=["Complaints"])
+def get_complaints(
+    status: Optional[str] = None,
+    email: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = 50,
+):
+    return list_complaints(
+        status=status,
+        email=email,
+        created_from=created_from,
+        created_to=created_to,
+        cursor=cursor,
+        limit=limit,
+    )
+
+
+@app.get("/complaints/export", tags=["Complaints"])
+def export_complaints():
+    return StreamingResponse(
+        iter_complaints_export(), media_type="application/x-ndjson"
+    )
+
+
 @app.get("/complaints/{complaint_id}", tags=["Complaints"])
 def get_complaint(complaint_id: str):
     _, complaint = get_complaint_client(complaint_id)
@@ -63,14 +230,113 @@ def create_complaint(data: ComplaintModel):
     }
 
 
+@app.post("/complaints/batch", tags=["Complaints"])
+def get_complaints_by_ids(data: ComplaintBatchLookupModel):
+    return get_complaints_batch(data.complaint_ids)
+
+
+@app.patch("/complaints/{complaint_id}/status", tags=["Complaints"])
+def update_status(complaint_id: str, data: ComplaintStatusUpdateModel):
+    try:
+        return update_complaint_status(complaint_id, data.status)
+    except LookupError as lookup_exc:
+        raise HTTPException(status_code=404, detail=str(lookup_exc))
+    except ValueError as value_exc:
+        raise HTTPException(status_code=409, detail=str(value_exc))
+
+
+@app.post("/complaints/bulk", tags=["Complaints"])
+async def bulk_create_complaints(request: Request):
+    """
+    Creates complaints from an NDJSON body (one ComplaintModel per line).
+
+    Lines are inserted in transactional chunks of BULK_INSERT_CHUNK_SIZE and a
+    per-line result is streamed back as NDJSON as soon as its chunk commits.
+    The body is read (spooled to disk beyond BULK_SPOOL_MAX_MEMORY_BYTES)
+    before the response starts: once it streams, Starlette listens for the
+    client disconnect on the same receive channel, which would consume the
+    rest of the body.
+    """
+    config = SqlConfig()
+    spool = tempfile.SpooledTemporaryFile(
+        max_size=config.BULK_SPOOL_MAX_MEMORY_BYTES,
+        mode="w+",
+        encoding="utf-8",
+        newline="",
+    )
+    # Multibyte characters may be split across body chunks
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        async for body_chunk in request.stream():
+            spool.write(decoder.decode(body_chunk))
+        spool.write(decoder.decode(b"", final=True))
+    except UnicodeDecodeError as decode_exc:
+        spool.close()
+        raise HTTPException(
+            status_code=400, detail=f"The body is not valid UTF-8: {decode_exc}"
+        )
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+
+    async def iter_results():
+        chunk = []
+        try:
+            for line_number, line in enumerate(spool, start=1):
+                if not line.strip():
+                    continue
+                chunk.append((line_number, line.strip()))
+                if len(chunk) >= config.BULK_INSERT_CHUNK_SIZE:
+                    for result in await run_in_threadpool(insert_complaint_chunk, chunk):
+                        yield json.dumps(result) + "\n"
+                    chunk = []
+            if chunk:
+                for result in await run_in_threadpool(insert_complaint_chunk, chunk):
+                    yield json.dumps(result) + "\n"
+        finally:
+            spool.close()
+
+    return StreamingResponse(iter_results(), media_type="application/x-ndjson")
+
+
 @app.post("/chatbot", tags=["ChatBot"])
-def chatbot_interaction(data: ChatBotModel):
+def chatbot_interaction(data: ChatBotModel, response: Response):
     chatbot_obj = ChatBot(data)
-    response = chatbot_obj.get_response()
-    return {"bot_response": response}
+    bot_response = chatbot_obj.get_response()
+    # Per-stage latency (memory, intent, embedding, retrieval, rerank, generation, persistence)
+    response.headers["Server-Timing"] = chatbot_obj.server_timing()
+    return {"bot_response": bot_response}
+
+
+@app.post("/chatbot/stream", tags=["ChatBot"])
+def chatbot_stream_interaction(data: ChatBotModel):
+    """
+    Server-sent events variant of /chatbot: `token` events carry the response
+    text as it is generated, a final `done` event carries the same payload as
+    /chatbot's `bot_response` (or an `error` event on failure).
+    """
+    chatbot_obj = ChatBot(data)
+
+    def iter_events():
+        for event, payload in chatbot_obj.stream_response():
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    return StreamingResponse(
+        iter_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="localhost", port=8083)
+    app_config = AppConfig()
+    # Several workers need the import string, each worker process imports the app
+    uvicorn.run(
+        "main:app" if app_config.WORKERS > 1 else app,
+        host=app_config.APP_HOST,
+        port=app_config.APP_PORT,
+        workers=app_config.WORKERS,
+    )
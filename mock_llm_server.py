@@ -0,0 +1,394 @@
+"""
+Local stand-in for the Azure OpenAI embeddings and chat completions endpoints.
+
+Answers the prompts of `src/prompts.py` with deterministic JSON of the
+expected schema, derived from the messages with the same regexes the bot uses
+for detail extraction, and returns hashed bag-of-words embeddings (similar
+texts get similar vectors, so retrieval stays meaningful). Latency
+distributions, 500s and 429s are configurable through `MockLLMConfig`, which
+makes it possible to load-test the real FastAPI app offline.
+
+Usage:
+    python mock_llm_server.py
+    OPENAI_ENDPOINT=http://localhost:8090 OPENAI_API_KEY=mock python main.py
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from config import MockLLMConfig
+from src.details import (
+    COMPLAINT_ID_PATTERN,
+    EMAIL_PATTERN,
+    PHONE_PATTERN,
+    extract_user_details,
+    get_details_followup_question,
+    missing_user_details,
+)
+from src.prompts import (
+    CHATBOT_SYSTEM_PROMPT,
+    COMPLAINT_STATUS_SYSTEM_PROMPT,
+    DETAILS_SYSTEM_PROMPT,
+    INTENT_SYSTEM_PROMPT,
+    SUMMARY_SYSTEM_PROMPT,
+    TRANSLATION_SYSTEM_PROMPT,
+    UNIFIED_SYSTEM_PROMPT,
+)
+
+config = MockLLMConfig()
+rng = random.Random(config.MOCK_LLM_SEED)
+rng_lock = threading.Lock()
+seen_prefixes = set()
+stats = {"chat_requests": 0, "embedding_requests": 0, "errors": 0, "throttled": 0}
+
+app = FastAPI(title="Mock Azure OpenAI")
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _sample_latency(median_ms: float) -> float:
+    if median_ms <= 0:
+        return 0.0
+    with rng_lock:
+        if config.MOCK_LLM_LATENCY_DISTRIBUTION == "fixed":
+            latency_ms = median_ms
+        elif config.MOCK_LLM_LATENCY_DISTRIBUTION == "uniform":
+            latency_ms = rng.uniform(0, 2 * median_ms)
+        else:
+            latency_ms = median_ms * math.exp(
+                rng.gauss(0, config.MOCK_LLM_LATENCY_SIGMA)
+            )
+    return latency_ms / 1000
+
+
+def _injected_error() -> Optional[JSONResponse]:
+    with rng_lock:
+        draw = rng.random()
+    if draw < config.MOCK_LLM_THROTTLE_RATE:
+        stats["throttled"] += 1
+        return JSONResponse(
+            status_code=429,
+            content={"error": {"code": "429", "message": "Rate limit exceeded (mock)"}},
+            headers={
+                "retry-after-ms": str(config.MOCK_LLM_RETRY_AFTER_MS),
+                "retry-after": str(math.ceil(config.MOCK_LLM_RETRY_AFTER_MS / 1000)),
+            },
+        )
+    if draw < config.MOCK_LLM_THROTTLE_RATE + config.MOCK_LLM_ERROR_RATE:
+        stats["errors"] += 1
+        return JSONResponse(
+            status_code=500,
+            content={"error": {"code": "500", "message": "Internal error (mock)"}},
+        )
+    return None
+
+
+def embed(text: str) -> List[float]:
+    """
+    Hashed bag of words and word bigrams, L2-normalized.
+    """
+    vector = [0.0] * config.MOCK_LLM_EMBEDDING_DIM
+    words = WORD_PATTERN.findall(text.lower())
+    for feature in words + [" ".join(pair) for pair in zip(words, words[1:])]:
+        digest = hashlib.md5(feature.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % len(vector)
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector))
+    if not norm:
+        vector[0], norm = 1.0, 1.0
+    return [value / norm for value in vector]
+
+
+def _history_turns(history: str) -> List[Dict[str, str]]:
+    """
+    The user messages of the rendered history, each with the bot question it answers.
+    """
+    turns, question = [], ""
+    for line in history.splitlines():
+        if line.startswith("Bot (You):"):
+            question = line[len("Bot (You):") :].strip()
+        elif line.startswith("User:"):
+            turns.append({"text": line[len("User:") :].strip(), "question": question})
+    return turns
+
+
+def _strip_details(text: str) -> str:
+    text = EMAIL_PATTERN.sub(" ", text)
+    text = PHONE_PATTERN.sub(" ", text)
+    return text
+
+
+def _complaint_text(text: str) -> str:
+    """
+    The part of a message that is a complaint / query, empty if it only carries details.
+    """
+    if "Complaint/Query:" in text:
+        text = text.split("Complaint/Query:", 1)[1]
+    text = _strip_details(text).strip(" .,")
+    if len(text.split()) < 3 or re.match(r"(?i)(my name is|i am|i'm)\b", text):
+        return ""
+    return text
+
+
+def _collect_user_info(user_input: str, history: str) -> Dict[str, str]:
+    turns = _history_turns(history)
+    user_info = {}
+    for turn in turns:
+        user_info.update(extract_user_details(turn["text"], turn["question"]))
+    # The bot prefixes the known details as "I'm <name>, my phone number is ..."
+    if "Complaint/Query:" in user_input:
+        user_info.update(
+            extract_user_details(user_input.split("Complaint/Query:", 1)[0], "name")
+        )
+    for text in [user_input] + [turn["text"] for turn in reversed(turns)]:
+        complaint = _complaint_text(text)
+        if complaint:
+            user_info["complaint_details"] = complaint
+            break
+    return user_info
+
+
+def _complaint_answer(
+    user_input: str, history: str, context: str
+) -> Dict[str, Any]:
+    user_info = _collect_user_info(user_input, history)
+    missing = missing_user_details(user_info)
+    if missing:
+        return {
+            "followup_flag": True,
+            "followup_question": get_details_followup_question(missing),
+            "user_info": user_info,
+        }
+    snippet = next(
+        (line.strip() for line in context.splitlines() if line.strip()),
+        "Our team will look into it.",
+    )
+    user_info["response"] = (
+        f"Thank you {user_info['name']}. {snippet[:300]} "
+        "Your ticket has been raised successfully and our team will contact you shortly."
+    )
+    return {"followup_flag": False, "followup_question": "", "user_info": user_info}
+
+
+def _section(text: str, title: str) -> str:
+    match = re.search(rf"## {title}[^\n]*\n(.*?)(?=\n## |\Z)", text, re.DOTALL)
+    return match.group(1).strip() if match else ""
+
+
+def _is_status(text: str) -> bool:
+    return bool(COMPLAINT_ID_PATTERN.search(text)) or "status" in text.lower()
+
+
+def complete(messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    """
+    Deterministic JSON answer for the prompt identified by its static system message.
+    """
+    system_prompt = messages[0]["content"]
+    variable = messages[1]["content"] if len(messages) > 2 else ""
+    user_input = messages[-1]["content"]
+
+    if system_prompt == INTENT_SYSTEM_PROMPT:
+        category = "status" if _is_status(user_input) else "complaint_or_query"
+        return {"category": category}
+
+    if system_prompt == COMPLAINT_STATUS_SYSTEM_PROMPT:
+        complaint_id = COMPLAINT_ID_PATTERN.search(user_input)
+        if complaint_id:
+            return {
+                "followup_flag": False,
+                "followup_question": "",
+                "complaint_id": complaint_id.group(0),
+            }
+        return {
+            "followup_flag": True,
+            "followup_question": "Could you please share your complaint ID?",
+            "complaint_id": "",
+        }
+
+    if system_prompt in (CHATBOT_SYSTEM_PROMPT, UNIFIED_SYSTEM_PROMPT):
+        if system_prompt == UNIFIED_SYSTEM_PROMPT and _is_status(user_input):
+            response = complete(
+                [{"role": "system", "content": COMPLAINT_STATUS_SYSTEM_PROMPT}]
+                + messages[-1:]
+            )
+            return dict(response, category="status")
+        response = _complaint_answer(
+            user_input,
+            _section(variable, "Past Conversations History"),
+            _section(variable, "Context"),
+        )
+        if system_prompt == UNIFIED_SYSTEM_PROMPT:
+            response["category"] = "complaint_or_query"
+        return response
+
+    if system_prompt == DETAILS_SYSTEM_PROMPT:
+        known_details = json.loads(_section(variable, "Known Details") or "{}")
+        question = _section(variable, "Follow-up Question")
+        extracted = extract_user_details(user_input, question)
+        if not extracted and "?" in user_input:
+            return {"needs_answer": True}
+        user_info = dict(known_details, **extracted)
+        missing = missing_user_details(user_info)
+        return {
+            "needs_answer": False,
+            "followup_flag": bool(missing),
+            "followup_question": (
+                get_details_followup_question(missing) if missing else ""
+            ),
+            "user_info": user_info,
+        }
+
+    if system_prompt == SUMMARY_SYSTEM_PROMPT:
+        words = " ".join(
+            _section(user_input, "New Conversation Turns").split()
+        ).split(" ")
+        return {"summary": " ".join(words[:150])}
+
+    if system_prompt == TRANSLATION_SYSTEM_PROMPT:
+        # No translation model here, the texts come back as they are
+        return {"translations": json.loads(user_input)}
+
+    return {"response": "This is a mock response."}
+
+
+def _usage(messages: List[Dict[str, str]], content: str) -> Dict[str, Any]:
+    prompt_tokens = sum(_tokens(message["content"]) for message in messages)
+    prefix = messages[0]["content"]
+    prefix_tokens = _tokens(prefix)
+    cached_tokens = 0
+    if prefix_tokens >= config.MOCK_LLM_CACHE_MIN_TOKENS:
+        if prefix in seen_prefixes:
+            cached_tokens = prefix_tokens
+        seen_prefixes.add(prefix)
+    completion_tokens = _tokens(content)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": cached_tokens},
+    }
+
+
+def _stream_chunks(
+    completion_id: str, model: str, content: str, usage: Optional[Dict[str, Any]]
+):
+    def chunk(choices: list, **extra) -> str:
+        body = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": choices,
+            **extra,
+        }
+        return f"data: {json.dumps(body)}\n\n"
+
+    async def generate():
+        # Azure sends the prompt filter results first, without choices
+        yield chunk([])
+        for start in range(0, len(content), 16):
+            if config.MOCK_LLM_STREAM_CHUNK_MS:
+                await asyncio.sleep(config.MOCK_LLM_STREAM_CHUNK_MS / 1000)
+            yield chunk(
+                [
+                    {
+                        "index": 0,
+                        "delta": {"content": content[start : start + 16]},
+                        "finish_reason": None,
+                    }
+                ]
+            )
+        yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if usage:
+            yield chunk([], usage=usage)
+        yield "data: [DONE]\n\n"
+
+    return generate()
+
+
+@app.post("/openai/deployments/{deployment}/chat/completions")
+async def chat_completions(deployment: str, request: Request):
+    stats["chat_requests"] += 1
+    body = await request.json()
+    messages = body["messages"]
+    prompt_tokens = sum(_tokens(message["content"]) for message in messages)
+    await asyncio.sleep(
+        _sample_latency(config.MOCK_LLM_CHAT_LATENCY_MS)
+        + prompt_tokens * config.MOCK_LLM_MS_PER_PROMPT_TOKEN / 1000
+    )
+    error = _injected_error()
+    if error is not None:
+        return error
+
+    content = json.dumps(complete(messages))
+    usage = _usage(messages, content)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    if body.get("stream"):
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+        return StreamingResponse(
+            _stream_chunks(
+                completion_id, deployment, content, usage if include_usage else None
+            ),
+            media_type="text/event-stream",
+        )
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": deployment,
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }
+        ],
+        "usage": usage,
+    }
+
+
+@app.post("/openai/deployments/{deployment}/embeddings")
+async def embeddings(deployment: str, request: Request):
+    stats["embedding_requests"] += 1
+    body = await request.json()
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    await asyncio.sleep(_sample_latency(config.MOCK_LLM_EMBEDDING_LATENCY_MS))
+    error = _injected_error()
+    if error is not None:
+        return error
+
+    prompt_tokens = sum(_tokens(text) for text in inputs)
+    return {
+        "object": "list",
+        "model": deployment,
+        "data": [
+            {"object": "embedding", "index": index, "embedding": embed(text)}
+            for index, text in enumerate(inputs)
+        ],
+        "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=config.MOCK_LLM_HOST, port=config.MOCK_LLM_PORT)
@@ -0,0 +1,326 @@
+"""
+Retrieval quality and latency evaluation, to tune the Milvus index settings.
+
+The labelled set comes from the FAQ document: every question is a query and
+the chunk holding its answer the expected hit, plus optional hand-written
+queries (`--queries-file`, JSONL of `{"query": "...", "answer": "text of the
+expected chunk"}`), e.g. Hindi or Hinglish ones, translated as the chatbot
+does. The document is chunked and embedded once; then, for
+every setting of the sweep, an evaluation collection is built with it and
+every query is searched through `MilvusManager.search_index`. Reports, per
+setting:
+- recall@k: share of the queries with an expected chunk in the top k,
+- MRR: mean reciprocal rank of the first expected chunk,
+- p50 / p95 search latency,
+- with RERANK_ENABLED, recall@RERANK_TOP_N after re-ranking RERANK_CANDIDATES,
+- recall@k per query language, when there are several.
+
+A setting overrides `MilvusConfig` attributes: "build" ones are used to
+build the collection and every entry of "search" is evaluated on it, e.g.
+    [{"build": {"MILVUS_INDEX_TYPE": "HNSW", "MILVUS_INDEX_PARAMS": {"M": 16, "efConstruction": 128}},
+      "search": [{"MILVUS_SEARCH_PARAMS": {"ef": 32}}, {"MILVUS_SEARCH_PARAMS": {"ef": 64}}]}]
+The chosen values go to .env (MILVUS_INDEX_TYPE, MILVUS_INDEX_PARAMS,
+MILVUS_SEARCH_PARAMS, MILVUS_KNN, ...). Needs the OpenAI (or mock)
+endpoint and Milvus; the app's collection is left untouched.
+    python retrieval_eval.py --k 1,3,5,10
+    python retrieval_eval.py --sweep sweep.json --queries-file data/eval_queries.jsonl
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from benchmark import git_commit, percentile
+from config import MilvusConfig, RerankConfig
+from src.adapters.loggingmanager import logger
+from src.adapters.milvusmanager import MilvusManager, milvus_manager
+from src.adapters.openaimanager import openai_manager
+from src.faq import extract_faq_pairs, find_answer_chunk, match_key
+from src.language import query_translator
+from src.reranker import reranker
+from src.upload_helper import build_collection, embed_chunks, load_document, split_text
+
+DEFAULT_SWEEP = (
+    [
+        {
+            "build": {
+                "MILVUS_VECTOR_STORAGE": "float32",
+                "MILVUS_INDEX_TYPE": "FLAT",
+                "MILVUS_INDEX_PARAMS": {},
+            },
+            "search": [{"MILVUS_SEARCH_PARAMS": {}}],
+        }
+    ]
+    + [
+        {
+            "build": {
+                "MILVUS_VECTOR_STORAGE": "float32",
+                "MILVUS_INDEX_TYPE": "HNSW",
+                "MILVUS_INDEX_PARAMS": {"M": m, "efConstruction": ef_construction},
+            },
+            "search": [{"MILVUS_SEARCH_PARAMS": {"ef": ef}} for ef in (16, 32, 64, 128)],
+        }
+        for m in (8, 16, 32)
+        for ef_construction in (64, 128, 256)
+    ]
+    + [
+        {
+            "build": {
+                "MILVUS_VECTOR_STORAGE": "float32",
+                "MILVUS_INDEX_TYPE": "IVF_FLAT",
+                "MILVUS_INDEX_PARAMS": {"nlist": 16},
+            },
+            "search": [
+                {"MILVUS_SEARCH_PARAMS": {"nprobe": nprobe}} for nprobe in (1, 4, 8, 16)
+            ],
+        },
+        {
+            "build": {
+                "MILVUS_VECTOR_STORAGE": "float16",
+                "MILVUS_INDEX_TYPE": "HNSW",
+                "MILVUS_INDEX_PARAMS": {"M": 16, "efConstruction": 128},
+            },
+            "search": [{"MILVUS_SEARCH_PARAMS": {"ef": 64}}],
+        },
+        {
+            "build": {"MILVUS_VECTOR_STORAGE": "binary", "MILVUS_IVF_NLIST": 16},
+            "search": [
+                {"MILVUS_IVF_NPROBE": nprobe, "MILVUS_RESCORE_FACTOR": factor}
+                for nprobe in (4, 16)
+                for factor in (2, 4, 8)
+            ],
+        },
+    ]
+)
+
+
+def labelled_queries(
+    text: str, chunks: List[str], queries_file: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    The queries with the indexes of the chunks expected for them.
+    """
+    queries = []
+    for pair in extract_faq_pairs(text):
+        chunk = find_answer_chunk(pair, chunks)
+        if chunk is None:
+            logger.warning(f"[retrieval_eval] - No chunk holds the answer of FAQ {pair.number}")
+            continue
+        queries.append({"query": pair.question, "expected": {chunk}, "source": "faq"})
+    if queries_file:
+        chunk_keys = [match_key(chunk) for chunk in chunks]
+        with open(queries_file, "r", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                labelled = json.loads(line)
+                answer = match_key(labelled["answer"])
+                expected = {index for index, key in enumerate(chunk_keys) if answer in key}
+                if not expected:
+                    logger.warning(
+                        f"[retrieval_eval] - No chunk holds the answer of: {labelled['query']}"
+                    )
+                    continue
+                queries.append(
+                    {"query": labelled["query"], "expected": expected, "source": "file"}
+                )
+    return queries
+
+
+def wait_for_index(collection_name: str, index_name: str, timeout: float = 120) -> None:
+    """
+    Flushes the collection and waits until its rows are indexed, so the
+    searches run on the evaluated index and not on growing segments.
+    """
+    milvus_manager.milvus_client.flush(collection_name)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        index = milvus_manager.milvus_client.describe_index(collection_name, index_name)
+        if index.get("pending_index_rows", 0) == 0 and index.get(
+            "indexed_rows", 0
+        ) >= index.get("total_rows", 0):
+            return
+        time.sleep(0.5)
+    logger.warning(f"[retrieval_eval] - Index of {collection_name} not ready after {timeout}s")
+
+
+def evaluate(
+    manager: MilvusManager,
+    collection_name: str,
+    queries: List[Dict[str, Any]],
+    chunks: List[str],
+    ks: List[int],
+    repeat: int,
+) -> Dict[str, Any]:
+    """
+    Searches every query with the current settings of `manager`.
+    """
+    rerank_config = RerankConfig()
+    chunk_index = {chunk: index for index, chunk in enumerate(chunks)}
+    candidates = {
+        query["language"]: rerank_config.RERANK_CANDIDATES_BY_LANGUAGE.get(
+            query["language"], rerank_config.RERANK_CANDIDATES
+        )
+        for query in queries
+    }
+    top_k = max(ks + (list(candidates.values()) if rerank_config.RERANK_ENABLED else []))
+    # Loads the index and warms up the connection
+    manager.search_index("eval", collection_name, queries[0]["embedding"], ["content"], top_k=top_k)
+
+    latencies, ranks, reranked_ranks = [], [], []
+    for query in queries:
+        for _ in range(repeat):
+            elapsed, results = manager.search_index(
+                "eval", collection_name, query["embedding"], ["content"], top_k=top_k
+            )
+            latencies.append(elapsed * 1000)
+        hits = results[0]
+        ranks.append(_rank(hits, query["expected"], chunk_index))
+        if rerank_config.RERANK_ENABLED:
+            reranked = reranker.rerank(
+                query["text"], hits[: candidates[query["language"]]], "eval"
+            )
+            reranked_ranks.append(_rank(reranked, query["expected"], chunk_index))
+
+    report = {
+        f"recall@{k}": round(sum(rank <= k for rank in ranks) / len(ranks), 4)
+        for k in ks
+    }
+    languages = sorted(candidates)
+    if len(languages) > 1:
+        report["languages"] = {
+            language: {
+                f"recall@{k}": round(
+                    sum(
+                        rank <= k
+                        for rank, query in zip(ranks, queries)
+                        if query["language"] == language
+                    )
+                    / sum(query["language"] == language for query in queries),
+                    4,
+                )
+                for k in ks
+            }
+            for language in languages
+        }
+    report["mrr"] = round(
+        sum(1 / rank for rank in ranks if rank <= top_k) / len(ranks), 4
+    )
+    if reranked_ranks:
+        report[f"reranked_recall@{rerank_config.RERANK_TOP_N}"] = round(
+            sum(rank <= rerank_config.RERANK_TOP_N for rank in reranked_ranks)
+            / len(reranked_ranks),
+            4,
+        )
+    report.update(
+        search_top_k=top_k,
+        p50_ms=round(percentile(latencies, 50), 2),
+        p95_ms=round(percentile(latencies, 95), 2),
+    )
+    return report
+
+
+def _rank(hits: List[Dict[str, Any]], expected: set, chunk_index: Dict[str, int]) -> float:
+    for position, hit in enumerate(hits, start=1):
+        if chunk_index.get(hit["entity"]["content"]) in expected:
+            return position
+    return float("inf")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--source", help="FAQ PDF, INGESTION_SOURCE by default")
+    parser.add_argument("--queries-file", help="JSONL of extra labelled queries")
+    parser.add_argument("--sweep", help="JSON list of settings, a built-in grid by default")
+    parser.add_argument("--k", default="1,3,5,10", help="Comma-separated k of recall@k")
+    parser.add_argument("--repeat", type=int, default=3, help="Searches per query, for latency")
+    parser.add_argument("--collection", help="Evaluation collection, <collection>_eval by default")
+    parser.add_argument("--keep", action="store_true", help="Keep the evaluation collection")
+    parser.add_argument("--output", help="Results JSON path")
+    args = parser.parse_args()
+
+    base_config = MilvusConfig()
+    collection_name = args.collection or f"{base_config.MILVUS_COLLECTION_NAME}_eval"
+    if collection_name == base_config.MILVUS_COLLECTION_NAME:
+        parser.error("The evaluation collection must not be the app's collection")
+    ks = sorted({int(k) for k in args.k.split(",")})
+    if args.sweep:
+        with open(args.sweep, "r", encoding="utf-8") as sweep_file:
+            sweep = json.load(sweep_file)
+    else:
+        sweep = DEFAULT_SWEEP
+
+    text = load_document(args.source)
+    chunks = [chunk.strip() for chunk in split_text(text)]
+    queries = labelled_queries(text, chunks, args.queries_file)
+    if not queries:
+        raise SystemExit("No labelled query could be built from the document")
+    print(f"{len(chunks)} chunks, {len(queries)} labelled queries")
+    embeddings = embed_chunks(chunks)
+    # Queries in another language than the corpus are translated in batches, as the chatbot does
+    for query in queries:
+        query["language"] = query_translator.detect(query["query"])
+    translated = [
+        query
+        for query in queries
+        if query_translator.QUERY_TRANSLATION_ENABLED
+        and query["language"] != query_translator.CORPUS_LANGUAGE
+    ]
+    for query, text in zip(
+        translated, query_translator.translate([query["query"] for query in translated], "eval")
+    ):
+        query["text"] = text
+    for query in queries:
+        query.setdefault("text", query["query"])
+        query["embedding"] = openai_manager.create_embedding(query["text"], "eval")[1][
+            "data"
+        ][0]["embedding"]
+
+    # A manager of its own, whose settings are switched for every setting
+    manager = MilvusManager()
+    manager.cache_config.RETRIEVAL_CACHE_ENABLED = False
+    results = []
+    try:
+        for setting in sweep:
+            build_config = MilvusConfig()
+            for name, value in setting["build"].items():
+                setattr(build_config, name, value)
+            build_collection(collection_name, chunks, embeddings, build_config)
+            wait_for_index(collection_name, build_config.MILVUS_INDEX_NAME)
+            for search in setting.get("search") or [{}]:
+                for name, value in {**vars(build_config), **search}.items():
+                    setattr(manager, name, value)
+                report = evaluate(manager, collection_name, queries, chunks, ks, args.repeat)
+                results.append({"build": setting["build"], "search": search, **report})
+                print(json.dumps(results[-1]))
+    finally:
+        if not args.keep:
+            milvus_manager.milvus_client.drop_collection(collection_name=collection_name)
+
+    output = args.output or os.path.join(
+        "data",
+        "benchmarks",
+        f"retrieval-eval-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as output_file:
+        json.dump(
+            {
+                "started_at": datetime.now().isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "chunks": len(chunks),
+                "queries": len(queries),
+                "results": results,
+            },
+            output_file,
+            indent=2,
+        )
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
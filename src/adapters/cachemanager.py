@@ -0,0 +1,258 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import count
+from typing import Iterator, Optional
+
+from config import CacheConfig
+
+from src.adapters.loggingmanager import logger
+
+
+class InMemoryCacheStore:
+    """
+    A per-process store with TTL expiry and LRU eviction.
+
+    Entries expire `ttl_seconds` after their last write and the least recently
+    used entry is evicted once `max_entries` (or, when given, `max_bytes` of
+    values) is reached, which keeps the memory footprint bounded.
+    `lock(key)` serializes the read-modify-writes of a key between threads.
+    """
+
+    LOCK_STRIPES = 64
+
+    def __init__(
+        self, ttl_seconds: int, max_entries: int, max_bytes: Optional[int] = None
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self.size_bytes += len(value)
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes and self.size_bytes > self.max_bytes
+            ):
+                self._pop(next(iter(self._entries)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= len(entry[1])
+
+    def lock(self, key: str) -> threading.Lock:
+        # Striped, so the locks stay bounded however many keys there are
+        return self._key_locks[hash(key) % self.LOCK_STRIPES]
+
+
+class SqliteCacheStore:
+    """
+    A store shared by the worker processes of one host, in a local SQLite file.
+
+    It needs no server: in WAL mode every worker reads while one writes.
+    Entries expire `ttl_seconds` after their last write. Once `max_entries`
+    is exceeded, the entries closest to expiry (the least recently written)
+    are evicted, checked every PRUNE_EVERY writes. `lock(key)` is a lease
+    held in the same file, so it also serializes the worker processes; a
+    lease left by a dead process expires after LOCK_LEASE_SECONDS.
+    """
+
+    PRUNE_EVERY = 256
+    LOCK_LEASE_SECONDS = 30
+    LOCK_WAIT_SECONDS = 10
+    LOCK_POLL_SECONDS = 0.01
+
+    def __init__(
+        self, path: str, namespace: str, ttl_seconds: int, max_entries: int
+    ) -> None:
+        self.path = path
+        self.table = f"cache_{namespace}"
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = count(1)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        connection = self._connection()
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_{self.table}_expires_at ON {self.table} (expires_at)"
+        )
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table}_locks (key TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, opened after the worker process has started
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[str]:
+        row = (
+            self._connection()
+            .execute(
+                f"SELECT value FROM {self.table} WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        connection = self._connection()
+        connection.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, time.time() + self.ttl_seconds),
+        )
+        if next(self._writes) % self.PRUNE_EVERY == 0:
+            self._prune(connection)
+
+    def delete(self, key: str) -> None:
+        self._connection().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        connection = self._connection()
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.LOCK_WAIT_SECONDS
+        while True:
+            now = time.time()
+            # Takes the lease if it is free or expired, in one statement
+            acquired = connection.execute(
+                f"INSERT INTO {self.table}_locks (key, token, expires_at) VALUES (?, ?, ?) "
+                f"ON CONFLICT(key) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at "
+                f"WHERE {self.table}_locks.expires_at <= ?",
+                (key, token, now + self.LOCK_LEASE_SECONDS, now),
+            ).rowcount
+            if acquired:
+                break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Lock of {key} not acquired in {self.LOCK_WAIT_SECONDS}s")
+            time.sleep(self.LOCK_POLL_SECONDS)
+        try:
+            yield
+        finally:
+            connection.execute(
+                f"DELETE FROM {self.table}_locks WHERE key = ? AND token = ?", (key, token)
+            )
+
+    def _prune(self, connection: sqlite3.Connection) -> None:
+        connection.execute(
+            f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),)
+        )
+        connection.execute(
+            f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} ORDER BY expires_at LIMIT max(0, (SELECT COUNT(*) FROM {self.table}) - ?))",
+            (self.max_entries,),
+        )
+
+
+class RedisCacheStore:
+    """
+    A Redis-compatible store shared across workers and hosts.
+
+    TTL is applied per key; LRU eviction is delegated to the server's
+    `maxmemory-policy allkeys-lru` setting. `lock(key)` is a Redis lock,
+    shared by every worker and host.
+    """
+
+    LOCK_LEASE_SECONDS = 30
+    LOCK_WAIT_SECONDS = 10
+
+    def __init__(self, redis_url: str, ttl_seconds: int) -> None:
+        try:
+            import redis
+        except ImportError as import_exc:
+            raise ImportError(
+                "The redis cache backend requires the 'redis' package"
+            ) from import_exc
+        self.ttl_seconds = ttl_seconds
+        self.redis_client = redis.Redis.from_url(redis_url, decode_responses=True)
+
+    def get(self, key: str) -> Optional[str]:
+        return self.redis_client.get(key)
+
+    def set(self, key: str, value: str) -> None:
+        self.redis_client.set(key, value, ex=self.ttl_seconds)
+
+    def delete(self, key: str) -> None:
+        self.redis_client.delete(key)
+
+    def lock(self, key: str):
+        return self.redis_client.lock(
+            f"{key}:lock",
+            timeout=self.LOCK_LEASE_SECONDS,
+            blocking_timeout=self.LOCK_WAIT_SECONDS,
+        )
+
+
+def create_cache_store(
+    namespace: str,
+    ttl_seconds: int,
+    max_entries: int,
+    backend: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+):
+    """
+    Creates the store of a cache on the configured backend.
+
+    Args:
+        namespace (str): Name of the cache, e.g. "sessions" or "embeddings".
+        ttl_seconds (int): Lifetime of an entry after its last write.
+        max_entries (int): Bound on the entries (memory and sqlite backends).
+        backend (Optional[str]): "memory", "sqlite" or "redis", CACHE_BACKEND by default.
+        max_bytes (Optional[int]): Bound on the size of the values (memory backend).
+
+    Returns:
+        The store, with get / set / delete of string values and a lock(key)
+        context manager for read-modify-writes.
+    """
+    config = CacheConfig()
+    backend = backend or config.CACHE_BACKEND
+    if backend == "redis":
+        store = RedisCacheStore(redis_url=config.REDIS_URL, ttl_seconds=ttl_seconds)
+    elif backend == "sqlite":
+        store = SqliteCacheStore(
+            path=config.CACHE_SQLITE_PATH,
+            namespace=namespace,
+            ttl_seconds=ttl_seconds,
+            max_entries=max_entries,
+        )
+    else:
+        store = InMemoryCacheStore(
+            ttl_seconds=ttl_seconds, max_entries=max_entries, max_bytes=max_bytes
+        )
+    logger.info(f"[create_cache_store] - {namespace} cache on backend: {backend}")
+    return store
@@ -0,0 +1,392 @@
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from openai import AzureOpenAI, RateLimitError
+from config import OpenAIConfig
+
+from src.adapters.loggingmanager import logger
+from src.adapters.ratelimiter import (
+    RETRYABLE_ERRORS,
+    RateLimiter,
+    estimate_messages_tokens,
+    estimate_text_tokens,
+)
+
+# Weight of the newest observation in the latency / throttle moving averages
+EWMA_ALPHA = 0.2
+# Latency assumed for a deployment that has not served a request yet
+INITIAL_LATENCY_SECONDS = 1.0
+
+
+class Deployment:
+    """
+    One Azure OpenAI endpoint / deployment pair of the pool, with its own client,
+    quota (rate limiter) and health statistics.
+
+    `models` maps the override models of the callers (TRANSLATION_MODEL,
+    CHATBOT_DETAILS_MODEL, ...) to the deployment serving them on this
+    endpoint. None, for the single-endpoint setup, sends the names unchanged.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        client: AzureOpenAI,
+        chat_model: str,
+        embedding_model: str,
+        weight: float,
+        rate_limiter: RateLimiter,
+        models: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.name = name
+        self.client = client
+        self.chat_model = chat_model
+        self.embedding_model = embedding_model
+        self.weight = max(float(weight), 0.01)
+        self.rate_limiter = rate_limiter
+        self.models = models
+        self.ewma_latency = INITIAL_LATENCY_SECONDS
+        self.ewma_throttle = 0.0
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    def chat_deployment(self, model: Optional[str] = None) -> Optional[str]:
+        """
+        The chat deployment serving a model here, or None when it is not served.
+        """
+        if not model or model == self.chat_model:
+            return self.chat_model
+        if self.models is None:
+            return model
+        return self.models.get(model)
+
+    def is_open(self, now: float) -> bool:
+        return now < self.open_until
+
+    def score(self) -> float:
+        """
+        Expected cost of sending one more request here; lower is better.
+        """
+        return (
+            self.ewma_latency
+            * (1 + self.in_flight)
+            * (1 + 5 * self.ewma_throttle)
+            / self.weight
+        )
+
+
+class DeploymentPool(OpenAIConfig):
+    """
+    Routes OpenAI calls over a weighted pool of deployments.
+
+    Each call goes to the healthy deployment with the lowest score (EWMA
+    latency, in-flight requests and recent 429 rate, divided by its weight).
+    Retryable failures fail over to the next deployment immediately and only
+    back off once every deployment has been tried. A deployment failing
+    OPENAI_CIRCUIT_FAILURE_THRESHOLD times in a row is taken out of rotation
+    for OPENAI_CIRCUIT_COOLDOWN_SECONDS. Calls for an override model only go
+    to the deployments serving it. With OPENAI_HEDGE_DELAY_SECONDS set,
+    hedgeable calls still running after the delay are also sent to the next
+    best deployment and the first response wins.
+
+    Methods:
+        execute(call: Callable[[Deployment], Any], estimated_tokens: int, transaction_id: str, hedge: bool, model: Optional[str]) -> Tuple[Any, Deployment]:
+            Runs a call on the best deployment, with failover and optional hedging.
+
+        get_metrics() -> Dict[str, Any]:
+            Returns the health statistics of every deployment.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.deployments = [
+            self._build_deployment(index, spec)
+            for index, spec in enumerate(self._deployment_specs())
+        ]
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.OPENAI_MAX_CONCURRENCY * 2,
+            thread_name_prefix="openai-hedge",
+        )
+        self.metrics = {"failovers": 0, "hedged": 0, "hedge_wins": 0}
+        logger.info(
+            f"[DeploymentPool] - Deployments: {[deployment.name for deployment in self.deployments]}"
+        )
+
+    def _deployment_specs(self) -> List[Dict[str, Any]]:
+        if not self.OPENAI_DEPLOYMENTS:
+            return [{"name": "default"}]
+        specs = json.loads(self.OPENAI_DEPLOYMENTS)
+        if not isinstance(specs, list) or not specs:
+            raise ValueError("OPENAI_DEPLOYMENTS must be a non-empty JSON list")
+        return specs
+
+    def _build_deployment(self, index: int, spec: Dict[str, Any]) -> Deployment:
+        client = AzureOpenAI(
+            api_key=spec.get("api_key", self.OPENAI_API_KEY),
+            api_version=spec.get("api_version", self.OPENAI_API_VERSION),
+            azure_endpoint=spec.get("endpoint", self.OPENAI_ENDPOINT),
+            # Retries and failover are owned by the pool
+            max_retries=0,
+        )
+        return Deployment(
+            name=spec.get("name", f"deployment-{index}"),
+            client=client,
+            chat_model=spec.get("chat_deployment", self.CHATCOMPLETION_MODEL),
+            embedding_model=spec.get("embedding_deployment", self.EMBEDDING_MODEL),
+            weight=spec.get("weight", 1),
+            rate_limiter=RateLimiter(spec.get("rpm_limit"), spec.get("tpm_limit")),
+            # Without OPENAI_DEPLOYMENTS the override names are deployments of the endpoint
+            models=spec.get("models", {}) if self.OPENAI_DEPLOYMENTS else None,
+        )
+
+    def serving(self, model: Optional[str] = None) -> List[Deployment]:
+        """
+        Returns the deployments serving a chat model (all of them for the default one).
+        """
+        return [
+            deployment
+            for deployment in self.deployments
+            if deployment.chat_deployment(model) is not None
+        ]
+
+    def select(
+        self, exclude: Set[str] = frozenset(), model: Optional[str] = None
+    ) -> Optional[Deployment]:
+        """
+        Returns the lowest-scoring deployment serving `model` with a closed
+        circuit, not in `exclude`. When every circuit is open, the one closest
+        to reopening is returned.
+        """
+        now = time.monotonic()
+        candidates = [
+            deployment
+            for deployment in self.serving(model)
+            if deployment.name not in exclude
+        ]
+        if not candidates:
+            return None
+        with self._lock:
+            healthy = [
+                deployment for deployment in candidates if not deployment.is_open(now)
+            ]
+            if not healthy:
+                return min(candidates, key=lambda deployment: deployment.open_until)
+            return min(healthy, key=lambda deployment: deployment.score())
+
+    def _record(
+        self, deployment: Deployment, latency: Optional[float], throttled: bool
+    ) -> None:
+        with self._lock:
+            deployment.ewma_throttle += EWMA_ALPHA * (
+                float(throttled) - deployment.ewma_throttle
+            )
+            if latency is not None:
+                deployment.ewma_latency += EWMA_ALPHA * (
+                    latency - deployment.ewma_latency
+                )
+                deployment.consecutive_failures = 0
+                return
+            deployment.failures += 1
+            deployment.consecutive_failures += 1
+            if (
+                deployment.consecutive_failures
+                >= self.OPENAI_CIRCUIT_FAILURE_THRESHOLD
+            ):
+                # Re-opens on the first failure after a cooldown (half-open probe)
+                deployment.open_until = (
+                    time.monotonic() + self.OPENAI_CIRCUIT_COOLDOWN_SECONDS
+                )
+                logger.warning(
+                    f"[DeploymentPool] - Circuit opened for {deployment.name} for {self.OPENAI_CIRCUIT_COOLDOWN_SECONDS}s"
+                )
+
+    def _attempt(
+        self,
+        deployment: Deployment,
+        call: Callable[[Deployment], Any],
+        estimated_tokens: int,
+        transaction_id: str,
+    ) -> Any:
+        with self._lock:
+            deployment.in_flight += 1
+            deployment.requests += 1
+        started_at = time.monotonic()
+        try:
+            result = deployment.rate_limiter.execute(
+                lambda: call(deployment),
+                estimated_tokens=estimated_tokens,
+                transaction_id=transaction_id,
+                max_retries=0,
+            )
+            self._record(deployment, time.monotonic() - started_at, False)
+            return result
+        except RETRYABLE_ERRORS as exc:
+            self._record(deployment, None, isinstance(exc, RateLimitError))
+            raise
+        finally:
+            with self._lock:
+                deployment.in_flight -= 1
+
+    def _hedged_attempt(
+        self,
+        primary: Deployment,
+        call: Callable[[Deployment], Any],
+        estimated_tokens: int,
+        transaction_id: str,
+        tried: Set[str],
+        model: Optional[str],
+    ) -> Tuple[Any, Deployment]:
+        futures = {
+            self._executor.submit(
+                self._attempt, primary, call, estimated_tokens, transaction_id
+            ): primary
+        }
+        done, _ = wait(futures, timeout=self.OPENAI_HEDGE_DELAY_SECONDS)
+        if not done:
+            secondary = self.select(exclude=tried | {primary.name}, model=model)
+            if secondary is not None and not secondary.is_open(time.monotonic()):
+                tried.add(secondary.name)
+                self._count("hedged")
+                logger.info(
+                    f"[DeploymentPool][hedge][{transaction_id}] - {primary.name} slower than {self.OPENAI_HEDGE_DELAY_SECONDS}s, hedging on {secondary.name}"
+                )
+                futures[
+                    self._executor.submit(
+                        self._attempt, secondary, call, estimated_tokens, transaction_id
+                    )
+                ] = secondary
+
+        pending = set(futures)
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The losing request is left to finish in the background
+                    if futures[future] is not primary:
+                        self._count("hedge_wins")
+                    return future.result(), futures[future]
+                last_error = future.exception()
+        raise last_error
+
+    def execute(
+        self,
+        call: Callable[[Deployment], Any],
+        estimated_tokens: int,
+        transaction_id: str = "root",
+        hedge: bool = False,
+        model: Optional[str] = None,
+    ) -> Tuple[Any, Deployment]:
+        """
+        Runs an API call on the best deployment of the pool.
+
+        Args:
+            call (Callable[[Deployment], Any]): Builds and sends the request for a deployment.
+            estimated_tokens (int): Tokens reserved from the TPM bucket of the deployment.
+            transaction_id (str): The ID of the transaction.
+            hedge (bool): Whether the call is idempotent and may be hedged.
+            model (Optional[str]): Override chat model; only the deployments serving it are used.
+
+        Returns:
+            Tuple[Any, Deployment]: The result of the call and the deployment that served it.
+
+        Raises:
+            ValueError: If no deployment serves `model`.
+            Exception: The last error once MAX_RETRIES is exhausted, or any non-retryable error.
+        """
+        serving = len(self.serving(model))
+        if not serving:
+            raise ValueError(
+                f"No deployment of OPENAI_DEPLOYMENTS serves the model {model}, add it to their models"
+            )
+        tried: Set[str] = set()
+        attempt = 0
+        while True:
+            deployment = self.select(exclude=tried, model=model)
+            if deployment is None:
+                tried.clear()
+                deployment = self.select(model=model)
+            tried.add(deployment.name)
+            try:
+                if (
+                    hedge
+                    and self.OPENAI_HEDGE_DELAY_SECONDS
+                    and serving > 1
+                ):
+                    return self._hedged_attempt(
+                        deployment, call, estimated_tokens, transaction_id, tried, model
+                    )
+                return (
+                    self._attempt(deployment, call, estimated_tokens, transaction_id),
+                    deployment,
+                )
+            except RETRYABLE_ERRORS as exc:
+                if attempt >= self.MAX_RETRIES:
+                    raise
+                attempt += 1
+                if len(tried) < serving:
+                    self._count("failovers")
+                    logger.warning(
+                        f"[DeploymentPool][execute][{transaction_id}] - {type(exc).__name__} on {deployment.name}, failing over"
+                    )
+                    continue
+                # Every deployment failed this round, back off before the next one
+                tried.clear()
+                delay = (
+                    deployment.rate_limiter.retry_after(exc) or 0
+                ) + deployment.rate_limiter.backoff(attempt - 1)
+                logger.warning(
+                    f"[DeploymentPool][execute][{transaction_id}] - {type(exc).__name__} on {deployment.name}, retry {attempt}/{self.MAX_RETRIES} in {delay:.2f}s"
+                )
+                time.sleep(delay)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.metrics[key] += 1
+
+    def estimate_chat_tokens(
+        self, messages: List[Dict[str, str]], model: str
+    ) -> int:
+        """
+        Tokens to reserve for a chat completion. Skipped (0) when no deployment has a TPM limit.
+        """
+        if not any(deployment.rate_limiter.tpm_bucket for deployment in self.deployments):
+            return 0
+        return (
+            estimate_messages_tokens(messages, model)
+            + self.OPENAI_COMPLETION_TOKENS_ESTIMATE
+        )
+
+    def estimate_embedding_tokens(self, text: str, model: str) -> int:
+        if not any(deployment.rate_limiter.tpm_bucket for deployment in self.deployments):
+            return 0
+        return estimate_text_tokens(text, model)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            deployments = {
+                deployment.name: {
+                    "weight": deployment.weight,
+                    "ewma_latency_ms": round(deployment.ewma_latency * 1000, 1),
+                    "throttle_rate": round(deployment.ewma_throttle, 3),
+                    "in_flight": deployment.in_flight,
+                    "requests": deployment.requests,
+                    "failures": deployment.failures,
+                    "circuit": "open" if deployment.is_open(now) else "closed",
+                }
+                for deployment in self.deployments
+            }
+            metrics = dict(self.metrics)
+        for deployment in self.deployments:
+            deployments[deployment.name]["limiter"] = (
+                deployment.rate_limiter.get_metrics()
+            )
+        return dict(metrics, deployments=deployments)
@@ -0,0 +1,52 @@
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+from src.adapters.loggingmanager import logger
+
+T = TypeVar("T")
+
+
+class LazyAdapter(Generic[T]):
+    """
+    Module-level stand-in for an adapter singleton that builds it on first use.
+
+    Importing a module that exposes `milvus_manager = LazyAdapter(MilvusManager)`
+    neither connects nor loads the client; the first attribute access does.
+    A failed initialization is not cached, so the next call retries it (e.g.
+    once Milvus becomes reachable) instead of preventing the app from booting.
+
+    Methods:
+        get() -> T:
+            Returns the adapter, building it if needed.
+
+        initialized -> bool:
+            Whether the adapter has been built.
+    """
+
+    def __init__(self, factory: Callable[[], T]) -> None:
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def get(self) -> T:
+        instance: Optional[T] = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    logger.info(
+                        f"[LazyAdapter] - Initializing {getattr(self._factory, '__name__', self._factory)}"
+                    )
+                    instance = self._factory()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self.get(), name, value)
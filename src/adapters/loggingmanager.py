@@ -1,26 +1,179 @@
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import random
+import re
 import warnings
+from datetime import datetime, timezone
+from typing import IO, Optional, Tuple
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from config import LoggingConfig
 
 warnings.filterwarnings(action="ignore", message=".*Failed to resolve*")
 warnings.filterwarnings(action="ignore", message=".*Failed to establish*")
 
+# Held open for the life of the worker, see `_claim_worker_slot`
+_worker_slot_lock: Optional[IO] = None
+
+# "[Class][method][txn_id] - message", the prefix convention of the adapters
+PREFIX_PATTERN = re.compile(
+    r"^\[(?P<component>[^\]]+)\](?:\s*\[(?P<method>[^\]]+)\])?(?:\s*\[(?P<txn_id>[^\]]+)\])?"
+)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object per line.
+
+    The component, method and transaction ID are taken from the message
+    prefix, or from the `txn_id` / `pipeline` / `duration_ms` / `spans` extras
+    when given.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": message,
+        }
+        prefix = PREFIX_PATTERN.match(message)
+        if prefix:
+            entry.update(
+                {key: value for key, value in prefix.groupdict().items() if value}
+            )
+            # Two segments are [Class][txn_id] (e.g. "[ChatBot][user_id]")
+            if "txn_id" not in entry and "method" in entry:
+                entry["txn_id"] = entry.pop("method")
+        for key in ("txn_id", "pipeline", "duration_ms", "spans"):
+            if hasattr(record, key):
+                entry[key] = getattr(record, key)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a LOG_INFO_SAMPLE_RATE fraction of the INFO (and lower) records.
+    Warnings, errors and records logged with `extra={"sampled": False}` are always kept.
+    """
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or getattr(record, "sampled", True) is False:
+            return True
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Enqueues records for the background listener. Only the message and the
+    exception text are rendered on the calling thread, so the listener can
+    still format the structured fields.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _claim_worker_slot(log_file: str) -> Tuple[int, Optional[IO]]:
+    """
+    Locks the lowest worker slot no live process holds. The lock is released
+    when the process exits, so the worker replacing a recycled one takes over
+    its slot, and its files, instead of starting new ones.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        # No flock (Windows), the multi-worker mode runs on gunicorn anyway
+        return -1, None
+    root, _ = os.path.splitext(log_file)
+    slot = 0
+    while True:
+        lock_file = open(f"{root}.{slot}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return slot, lock_file
+        except OSError:
+            lock_file.close()
+            slot += 1
+
+
+def log_file_path(config: LoggingConfig) -> str:
+    """
+    LOG_FILE, suffixed with the slot of the worker when every worker has its
+    own file: logs.0.log to logs.<WORKERS - 1>.log.
+    """
+    global _worker_slot_lock
+    if not config.LOG_PER_WORKER:
+        return config.LOG_FILE
+    slot, _worker_slot_lock = _claim_worker_slot(config.LOG_FILE)
+    if slot < 0:
+        return config.LOG_FILE
+    root, extension = os.path.splitext(config.LOG_FILE)
+    return f"{root}.{slot}{extension}"
+
 
 def azure_logger():
     """
     Method to log messages.
 
+    Records are put on an in-memory queue by the calling thread and written
+    to the rotating log file by a background listener thread, so file I/O
+    stays off the request path. With several workers each of them rotates
+    its own file, see `log_file_path`.
+
     Returns:
         logger: Logger object
     """
-    logging.basicConfig(
-        filename="logs.log",
-        filemode="a",
-        format="%(asctime)s,%(msecs)d %(name)s %(levelname)s %(message)s",
-        datefmt="%H:%M:%S",
-        level=logging.INFO,
+    config = LoggingConfig()
+    file_handler = RotatingFileHandler(
+        log_file_path(config),
+        maxBytes=config.LOG_MAX_BYTES,
+        backupCount=config.LOG_BACKUP_COUNT,
+        encoding="utf-8",
     )
+    if config.LOG_FORMAT == "json":
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(
+            logging.Formatter(
+                "%(asctime)s,%(msecs)d %(name)s %(levelname)s %(message)s",
+                datefmt="%H:%M:%S",
+            )
+        )
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(config.LOG_INFO_SAMPLE_RATE))
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    # Flushes the queued records on interpreter exit
+    atexit.register(listener.stop)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(config.LOG_LEVEL)
+    root_logger.addHandler(queue_handler)
+
     logger = logging.getLogger("Cyfuture AI Bot")
-    logger.info("Logger Initialised..")
+    logger.info("Logger Initialised..", extra={"sampled": False})
     return logger
 
 
@@ -1,12 +1,25 @@
+import base64
+import json
+import threading
+import time
+import numpy as np
 from pymilvus import (
     MilvusClient,
 )
 from pymilvus.exceptions import MilvusException
-from config import MilvusConfig
+from config import CacheConfig, MilvusConfig
 
+from sqlalchemy import select, update
+from src.adapters.cachemanager import create_cache_store
+from src.adapters.lazy import LazyAdapter
 from src.adapters.loggingmanager import logger
+from src.adapters.singleflight import request_key
+from src.adapters.sqllitemanager import sql_manager
 from src.decorators import measure_time
-from typing import List, Dict, Any
+from src.metrics import cache_requests, registry
+from src.quantization import RESCORED_STORAGES, binary_codes, normalize
+from src.tables import collection_versions_table
+from typing import List, Dict, Any, Optional, Tuple
 
 
 class MilvusManager(MilvusConfig):
@@ -16,12 +29,31 @@ class MilvusManager(MilvusConfig):
         """
         super().__init__()
         self.milvus_error = "Milvus Server Failed"
+        # Search results of repeated / near-identical queries, shared by the workers
+        self.cache_config = CacheConfig()
+        self.retrieval_cache = create_cache_store(
+            namespace="retrieval",
+            ttl_seconds=self.cache_config.RETRIEVAL_CACHE_TTL_SECONDS,
+            max_entries=self.cache_config.RETRIEVAL_CACHE_MAX_ENTRIES,
+            max_bytes=self.cache_config.RETRIEVAL_CACHE_MAX_MB * 1024 * 1024,
+        )
+        self.retrieval_cache_stats = {"hits": 0, "misses": 0}
+        # collection_name -> (trusted until, ingestion version)
+        self._versions: Dict[str, Tuple[float, int]] = {}
+        # collection_name -> (ingestion version, collection exists)
+        self._existence: Dict[str, Tuple[int, bool]] = {}
+        # Fixed seed: every worker must derive the same signature for a query
+        self._hyperplanes = np.random.default_rng(0).standard_normal(
+            (self.cache_config.RETRIEVAL_CACHE_SIGNATURE_BITS, self.MILVUS_VECTOR_DIM)
+        )
+        self._stats_lock = threading.Lock()
         try:
             self.milvus_client = MilvusClient(
-                uri=f"tcp://{self.MILVUS_HOST}:{self.MILVUS_PORT}",
+                uri=self.MILVUS_URI,
                 timeout=self.MILVUS_TIMEOUT,
             )
             logger.info("[MilvusManager] - Milvus client connected")
+            registry.register_collector(self._collect_metrics)
         except MilvusException as milvus_exc:
             logger.exception(
                 f"[MilvusManager] - Failed to connect to Milvus server: {milvus_exc}"
@@ -33,6 +65,187 @@ class MilvusManager(MilvusConfig):
             )
             raise
 
+    def _collect_metrics(self) -> Dict[str, float]:
+        """
+        Hit rate of the retrieval cache in this process for /metrics.
+        """
+        with self._stats_lock:
+            hits, misses = (
+                self.retrieval_cache_stats["hits"],
+                self.retrieval_cache_stats["misses"],
+            )
+        return {
+            "cyfuture_retrieval_cache_hit_ratio": hits / (hits + misses)
+            if hits + misses
+            else 0.0,
+        }
+
+    def collection_version(self, collection_name: str) -> int:
+        """
+        The ingestion version of a collection, re-read from SQL at most every
+        RETRIEVAL_CACHE_VERSION_TTL_SECONDS.
+
+        Args:
+            collection_name (str): The name of the collection.
+
+        Returns:
+            int: The version, 0 before the first rebuild.
+        """
+        trusted_until, version = self._versions.get(collection_name, (0.0, 0))
+        if trusted_until > time.monotonic():
+            return version
+        rows = sql_manager.fetch_rows(
+            transaction_id=collection_name,
+            sql_query=select(collection_versions_table.c.version).where(
+                collection_versions_table.c.collection_name == collection_name
+            ),
+        )
+        version = rows[0]["version"] if rows else 0
+        self._versions[collection_name] = (
+            time.monotonic() + self.cache_config.RETRIEVAL_CACHE_VERSION_TTL_SECONDS,
+            version,
+        )
+        return version
+
+    def bump_collection_version(self, collection_name: str) -> None:
+        """
+        Moves a rebuilt collection to a new ingestion version. The cached
+        results of the previous version stop matching any key at once, and
+        expire with their TTL.
+
+        Args:
+            collection_name (str): The name of the rebuilt collection.
+        """
+        bumped = sql_manager.update_rows(
+            transaction_id=collection_name,
+            sql_query=update(collection_versions_table)
+            .where(collection_versions_table.c.collection_name == collection_name)
+            .values(version=collection_versions_table.c.version + 1),
+        )
+        if not bumped:
+            sql_manager.insert_rows(
+                transaction_id=collection_name,
+                table=collection_versions_table,
+                rows=[{"collection_name": collection_name, "version": 1}],
+            )
+        self._versions.pop(collection_name, None)
+        logger.info(
+            f"[MilvusManager][bump_collection_version] - Collection {collection_name} moved to a new ingestion version"
+        )
+
+    def collection_exists(self, transaction_id: str, collection_name: str) -> bool:
+        """
+        Whether a collection exists, checked on Milvus once per ingestion
+        version instead of on every search. Every rebuild bumps the version.
+
+        Args:
+            transaction_id (str): The transaction ID.
+            collection_name (str): The name of the collection.
+
+        Returns:
+            bool: True if the collection exists, False otherwise.
+        """
+        try:
+            version = self.collection_version(collection_name)
+        except Exception as version_exc:
+            logger.warning(
+                f"[MilvusManager][collection_exists] [{transaction_id}] - Version unavailable, checking Milvus: {version_exc}"
+            )
+            return self.check_collection_exists(transaction_id, collection_name)
+        checked_version, exists = self._existence.get(collection_name, (-1, False))
+        if checked_version != version:
+            exists = self.check_collection_exists(transaction_id, collection_name)
+            self._existence[collection_name] = (version, exists)
+        return exists
+
+    def _retrieval_cache_key(
+        self,
+        collection_name: str,
+        query: np.ndarray,
+        return_fields: List[str],
+        filter_expr: str,
+        top_k: int,
+    ) -> str:
+        # SimHash: the side of each random hyperplane the query falls on
+        signature = np.packbits(self._hyperplanes @ query > 0).tobytes().hex()
+        return self.cache_config.RETRIEVAL_CACHE_KEY_PREFIX + request_key(
+            collection_name,
+            self.collection_version(collection_name),
+            signature,
+            sorted(return_fields),
+            filter_expr,
+            top_k,
+            # Results of another index or search setting are not reused
+            self.MILVUS_VECTOR_STORAGE,
+            self.MILVUS_INDEX_TYPE,
+            self.MILVUS_SEARCH_PARAMS,
+            self.MILVUS_IVF_NPROBE,
+            self.MILVUS_RESCORE_FACTOR,
+        )
+
+    def _get_cached_results(
+        self,
+        transaction_id: str,
+        collection_name: str,
+        query: np.ndarray,
+        return_fields: List[str],
+        filter_expr: str,
+        top_k: int,
+    ) -> Tuple[Optional[str], Optional[List[List[Dict[str, Any]]]]]:
+        # A cache (or version table) outage only costs the Milvus search
+        try:
+            key = self._retrieval_cache_key(
+                collection_name, query, return_fields, filter_expr, top_k
+            )
+            cached = self.retrieval_cache.get(key)
+        except Exception as cache_exc:
+            logger.warning(
+                f"[MilvusManager][retrieval_cache] [{transaction_id}] - Cache bypassed: {cache_exc}"
+            )
+            return None, None
+        results = None
+        if cached is not None:
+            entry = json.loads(cached)
+            cached_query = np.frombuffer(
+                base64.b64decode(entry["query"]), dtype=np.float16
+            ).astype(np.float32)
+            # Signatures of different questions can collide, their results are not reused
+            if (
+                float(cached_query @ query)
+                >= self.cache_config.RETRIEVAL_CACHE_MIN_SIMILARITY
+            ):
+                results = entry["results"]
+        cache_requests.inc(
+            cache="retrieval", result="miss" if results is None else "hit"
+        )
+        with self._stats_lock:
+            self.retrieval_cache_stats["misses" if results is None else "hits"] += 1
+        return key, results
+
+    def _cache_results(
+        self,
+        transaction_id: str,
+        key: str,
+        query: np.ndarray,
+        results: List[List[Dict[str, Any]]],
+    ) -> None:
+        try:
+            self.retrieval_cache.set(
+                key,
+                json.dumps(
+                    {
+                        "query": base64.b64encode(
+                            query.astype(np.float16).tobytes()
+                        ).decode("ascii"),
+                        "results": results,
+                    }
+                ),
+            )
+        except Exception as cache_exc:
+            logger.warning(
+                f"[MilvusManager][retrieval_cache] [{transaction_id}] - Cache write failed: {cache_exc}"
+            )
+
     def check_collection_exists(
         self,
         transaction_id: str,
@@ -50,7 +263,7 @@ class MilvusManager(MilvusConfig):
         """
         try:
             status = self.milvus_client.has_collection(collection_name)
-            logger.info(
+            logger.debug(
                 f"[MilvusManager][check_collection_exists] [{transaction_id}] - Collection {collection_name} exists: {status}"
             )
             return status
@@ -65,6 +278,67 @@ class MilvusManager(MilvusConfig):
             )
             raise exc
 
+    def _first_pass(self, text_embedding: List[float], top_k: int) -> Dict[str, Any]:
+        """
+        The search arguments of the index of the configured MILVUS_VECTOR_STORAGE.
+        """
+        storage = self.MILVUS_VECTOR_STORAGE
+        if storage == "binary":
+            return {
+                "data": [binary_codes(text_embedding).tobytes()],
+                "anns_field": self.MILVUS_BINARY_FIELD,
+                "limit": top_k * self.MILVUS_RESCORE_FACTOR,
+                "search_params": {
+                    "metric_type": "HAMMING",
+                    "params": {"nprobe": self.MILVUS_IVF_NPROBE},
+                },
+            }
+        if storage == "pq":
+            return {
+                "data": [text_embedding],
+                "anns_field": self.MILVUS_VECTOR_FIELD,
+                "limit": top_k * self.MILVUS_RESCORE_FACTOR,
+                "search_params": {
+                    "metric_type": self.MILVUS_DISTANCE_METRIC,
+                    "params": {"nprobe": self.MILVUS_IVF_NPROBE},
+                },
+            }
+        search_params = dict(self.MILVUS_SEARCH_PARAMS)
+        if "ef" in search_params:
+            # HNSW rejects an ef below the number of requested hits
+            search_params["ef"] = max(search_params["ef"], top_k)
+        return {
+            "data": [
+                np.asarray(text_embedding, dtype=np.float16)
+                if storage == "float16"
+                else text_embedding
+            ],
+            "anns_field": self.MILVUS_VECTOR_FIELD,
+            "limit": top_k,
+            "search_params": {
+                "metric_type": self.MILVUS_DISTANCE_METRIC,
+                "params": search_params,
+            },
+        }
+
+    def _rescore(
+        self, query: np.ndarray, hits: List[Dict[str, Any]], top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Orders the candidates of the compressed index by the exact cosine
+        similarity of their full-precision vectors, which are not returned.
+        """
+        if not hits:
+            return hits
+        vectors = normalize(
+            [hit["entity"].pop(self.MILVUS_VECTOR_FIELD) for hit in hits]
+        )
+        similarities = vectors @ query
+        best = np.argsort(-similarities, kind="stable")[:top_k]
+        return [
+            {**hits[index], "distance": float(similarities[index])} for index in best
+        ]
+
     @measure_time
     def search_index(
         self,
@@ -74,10 +348,16 @@ class MilvusManager(MilvusConfig):
         return_fields: List[str],
         filter_expr: str = "",
         top_k: int = 5,
-    ) -> List[Dict[str, Any]]:
+    ) -> List[List[Dict[str, Any]]]:
         """
         Searches for similar items in a specified Milvus collection based on a given text embedding.
 
+        Results are served from the retrieval cache when the same (quantized)
+        embedding was searched with the same parameters since the last
+        rebuild of the collection. With the binary and pq vector storages,
+        MILVUS_RESCORE_FACTOR * top_k candidates of the compressed index are
+        rescored at full precision and the distances are cosine similarities.
+
         Args:
             transaction_id (str): A unique identifier for the transaction.
             collection_name (str): The name of the Milvus collection to search in.
@@ -87,21 +367,56 @@ class MilvusManager(MilvusConfig):
             top_k (int, optional): The number of top similar items to retrieve. Defaults to 5.
 
         Returns:
-            List[Dict[str, Any]]: A list of dictionaries containing the search results.
+            List[List[Dict[str, Any]]]: Per query, the hits as {"id", "distance", "entity"} dictionaries.
         """
-        if not self.check_collection_exists(transaction_id, collection_name):
+        query = normalize(text_embedding)
+        cache_key = None
+        if self.cache_config.RETRIEVAL_CACHE_ENABLED:
+            cache_key, cached = self._get_cached_results(
+                transaction_id,
+                collection_name,
+                query,
+                return_fields,
+                filter_expr,
+                top_k,
+            )
+            if cached is not None:
+                logger.info(
+                    f"[MilvusManager][search_index] [{transaction_id}] - Retrieval cache hit for collection {collection_name}"
+                )
+                return cached
+        if not self.collection_exists(transaction_id, collection_name):
             raise Exception(f"Collection {collection_name} does not exist.")
+        rescored = self.MILVUS_VECTOR_STORAGE in RESCORED_STORAGES
         try:
             retrieved_data = self.milvus_client.search(
                 collection_name=collection_name,
-                data=[text_embedding],
-                limit=top_k,
-                output_fields=return_fields,
+                output_fields=return_fields + [self.MILVUS_VECTOR_FIELD]
+                if rescored
+                else return_fields,
                 filter=filter_expr,
+                **self._first_pass(text_embedding, top_k),
             )
             logger.info(
                 f"[MilvusManager][search_index] [{transaction_id}] - Data retrieved successfully from collection {collection_name}"
             )
+            retrieved_data = [
+                [
+                    {
+                        "id": hit["id"],
+                        "distance": hit["distance"],
+                        "entity": dict(hit["entity"]),
+                    }
+                    for hit in hits
+                ]
+                for hits in retrieved_data
+            ]
+            if rescored:
+                retrieved_data = [
+                    self._rescore(query, hits, top_k) for hits in retrieved_data
+                ]
+            if cache_key:
+                self._cache_results(transaction_id, cache_key, query, retrieved_data)
             return retrieved_data
         except MilvusException as milvus_exc:
             logger.exception(
@@ -114,5 +429,71 @@ class MilvusManager(MilvusConfig):
             )
             raise exc
 
+    @measure_time
+    def match_faq_question(
+        self, transaction_id: str, text_embedding: List[float]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Looks for a known FAQ question at least FAQ_MATCH_MIN_SIMILARITY
+        similar to the query.
+
+        The nearest question is served from the retrieval cache like the
+        searches of `search_index`, keyed on the version of the FAQ collection.
+
+        A failure only costs the shortcut: it is logged and treated as no match.
+
+        Args:
+            transaction_id (str): A unique identifier for the transaction.
+            text_embedding (List[float]): The embedding of the query.
+
+        Returns:
+            Optional[Dict[str, Any]]: The answer chunk as a {"id", "distance", "entity"}
+            hit, with the matched question in its entity, or None.
+        """
+        collection_name = self.MILVUS_FAQ_COLLECTION_NAME
+        return_fields = ["question", "content"]
+        query = normalize(text_embedding)
+        try:
+            cache_key, hits = None, None
+            if self.cache_config.RETRIEVAL_CACHE_ENABLED:
+                cache_key, cached = self._get_cached_results(
+                    transaction_id, collection_name, query, return_fields, "", 1
+                )
+                hits = cached[0] if cached is not None else None
+            if hits is None:
+                if not self.collection_exists(transaction_id, collection_name):
+                    return None
+                hits = [
+                    {
+                        "id": hit["id"],
+                        "distance": hit["distance"],
+                        "entity": dict(hit["entity"]),
+                    }
+                    for hit in self.milvus_client.search(
+                        collection_name=collection_name,
+                        data=[text_embedding],
+                        anns_field=self.MILVUS_FAQ_VECTOR_FIELD,
+                        limit=1,
+                        output_fields=return_fields,
+                        search_params={"metric_type": self.MILVUS_DISTANCE_METRIC},
+                    )[0]
+                ]
+                if cache_key:
+                    self._cache_results(transaction_id, cache_key, query, [hits])
+        except Exception as exc:
+            logger.warning(
+                f"[MilvusManager][match_faq_question] [{transaction_id}] - FAQ match skipped: {exc}"
+            )
+            return None
+        match = None
+        if hits and hits[0]["distance"] >= self.FAQ_MATCH_MIN_SIMILARITY:
+            match = hits[0]
+            logger.info(
+                f"[MilvusManager][match_faq_question] [{transaction_id}] - Matched FAQ question ({match['distance']:.3f}): {match['entity']['question']}"
+            )
+        cache_requests.inc(cache="faq_question", result="miss" if match is None else "hit")
+        return match
+
 
-milvus_manager = MilvusManager()
+# Connects on first use, so the app boots even when Milvus is unreachable
+milvus_manager = LazyAdapter(MilvusManager)
@@ -1,10 +1,15 @@
 import json
-from typing import List, Dict, Any
-from openai import AzureOpenAI
-from config import OpenAIConfig
+import threading
+from typing import List, Dict, Any, Iterator, Optional
+from config import CacheConfig, OpenAIConfig
 
 from src.decorators import measure_time
 from src.adapters.loggingmanager import logger
+from src.adapters.cachemanager import create_cache_store
+from src.adapters.deploymentpool import DeploymentPool
+from src.adapters.lazy import LazyAdapter
+from src.metrics import cache_requests, record_llm_usage, registry
+from src.adapters.singleflight import SingleFlight, request_key
 
 
 class OpenaAIManager(OpenAIConfig):
@@ -19,6 +24,9 @@ class OpenaAIManager(OpenAIConfig):
 
         - chat_completion(transaction_id: str, messages: List[Dict[str, str]], temperature: float = 0.01, response_format={"type": "json_object"}) -> Dict[Any, Any]:
             Performs chat completion using the OpenAI API.
+
+        - chat_completion_stream(transaction_id: str, messages: List[Dict[str, str]], temperature: float = 0.01, response_format={"type": "json_object"}) -> Iterator[str]:
+            Performs chat completion using the OpenAI API and yields the content as it is generated.
     """
 
     def __init__(self) -> None:
@@ -28,14 +36,175 @@ class OpenaAIManager(OpenAIConfig):
         super().__init__()
         self.embedding_error = "OpenAI Embedding Generation Failed"
         self.compeltion_error = "OpenAI Chat Completion Failed"
-        self.openai_client = AzureOpenAI(
-            api_key=self.OPENAI_API_KEY,
-            api_version=self.OPENAI_API_VERSION,
-            azure_endpoint=self.OPENAI_ENDPOINT,
-            max_retries=self.MAX_RETRIES,
+        # Weighted pool of deployments with per-deployment rate limits and failover
+        self.deployment_pool = DeploymentPool()
+        # Identical in-flight embeddings / deterministic completions share one upstream call
+        self.singleflight = SingleFlight()
+        # Embeddings are deterministic, so they are kept in the cache shared by the workers
+        cache_config = CacheConfig()
+        self.embedding_cache_prefix = cache_config.EMBEDDING_CACHE_KEY_PREFIX
+        self.embedding_cache = create_cache_store(
+            namespace="embeddings",
+            ttl_seconds=cache_config.EMBEDDING_CACHE_TTL_SECONDS,
+            max_entries=cache_config.EMBEDDING_CACHE_MAX_ENTRIES,
         )
+        # Cumulative chat completion token usage, including provider prompt cache hits
+        self.usage_stats = {
+            "requests": 0,
+            "prompt_tokens": 0,
+            "cached_prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+        self._usage_lock = threading.Lock()
+        registry.register_collector(self._collect_metrics)
         logger.info("[OpenaAIManager] - OpenAI Client initialized")
 
+    def _collect_metrics(self) -> Dict[str, float]:
+        """
+        Gauges of the deployment pool, its rate limiters and the request coalescing for /metrics.
+        """
+        pool_metrics = self.deployment_pool.get_metrics()
+        limiters = [
+            deployment["limiter"] for deployment in pool_metrics["deployments"].values()
+        ]
+        return {
+            "cyfuture_openai_in_flight": sum(limiter["in_flight"] for limiter in limiters),
+            "cyfuture_openai_queue_depth": sum(
+                limiter["queue_depth"] for limiter in limiters
+            ),
+            "cyfuture_openai_throttled": sum(limiter["throttled"] for limiter in limiters),
+            "cyfuture_openai_failovers": pool_metrics["failovers"],
+            "cyfuture_openai_hedged": pool_metrics["hedged"],
+            "cyfuture_openai_open_circuits": sum(
+                deployment["circuit"] == "open"
+                for deployment in pool_metrics["deployments"].values()
+            ),
+            "cyfuture_openai_coalesced_calls": self.singleflight.get_metrics()[
+                "coalesced_calls"
+            ],
+        }
+
+    def _track_usage(
+        self, usage: Dict[str, Any], transaction_id: str, model: str
+    ) -> None:
+        """
+        Accumulates the token usage of a chat completion and logs the prompt cache hit.
+
+        Args:
+            usage (Dict[str, Any]): The "usage" block of the completion response.
+            transaction_id (str): The ID of the transaction.
+            model (str): The model that served the completion.
+        """
+        if not usage:
+            return
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        cached_tokens = (usage.get("prompt_tokens_details") or {}).get(
+            "cached_tokens"
+        ) or 0
+        with self._usage_lock:
+            self.usage_stats["requests"] += 1
+            self.usage_stats["prompt_tokens"] += prompt_tokens
+            self.usage_stats["cached_prompt_tokens"] += cached_tokens
+            self.usage_stats["completion_tokens"] += (
+                usage.get("completion_tokens") or 0
+            )
+        record_llm_usage(
+            model, prompt_tokens, cached_tokens, usage.get("completion_tokens") or 0
+        )
+        logger.info(
+            f"[OpenaAIManager][usage][{transaction_id}] - prompt_tokens: {prompt_tokens}, cached_tokens: {cached_tokens}"
+        )
+
+    def _create_embedding(self, text: str, transaction_id: str) -> Dict[str, Any]:
+        """
+        Rate-limited upstream embedding call.
+        """
+        estimated_tokens = self.deployment_pool.estimate_embedding_tokens(
+            text, self.EMBEDDING_MODEL
+        )
+        response, deployment = self.deployment_pool.execute(
+            lambda deployment: deployment.client.embeddings.create(
+                input=text,
+                model=deployment.embedding_model,
+                encoding_format="float",
+            ),
+            estimated_tokens=estimated_tokens,
+            transaction_id=transaction_id,
+            hedge=True,
+        )
+        json_response = response.model_dump()
+        usage = json_response.get("usage") or {}
+        record_llm_usage(
+            json_response.get("model") or deployment.embedding_model,
+            usage.get("prompt_tokens") or 0,
+        )
+        deployment.rate_limiter.record_usage(estimated_tokens, usage.get("total_tokens"))
+        return json_response
+
+    def _get_cached_embedding(
+        self, key: str, transaction_id: str
+    ) -> Optional[Dict[str, Any]]:
+        # A cache outage only costs the upstream call
+        try:
+            cached = self.embedding_cache.get(self.embedding_cache_prefix + key)
+        except Exception as cache_exc:
+            logger.warning(
+                f"[OpenaAIManager][embedding_cache][{transaction_id}] - Cache read failed: {cache_exc}"
+            )
+            return None
+        cache_requests.inc(cache="embedding", result="miss" if cached is None else "hit")
+        return json.loads(cached) if cached is not None else None
+
+    def _cache_embedding(
+        self, key: str, json_response: Dict[str, Any], transaction_id: str
+    ) -> None:
+        try:
+            self.embedding_cache.set(
+                self.embedding_cache_prefix + key,
+                json.dumps({"data": json_response["data"]}),
+            )
+        except Exception as cache_exc:
+            logger.warning(
+                f"[OpenaAIManager][embedding_cache][{transaction_id}] - Cache write failed: {cache_exc}"
+            )
+
+    def _chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        transaction_id: str,
+        temperature: float,
+        response_format: Dict[str, str],
+        model: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Rate-limited upstream chat completion call.
+        """
+        estimated_tokens = self.deployment_pool.estimate_chat_tokens(
+            messages, self.CHATCOMPLETION_MODEL
+        )
+        response, deployment = self.deployment_pool.execute(
+            lambda deployment: deployment.client.chat.completions.create(
+                model=deployment.chat_deployment(model),
+                messages=messages,
+                temperature=temperature,
+                response_format=response_format,
+            ),
+            estimated_tokens=estimated_tokens,
+            transaction_id=transaction_id,
+            hedge=True,
+            model=model,
+        )
+        json_response = response.model_dump()
+        self._track_usage(
+            json_response.get("usage"),
+            transaction_id,
+            json_response.get("model") or deployment.chat_deployment(model),
+        )
+        deployment.rate_limiter.record_usage(
+            estimated_tokens, (json_response.get("usage") or {}).get("total_tokens")
+        )
+        return json_response
+
     @measure_time
     def create_embedding(self, text: str, transaction_id: str = "root"):
         """
@@ -52,15 +221,21 @@ class OpenaAIManager(OpenAIConfig):
             Exception: If there is an error while generating the embedding.
         """
         json_response = {}
+        key = request_key("embedding", self.EMBEDDING_MODEL, text)
         try:
-            response = self.openai_client.embeddings.create(
-                input=text,
-                model=self.EMBEDDING_MODEL,
-                encoding_format="float",
+            cached = self._get_cached_embedding(key, transaction_id)
+            if cached is not None:
+                logger.info(
+                    f"[OpenaAIManager][create_embedding][{transaction_id}] - Embedding cache hit"
+                )
+                return cached
+            json_response, shared = self.singleflight.do(
+                key, lambda: self._create_embedding(text, transaction_id)
             )
-            json_response = response.model_dump()
+            if not shared:
+                self._cache_embedding(key, json_response, transaction_id)
             logger.info(
-                f"[OpenaAIManager][create_embedding][{transaction_id}] - Embedding generated"
+                f"[OpenaAIManager][create_embedding][{transaction_id}] - Embedding generated, coalesced: {shared}"
             )
         except Exception as create_embedding_exc:
             logger.exception(
@@ -76,6 +251,7 @@ class OpenaAIManager(OpenAIConfig):
         transaction_id: str = "root",
         temperature: float = 0.01,
         response_format={"type": "json_object"},
+        model: Optional[str] = None,
     ) -> Dict[Any, Any]:
         """
         Perform chat completion using OpenAI API.
@@ -85,6 +261,7 @@ class OpenaAIManager(OpenAIConfig):
             messages (List[Dict[str, str]]): List of messages in the conversation.
             temperature (float, optional): Controls the randomness of the output. Defaults to 0.
             max_tokens (int, optional): The maximum number of tokens in the response. Defaults to 500.
+            model (str, optional): Chat deployment to use instead of CHATCOMPLETION_MODEL.
 
         Returns:
             Dict[Any, Any]: The response from the OpenAI API.
@@ -99,16 +276,29 @@ class OpenaAIManager(OpenAIConfig):
         """
         json_response = {}
         try:
-            response = self.openai_client.chat.completions.create(
-                model=self.CHATCOMPLETION_MODEL,
-                messages=messages,
-                temperature=temperature,
-                response_format=response_format,
-            )
 
-            json_response = response.model_dump()
+            def call():
+                return self._chat_completion(
+                    messages, transaction_id, temperature, response_format, model
+                )
+
+            shared = False
+            if temperature <= self.OPENAI_COALESCE_MAX_TEMPERATURE:
+                # Near-deterministic completions of identical requests are interchangeable
+                json_response, shared = self.singleflight.do(
+                    request_key(
+                        "chat",
+                        model or self.CHATCOMPLETION_MODEL,
+                        messages,
+                        temperature,
+                        response_format,
+                    ),
+                    call,
+                )
+            else:
+                json_response = call()
             logger.info(
-                f"[OpenaAIManager][chat_completion][{transaction_id}] - Chat Completion Successful"
+                f"[OpenaAIManager][chat_completion][{transaction_id}] - Chat Completion Successful, coalesced: {shared}"
             )
         except Exception as chat_completion_exc:
             logger.exception(
@@ -117,5 +307,67 @@ class OpenaAIManager(OpenAIConfig):
             raise chat_completion_exc
         return json_response
 
+    def chat_completion_stream(
+        self,
+        messages: List[Dict[str, str]],
+        transaction_id: str = "root",
+        temperature: float = 0.01,
+        response_format={"type": "json_object"},
+    ) -> Iterator[str]:
+        """
+        Perform a streamed chat completion using OpenAI API.
+
+        Args:
+            transaction_id (str): The ID of the transaction.
+            messages (List[Dict[str, str]]): List of messages in the conversation.
+            temperature (float, optional): Controls the randomness of the output. Defaults to 0.01.
+            response_format (dict, optional): The response format. Defaults to JSON mode.
+
+        Yields:
+            str: The content deltas, in the order they are generated.
+
+        Raises:
+            Exception: If there is an error while performing chat completion.
+        """
+        try:
+            estimated_tokens = self.deployment_pool.estimate_chat_tokens(
+                messages, self.CHATCOMPLETION_MODEL
+            )
+            # The limiter slot covers opening the stream, not reading it. Streams
+            # fail over but are never hedged, tokens are already on their way.
+            stream, deployment = self.deployment_pool.execute(
+                lambda deployment: deployment.client.chat.completions.create(
+                    model=deployment.chat_model,
+                    messages=messages,
+                    temperature=temperature,
+                    response_format=response_format,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                ),
+                estimated_tokens=estimated_tokens,
+                transaction_id=transaction_id,
+            )
+            for chunk in stream:
+                # Azure sends a leading chunk with prompt filter results and no choices
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if chunk.usage:
+                    self._track_usage(
+                        chunk.usage.model_dump(),
+                        transaction_id,
+                        chunk.model or deployment.chat_model,
+                    )
+                    deployment.rate_limiter.record_usage(
+                        estimated_tokens, chunk.usage.total_tokens
+                    )
+            logger.info(
+                f"[OpenaAIManager][chat_completion_stream][{transaction_id}] - Chat Completion Stream Successful"
+            )
+        except Exception as chat_completion_exc:
+            logger.exception(
+                f"[OpenaAIManager][chat_completion_stream][{transaction_id}] Error: {str(chat_completion_exc)}"
+            )
+            raise chat_completion_exc
+
 
-openai_manager = OpenaAIManager()
+openai_manager = LazyAdapter(OpenaAIManager)
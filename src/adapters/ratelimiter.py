@@ -0,0 +1,261 @@
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+import tiktoken
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+from config import AppConfig, OpenAIConfig
+
+from src.adapters.loggingmanager import logger
+
+RETRYABLE_ERRORS = (
+    RateLimitError,
+    APITimeoutError,
+    APIConnectionError,
+    InternalServerError,
+)
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as exc:
+        # BPE files unavailable (e.g. offline); fall back to a character estimate
+        logger.warning(f"[RateLimiter] - tiktoken unavailable for {model}: {exc}")
+        return None
+
+
+def estimate_text_tokens(text: str, model: str) -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def estimate_messages_tokens(messages: List[Dict[str, str]], model: str) -> int:
+    # ~4 tokens of chat markup per message on top of the content
+    return sum(
+        estimate_text_tokens(message.get("content") or "", model) + 4
+        for message in messages
+    )
+
+
+class TokenBucket:
+    """
+    A per-minute token bucket that hands out reservations.
+
+    `reserve` always succeeds and returns how long the caller must wait before
+    using what it reserved, so callers queue up in arrival order instead of
+    polling. The level can go negative, which is also how a server-side
+    Retry-After is propagated to every caller of the process.
+    """
+
+    def __init__(self, per_minute: int) -> None:
+        self.capacity = float(per_minute)
+        self.fill_rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.fill_rate
+        )
+        self.updated_at = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+            return max(0.0, -self.tokens / self.fill_rate)
+
+    def adjust(self, delta: float) -> None:
+        """
+        Corrects an earlier reservation once the real cost is known (negative refunds).
+        """
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - delta)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Empties the bucket so that no reservation completes before `seconds` from now.
+        """
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.fill_rate)
+
+
+class RateLimiter(OpenAIConfig):
+    """
+    Client-side limiter in front of the OpenAI API.
+
+    Every call reserves one request from the RPM bucket and its estimated
+    tokens from the TPM bucket, then takes a slot of a bounded concurrency
+    semaphore. Retryable failures are retried with exponential backoff and
+    full jitter; a 429's Retry-After pauses both buckets, so the whole process
+    backs off together instead of retrying in lockstep.
+
+    Methods:
+        execute(call: Callable[[], Any], estimated_tokens: int, transaction_id: str) -> Any:
+            Runs an API call within the limits, retrying retryable errors.
+
+        get_metrics() -> Dict[str, float]:
+            Returns queue depth, in-flight, throttling and retry counters.
+    """
+
+    def __init__(
+        self, rpm_limit: Optional[int] = None, tpm_limit: Optional[int] = None
+    ) -> None:
+        """
+        Args:
+            rpm_limit (Optional[int]): Requests per minute of the deployment, defaults to OPENAI_RPM_LIMIT.
+            tpm_limit (Optional[int]): Tokens per minute of the deployment, defaults to OPENAI_TPM_LIMIT.
+        """
+        super().__init__()
+        if rpm_limit is None:
+            rpm_limit = self.OPENAI_RPM_LIMIT
+        if tpm_limit is None:
+            tpm_limit = self.OPENAI_TPM_LIMIT
+        # The limits are the deployment's, each serving process enforces its share
+        workers = max(1, AppConfig().WORKERS)
+        rpm_limit = max(1, rpm_limit // workers) if rpm_limit else 0
+        tpm_limit = max(1, tpm_limit // workers) if tpm_limit else 0
+        self.rpm_bucket = TokenBucket(rpm_limit) if rpm_limit else None
+        self.tpm_bucket = TokenBucket(tpm_limit) if tpm_limit else None
+        self.semaphore = threading.BoundedSemaphore(self.OPENAI_MAX_CONCURRENCY)
+        self.metrics = {
+            "queue_depth": 0,
+            "max_queue_depth": 0,
+            "in_flight": 0,
+            "requests": 0,
+            "throttled": 0,
+            "retries": 0,
+            "wait_seconds_total": 0.0,
+        }
+        self._metrics_lock = threading.Lock()
+
+    def _count(self, key: str, value: float = 1) -> None:
+        with self._metrics_lock:
+            self.metrics[key] += value
+            if key == "queue_depth":
+                self.metrics["max_queue_depth"] = max(
+                    self.metrics["max_queue_depth"], self.metrics["queue_depth"]
+                )
+
+    def _acquire(self, estimated_tokens: int) -> None:
+        self._count("queue_depth")
+        started_at = time.monotonic()
+        try:
+            wait = 0.0
+            if self.rpm_bucket:
+                wait = max(wait, self.rpm_bucket.reserve(1))
+            if self.tpm_bucket:
+                wait = max(wait, self.tpm_bucket.reserve(estimated_tokens))
+            if wait:
+                time.sleep(wait)
+            self.semaphore.acquire()
+        finally:
+            self._count("queue_depth", -1)
+            self._count("wait_seconds_total", time.monotonic() - started_at)
+        self._count("in_flight")
+
+    def _release(self) -> None:
+        self._count("in_flight", -1)
+        self.semaphore.release()
+
+    def retry_after(self, exc: Exception) -> Optional[float]:
+        response = getattr(exc, "response", None)
+        if response is None:
+            return None
+        headers = response.headers
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000
+            if headers.get("retry-after"):
+                return float(headers["retry-after"])
+        except ValueError:
+            return None
+        return None
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(
+            0,
+            min(
+                self.OPENAI_BACKOFF_MAX_SECONDS,
+                self.OPENAI_BACKOFF_BASE_SECONDS * 2**attempt,
+            ),
+        )
+
+    def execute(
+        self,
+        call: Callable[[], Any],
+        estimated_tokens: int,
+        transaction_id: str = "root",
+        max_retries: Optional[int] = None,
+    ) -> Any:
+        """
+        Runs an API call within the rate and concurrency limits.
+
+        Args:
+            call (Callable[[], Any]): The API call.
+            estimated_tokens (int): Tokens reserved from the TPM bucket for the call.
+            transaction_id (str): The ID of the transaction.
+            max_retries (Optional[int]): Retries of retryable errors, defaults to MAX_RETRIES.
+
+        Returns:
+            Any: The result of the call.
+
+        Raises:
+            Exception: The last error once MAX_RETRIES is exhausted, or any non-retryable error.
+        """
+        if max_retries is None:
+            max_retries = self.MAX_RETRIES
+        attempt = 0
+        while True:
+            self._acquire(estimated_tokens)
+            try:
+                self._count("requests")
+                return call()
+            except RETRYABLE_ERRORS as exc:
+                retry_after = self.retry_after(exc)
+                if isinstance(exc, RateLimitError):
+                    self._count("throttled")
+                    if retry_after:
+                        for bucket in (self.rpm_bucket, self.tpm_bucket):
+                            if bucket:
+                                bucket.pause(retry_after)
+                if attempt >= max_retries:
+                    raise
+                # Jitter on top of Retry-After de-synchronizes the retrying callers
+                delay = (retry_after or 0) + self.backoff(attempt)
+                logger.warning(
+                    f"[RateLimiter][execute][{transaction_id}] - {type(exc).__name__}, retry {attempt + 1}/{max_retries} in {delay:.2f}s"
+                )
+            finally:
+                self._release()
+            self._count("retries")
+            time.sleep(delay)
+            attempt += 1
+
+    def record_usage(self, estimated_tokens: int, total_tokens: int) -> None:
+        """
+        Corrects the TPM bucket with the real token usage of a call.
+        """
+        if self.tpm_bucket and total_tokens:
+            self.tpm_bucket.adjust(total_tokens - estimated_tokens)
+
+    def get_metrics(self) -> Dict[str, float]:
+        with self._metrics_lock:
+            return dict(self.metrics)
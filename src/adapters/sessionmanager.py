@@ -0,0 +1,228 @@
+from typing import Optional, Dict
+from config import SessionConfig, SqlConfig
+
+from src.adapters.cachemanager import create_cache_store
+from src.adapters.loggingmanager import logger
+from src.adapters.sqllitemanager import sql_manager
+from src.types import (
+    SessionStateModel,
+    ConversationAnalyticsModel,
+    ConversationSummaryModel,
+    UserDetailsModel,
+)
+
+
+class SessionManager(SessionConfig):
+    """
+    Holds the conversation state of active users so that a turn can be served
+    without reading SQLite.
+
+    SQLite stays the system of record: every save is written through to the
+    database first and then to the session store. A session is hydrated from
+    SQLite only when it is not present in the store. Every read-modify-write
+    of a session holds the store lock of its user, so concurrent turns of the
+    same user (in any worker) do not overwrite each other's changes.
+
+    Methods:
+        get_session(user_id: str) -> SessionStateModel:
+            Returns the cached session, hydrating it from SQLite on a miss.
+
+        save_turn(conversation_analytics: ConversationAnalyticsModel, pending_complaint: Optional[Dict[str, str]] = None) -> SessionStateModel:
+            Persists a conversation turn and appends it to the session.
+
+        save_user_details(user_details: UserDetailsModel) -> SessionStateModel:
+            Persists user details and stores them in the session.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.store = create_cache_store(
+            namespace="sessions",
+            ttl_seconds=self.SESSION_TTL_SECONDS,
+            max_entries=self.SESSION_MAX_ENTRIES,
+            backend=self.SESSION_BACKEND,
+        )
+        logger.info(
+            f"[SessionManager] - Session store initialized with backend: {self.SESSION_BACKEND}"
+        )
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.SESSION_KEY_PREFIX}{user_id}"
+
+    def _put(self, session: SessionStateModel) -> SessionStateModel:
+        overflow = len(session.turns) - self.SESSION_HARD_MAX_TURNS
+        if overflow > 0:
+            # Only reached when the summaries keep failing; like a hydrate, the
+            # turns that never made it into the summary are skipped
+            session.turns = session.turns[overflow:]
+            session.summarized_turns += overflow
+            logger.warning(
+                f"[SessionManager][_put][{session.user_id}] - Dropped {overflow} unsummarized turns from the session"
+            )
+        self.store.set(self._key(session.user_id), session.model_dump_json())
+        return session
+
+    def _hydrate(self, user_id: str) -> SessionStateModel:
+        """
+        Builds a session from SQLite for a user that is not in the store.
+        """
+        summary_df = sql_manager.fetch_data(
+            transaction_id=user_id,
+            sql_query=f"SELECT summary, summarized_turns FROM {SqlConfig().CONVERSATION_SUMMARY_TABLE} WHERE user_id = :user_id ORDER BY created_at DESC, id DESC LIMIT 1;",
+            params={"user_id": user_id},
+        )
+        count_df = sql_manager.fetch_data(
+            transaction_id=user_id,
+            sql_query=f"SELECT COUNT(*) AS total_turns FROM {SqlConfig().CONVERSATION_ANALYTICS_TABLE} WHERE user_id = :user_id;",
+            params={"user_id": user_id},
+        )
+        summary, summarized_turns = "", 0
+        if not summary_df.empty:
+            summary = summary_df.iloc[0]["summary"]
+            summarized_turns = int(summary_df.iloc[0]["summarized_turns"])
+        unsummarized_turns = max(
+            int(count_df.iloc[0]["total_turns"]) - summarized_turns, 0
+        )
+        turns_df = sql_manager.fetch_data(
+            transaction_id=user_id,
+            sql_query=f"SELECT user_text, response, complaint_details, followup_flag FROM {SqlConfig().CONVERSATION_ANALYTICS_TABLE} WHERE user_id = :user_id ORDER BY created_at DESC, id DESC LIMIT :limit;",
+            params={
+                "user_id": user_id,
+                "limit": min(unsummarized_turns, self.SESSION_MAX_TURNS),
+            },
+        ).iloc[::-1]
+        user_df = sql_manager.fetch_data(
+            transaction_id=user_id,
+            sql_query=f"SELECT name, phone_number, email FROM {SqlConfig().USER_DETAILS_TABLE} WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 1;",
+            params={"user_id": user_id},
+        )
+        session = SessionStateModel(
+            user_id=user_id,
+            turns=[
+                {"user_text": row["user_text"], "response": row["response"]}
+                for _, row in turns_df.iterrows()
+            ],
+            summary=summary,
+            # Turns beyond SESSION_MAX_TURNS that never made it into the summary are skipped
+            summarized_turns=summarized_turns + unsummarized_turns - len(turns_df),
+        )
+        if not user_df.empty:
+            session.user_details = {
+                key: value or "" for key, value in user_df.iloc[0].to_dict().items()
+            }
+        if not turns_df.empty and int(turns_df.iloc[-1]["followup_flag"]):
+            session.pending_complaint = {
+                "complaint_details": turns_df.iloc[-1]["complaint_details"] or "",
+                "followup_question": turns_df.iloc[-1]["response"],
+            }
+        return session
+
+    def get_session(self, user_id: str) -> SessionStateModel:
+        """
+        Returns the session of a user, hydrating it from SQLite on a miss.
+
+        Args:
+            user_id (str): Unique identifier for the user.
+
+        Returns:
+            SessionStateModel: The session state of the user.
+        """
+        try:
+            cached = self.store.get(self._key(user_id))
+            if cached is not None:
+                logger.info(f"[SessionManager][get_session][{user_id}] - Session hit")
+                return SessionStateModel.model_validate_json(cached)
+            session = self._put(self._hydrate(user_id))
+            logger.info(
+                f"[SessionManager][get_session][{user_id}] - Session hydrated from SQL"
+            )
+            return session
+        except Exception as exc:
+            logger.exception(f"[SessionManager][get_session][{user_id}] Error: {exc}")
+            raise exc
+
+    def save_turn(
+        self,
+        conversation_analytics: ConversationAnalyticsModel,
+        pending_complaint: Optional[Dict[str, str]] = None,
+    ) -> SessionStateModel:
+        """
+        Writes a conversation turn through to SQLite and appends it to the session.
+
+        Args:
+            conversation_analytics (ConversationAnalyticsModel): The turn to persist.
+            pending_complaint (Optional[Dict[str, str]]): The complaint still being collected, None once it is raised.
+
+        Returns:
+            SessionStateModel: The updated session state.
+        """
+        with self.store.lock(self._key(conversation_analytics.user_id)):
+            # Load the session before writing so that a cold hydrate does not pick up this turn twice
+            session = self.get_session(conversation_analytics.user_id)
+            conversation_analytics.to_sql()
+            session.turns.append(
+                {
+                    "user_text": conversation_analytics.user_text,
+                    "response": conversation_analytics.response,
+                }
+            )
+            session.pending_complaint = pending_complaint
+            return self._put(session)
+
+    def save_user_details(self, user_details: UserDetailsModel) -> SessionStateModel:
+        """
+        Writes user details through to SQLite and stores them in the session.
+
+        Args:
+            user_details (UserDetailsModel): The user details to persist.
+
+        Returns:
+            SessionStateModel: The updated session state.
+        """
+        with self.store.lock(self._key(user_details.user_id)):
+            session = self.get_session(user_details.user_id)
+            user_details.to_sql()
+            session.user_details = user_details.model_dump(exclude={"user_id"})
+            return self._put(session)
+
+    def save_summary(
+        self, session: SessionStateModel, summary: str, folded_turns: int
+    ) -> SessionStateModel:
+        """
+        Writes a new running summary through to SQLite and drops the turns it covers from the session.
+
+        Args:
+            session (SessionStateModel): The session whose oldest turns were summarized.
+            summary (str): The updated running summary.
+            folded_turns (int): Number of oldest turns of the session covered by the new summary.
+
+        Returns:
+            SessionStateModel: The updated session state.
+        """
+        with self.store.lock(self._key(session.user_id)):
+            # Turns may have been appended since `session` was read, the fold
+            # is applied to the current session unless another one got there first
+            current = self.get_session(session.user_id)
+            if current.summarized_turns != session.summarized_turns:
+                logger.info(
+                    f"[SessionManager][save_summary][{session.user_id}] - Session already folded, summary dropped"
+                )
+                return current
+            current.summary = summary
+            current.summarized_turns += folded_turns
+            current.turns = current.turns[folded_turns:]
+            ConversationSummaryModel(
+                user_id=current.user_id,
+                summary=current.summary,
+                summarized_turns=current.summarized_turns,
+            ).to_sql()
+            return self._put(current)
+
+    def invalidate(self, user_id: str) -> None:
+        """
+        Drops a user's session so that the next turn re-hydrates it from SQLite.
+        """
+        self.store.delete(self._key(user_id))
+
+
+session_manager = SessionManager()
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+
+def request_key(*parts: Any) -> str:
+    """
+    Stable key of a request, built from its model, payload and parameters.
+    """
+    return hashlib.sha256(
+        json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Deduplicates identical in-flight calls.
+
+    The first caller of a key (the leader) runs the call; callers arriving with
+    the same key while it is in flight wait for it and share its result or
+    error. Nothing is cached once the call completes.
+
+    Methods:
+        do(key: str, call: Callable[[], Any]) -> Tuple[Any, bool]:
+            Runs or joins the call of a key, returns the result and whether it was shared.
+
+        get_metrics() -> Dict[str, int]:
+            Returns the number of upstream calls and coalesced callers.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.metrics = {"upstream_calls": 0, "coalesced_calls": 0}
+
+    def do(self, key: str, call: Callable[[], Any]) -> Tuple[Any, bool]:
+        with self._lock:
+            in_flight = self._calls.get(key)
+            if in_flight is None:
+                in_flight = self._calls[key] = _Call()
+                self.metrics["upstream_calls"] += 1
+                leader = True
+            else:
+                in_flight.waiters += 1
+                self.metrics["coalesced_calls"] += 1
+                leader = False
+
+        if not leader:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.result, True
+
+        try:
+            in_flight.result = call()
+            return in_flight.result, False
+        except Exception as exc:
+            in_flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            in_flight.done.set()
+
+    def get_metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.metrics, in_flight=len(self._calls))
@@ -1,15 +1,15 @@
-import pyodbc
-import pandas as pd
 from sqlalchemy import text
-from sqlalchemy import create_engine
-from pandas.core.api import DataFrame
+from typing import TYPE_CHECKING, Union
+from sqlalchemy import create_engine, inspect, make_url, MetaData, Table
+from sqlalchemy.sql import Executable
 from sqlalchemy.exc import TimeoutError, ResourceClosedError, SQLAlchemyError
 from config import SqlConfig
+from src.adapters.lazy import LazyAdapter
 from src.adapters.loggingmanager import logger
 
-
-# disabling pyodbc default pooling
-pyodbc.pooling = False
+if TYPE_CHECKING:
+    # pandas is only imported by the DataFrame based methods, when they are called
+    from pandas import DataFrame
 
 
 class SQLiteManager(SqlConfig):
@@ -18,6 +18,8 @@ class SQLiteManager(SqlConfig):
 
     This class provides methods for establishing a connection to a SQL Server,
     inserting data from a DataFrame into a SQL table, and fetching data from the database.
+    The backend is selected by `SqlConfig.DB_URL`: SQLite by default, or any SQLAlchemy
+    URL such as PostgreSQL, which is then served from a pooled engine.
 
     Attributes:
         engine (sqlalchemy.engine.Engine): The SQLAlchemy engine object for executing SQL queries.
@@ -30,6 +32,10 @@ class SQLiteManager(SqlConfig):
         insert_data(): Inserts data from a DataFrame into a SQL table.
         fetch_data(): Fetches data from the database using the provided SQL query.
         execute_query(): Executes a SQL query.
+        insert_rows(): Inserts many rows into a table in a single transaction.
+        fetch_rows(): Fetches rows as dictionaries without building a DataFrame.
+        update_rows(): Executes an UPDATE/DELETE and returns the affected row count.
+        create_schema(): Creates the tables and indexes of a MetaData object.
     """
 
     def __init__(self):
@@ -47,8 +53,16 @@ class SQLiteManager(SqlConfig):
         self.sql_error = "On-prem SQL failed"
         ## SQL Connection
         try:
-            self.engine = create_engine(f"sqlite:///{self.DB_PATH}")
-            logger.info("[SQLiteManager] - SQL Client initialized")
+            if "pyodbc" in make_url(self.DB_URL).drivername:
+                import pyodbc
+
+                # disabling pyodbc default pooling
+                pyodbc.pooling = False
+            self.engine = create_engine(self.DB_URL, **self._engine_options())
+            self.dialect = self.engine.dialect.name
+            logger.info(
+                f"[SQLiteManager] - SQL Client initialized, dialect: {self.dialect}"
+            )
         except (TimeoutError, ResourceClosedError, SQLAlchemyError) as exce:
             logger.exception(f"[SQLiteManager] Error: {str(exce)}")
             raise
@@ -56,11 +70,25 @@ class SQLiteManager(SqlConfig):
             logger.exception(f"[SQLiteManager] Error: {str(sqlmgr_exc)}")
             raise
 
+    def _engine_options(self) -> dict:
+        """
+        Engine keyword arguments for the configured backend.
+        """
+        if self.DB_URL.startswith("sqlite"):
+            return {}
+        return {
+            "pool_size": self.DB_POOL_SIZE,
+            "max_overflow": self.DB_MAX_OVERFLOW,
+            "pool_timeout": self.DB_POOL_TIMEOUT,
+            "pool_recycle": self.DB_POOL_RECYCLE,
+            "pool_pre_ping": True,
+        }
+
     def insert_data(
         self,
         transaction_id: str,
         table_name: str,
-        df: DataFrame,
+        df: "DataFrame",
         if_exists: str = "append",
     ) -> bool:
         """
@@ -107,13 +135,16 @@ class SQLiteManager(SqlConfig):
             if connection:
                 connection.close()
 
-    def fetch_data(self, transaction_id: str, sql_query: str) -> DataFrame:
+    def fetch_data(
+        self, transaction_id: str, sql_query: str, params: dict = None
+    ) -> "DataFrame":
         """
         Fetches data from the database using the provided SQL query.
 
         Args:
             transaction_id (str): The ID of the transaction.
             sql_query (str): The SQL query to execute.
+            params (dict, optional): Bind parameters for the SQL query.
 
         Returns:
             DataFrame: A pandas DataFrame containing the fetched data.
@@ -121,10 +152,12 @@ class SQLiteManager(SqlConfig):
         Raises:
             Exception: If there is an error while fetching the data.
         """
+        import pandas as pd
+
         connection = None
         try:
             connection = self.engine.connect()
-            df = pd.read_sql(sql=text(sql_query), con=connection)
+            df = pd.read_sql(sql=text(sql_query), con=connection, params=params)
             connection.close()
             logger.info(
                 f"[SQLiteManager][fetch_data][{transaction_id}] - Data Fetched Successfully"
@@ -192,5 +225,142 @@ class SQLiteManager(SqlConfig):
             if connection:
                 connection.close()
 
+    def insert_rows(self, transaction_id: str, table: Table, rows: list) -> int:
+        """
+        Inserts many rows into a table with one executemany in a single transaction.
+        Either every row is inserted or, on error, none is.
+
+        Args:
+            transaction_id (str): The ID of the transaction.
+            table (Table): The SQLAlchemy table to insert into.
+            rows (list): The rows to insert, as dictionaries keyed by column name.
+
+        Returns:
+            int: The number of rows inserted.
+        """
+        if not rows:
+            return 0
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(table.insert(), rows)
+            logger.info(
+                f"[SQLiteManager][insert_rows][{transaction_id}] - Data inserted Successfully in table {table.name}, rows affected: {len(rows)}"
+            )
+            return len(rows)
+        except (TimeoutError, ResourceClosedError, SQLAlchemyError) as exce:
+            logger.exception(
+                f"[SQLiteManager][insert_rows][{transaction_id}] Error: {str(exce)}"
+            )
+            raise exce
+
+    def fetch_rows(
+        self,
+        transaction_id: str,
+        sql_query: Union[str, Executable],
+        params: dict = None,
+    ) -> list:
+        """
+        Fetches rows as dictionaries, for paths that should not pay for a DataFrame.
+
+        Args:
+            transaction_id (str): The ID of the transaction.
+            sql_query (Union[str, Executable]): The SQL query or SQLAlchemy statement to execute.
+            params (dict, optional): Bind parameters for the SQL query.
+
+        Returns:
+            list: The fetched rows as dictionaries.
+        """
+        if isinstance(sql_query, str):
+            sql_query = text(sql_query)
+        try:
+            with self.engine.connect() as connection:
+                result = connection.execute(sql_query, params or {})
+                rows = [dict(row) for row in result.mappings().all()]
+            logger.info(
+                f"[SQLiteManager][fetch_rows][{transaction_id}] - Data Fetched Successfully"
+            )
+            return rows
+        except (TimeoutError, ResourceClosedError, SQLAlchemyError) as exce:
+            logger.exception(
+                f"[SQLiteManager][fetch_rows][{transaction_id}] Error: {str(exce)}"
+            )
+            raise exce
+
+    def update_rows(
+        self,
+        transaction_id: str,
+        sql_query: Union[str, Executable],
+        params: dict = None,
+    ) -> int:
+        """
+        Executes an UPDATE/DELETE in a transaction and returns the number of affected rows.
+
+        Args:
+            transaction_id (str): The ID of the transaction.
+            sql_query (Union[str, Executable]): The SQL query or SQLAlchemy statement to execute.
+            params (dict, optional): Bind parameters for the SQL query.
+
+        Returns:
+            int: The number of affected rows.
+        """
+        if isinstance(sql_query, str):
+            sql_query = text(sql_query)
+        try:
+            with self.engine.begin() as connection:
+                rowcount = connection.execute(sql_query, params or {}).rowcount
+            logger.info(
+                f"[SQLiteManager][update_rows][{transaction_id}] - query executed successfully, rows affected: {rowcount}"
+            )
+            return rowcount
+        except (TimeoutError, ResourceClosedError, SQLAlchemyError) as exce:
+            logger.exception(
+                f"[SQLiteManager][update_rows][{transaction_id}] Error: {str(exce)}"
+            )
+            raise exce
+
+    def _add_missing_columns(self, transaction_id: str, table: Table) -> None:
+        existing = {column["name"] for column in inspect(self.engine).get_columns(table.name)}
+        with self.engine.begin() as connection:
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=self.engine.dialect)
+                connection.execute(
+                    text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}')
+                )
+                logger.info(
+                    f"[SQLiteManager][create_schema][{transaction_id}] - column {column.name} added to {table.name}"
+                )
+
+    def create_schema(self, transaction_id: str, metadata: MetaData) -> bool:
+        """
+        Creates the tables and indexes described by a MetaData object.
+
+        Indexes are created separately with `checkfirst` so that they are also
+        added to tables that already exist, and so are the nullable columns
+        added to a table definition after the table was created.
+
+        Args:
+            transaction_id: Unique ID for the transaction
+            metadata: The SQLAlchemy MetaData holding the table definitions
+        Returns:
+            True if the schema was created successfully
+        """
+        try:
+            metadata.create_all(self.engine, checkfirst=True)
+            for table in metadata.sorted_tables:
+                self._add_missing_columns(transaction_id, table)
+                for index in table.indexes:
+                    index.create(self.engine, checkfirst=True)
+            logger.info(
+                f"[SQLiteManager][create_schema][{transaction_id}] - schema created successfully"
+            )
+            return True
+        except (TimeoutError, ResourceClosedError, SQLAlchemyError) as exce:
+            logger.exception(
+                f"[SQLiteManager][create_schema][{transaction_id}] Error: {str(exce)}"
+            )
+            raise exce
+
 
-sql_manager = SQLiteManager()
+sql_manager = LazyAdapter(SQLiteManager)
@@ -1,22 +1,41 @@
+import hashlib
 import json
-from config import SqlConfig, MilvusConfig
+from typing import Any, Callable, Generator, Iterator, Optional, Tuple, Union
+from partialjson.json_parser import JSONParser
+from config import MilvusConfig, ChatBotConfig, RerankConfig
 from src.types import (
     ChatBotModel,
     ConversationAnalyticsModel,
     UserDetailsModel,
     ComplaintModel,
+    SessionStateModel,
 )
 from src.adapters.loggingmanager import logger
+from src.metrics import Trace
 
 from src.prompts import (
     get_chatbot_prompt,
     get_complaint_status_prompt,
+    get_details_prompt,
     get_intent_prompt,
+    get_unified_prompt,
 )
-from src.adapters.sqllitemanager import sql_manager
+from src.details import (
+    COMPLAINT_ID_PATTERN,
+    USER_DETAIL_FIELDS,
+    asks_for_name,
+    extract_user_details,
+    get_details_followup_question,
+    missing_user_details,
+    unparsed_text,
+)
+from src.adapters.sessionmanager import session_manager
 from src.adapters.openaimanager import openai_manager
 from src.adapters.milvusmanager import milvus_manager
-from src.utils import get_user_detail, get_complaint_status, create_complaint
+from src.memory import conversation_memory
+from src.language import query_translator
+from src.reranker import reranker
+from src.utils import get_complaint_status, create_complaint
 
 
 class ChatBot:
@@ -25,6 +44,14 @@ class ChatBot:
         self.conversation_analytics = ConversationAnalyticsModel(
             **self.data.model_dump()
         )
+        self.pipeline = self._select_pipeline()
+        # Stored with the turn, so the analytics can be split per A/B arm
+        self.conversation_analytics.pipeline = self.pipeline
+        # Spans of the turn per stage, exposed as a Server-Timing header
+        self.trace = Trace(self.data.user_id, pipeline=self.pipeline)
+        logger.info(
+            f"[ChatBot] - Pipeline selected for user_id: {self.data.user_id}, Pipeline: {self.pipeline}"
+        )
 
     def get_intent(self, previous_conversations: str) -> str:
         try:
@@ -32,10 +59,11 @@ class ChatBot:
                 user_input=self.data.user_text,
                 previous_conversations=previous_conversations,
             )
-            _, chat_completion_response = openai_manager.chat_completion(
+            elapsed, chat_completion_response = openai_manager.chat_completion(
                 transaction_id=self.data.user_id,
                 messages=messages,
             )
+            self.trace.record("intent", elapsed)
             intent = json.loads(
                 chat_completion_response["choices"][0]["message"]["content"]
             )
@@ -50,166 +78,506 @@ class ChatBot:
             )
             raise exc
 
-    def get_response(self) -> str:
-        try:
-            sql_query = f"""SELECT user_text, response FROM {SqlConfig().CONVERSATION_ANALYTICS_TABLE} WHERE user_id = '{self.data.user_id}' ORDER BY created_at DESC LIMIT 2;"""
+    def _stream_json(
+        self, messages: list, text_field: Callable[[dict], Optional[str]]
+    ) -> Generator[Tuple[str, str], None, dict]:
+        """
+        Streams a JSON-mode completion and yields ("token", text) events for the growing text of one field.
 
-            fetched_df = (
-                sql_manager.fetch_data(
-                    transaction_id=self.data.user_id,
-                    sql_query=sql_query,
-                )
-                .iloc[::-1]
-                .reset_index(drop=True)
-            )
-            previous_conversations = ""
-            if not fetched_df.empty:
-                for idx, row in fetched_df.iterrows():
-                    previous_conversations += (
-                        f"User: {row['user_text']}\nBot (You): {row['response']}\n\n"
-                    )
-                previous_conversations += f"User: {self.data.user_text}"
-                previous_conversations = previous_conversations.strip()
-            else:
-                previous_conversations = "No previous conversations found."
+        The partial JSON is re-parsed with partialjson after every delta, and
+        only the newly generated suffix of `text_field(partial)` is yielded.
 
-            logger.info(
-                f"[ChatBot] - Fetched previous conversations for user_id: {self.data.user_id}"
+        Args:
+            messages (list): The prompt messages.
+            text_field (Callable[[dict], Optional[str]]): Picks the text to stream from the partially parsed JSON.
+
+        Returns:
+            dict: The fully parsed JSON response, as the generator return value.
+        """
+        parser = JSONParser()
+        content, emitted = "", ""
+        with self.trace.span("generation"):
+            for delta in openai_manager.chat_completion_stream(
+                transaction_id=self.data.user_id,
+                messages=messages,
+            ):
+                content += delta
+                try:
+                    partial = parser.parse(content)
+                except Exception:
+                    continue
+                text = text_field(partial) if isinstance(partial, dict) else None
+                if isinstance(text, str) and len(text) > len(emitted):
+                    if text.startswith(emitted):
+                        yield "token", text[len(emitted) :]
+                        emitted = text
+        return json.loads(content)
+
+    def _select_pipeline(self) -> str:
+        """
+        Picks the "multi" or "single" call pipeline. In "ab" mode the split is
+        a stable hash of the user_id, so a conversation never switches arms.
+        """
+        config = ChatBotConfig()
+        if config.CHATBOT_PIPELINE != "ab":
+            return config.CHATBOT_PIPELINE
+        bucket = int(hashlib.sha256(self.data.user_id.encode()).hexdigest()[:8], 16)
+        if bucket / 0xFFFFFFFF < config.CHATBOT_SINGLE_CALL_RATIO:
+            return "single"
+        return "multi"
+
+    def _load_memory(self) -> Tuple[SessionStateModel, str]:
+        """
+        Loads the session and renders the conversation memory.
+        """
+        with self.trace.span("memory"):
+            session = session_manager.get_session(self.data.user_id)
+            previous_conversations = conversation_memory.build_context(
+                session=session, user_text=self.data.user_text
             )
-            intent = self.get_intent(previous_conversations=previous_conversations)
+        logger.info(
+            f"[ChatBot] - Fetched previous conversations for user_id: {self.data.user_id}"
+        )
+        return session, previous_conversations
 
-            if intent == "status":
-                logger.info(
-                    f"[ChatBot] - Status request received for user_id: {self.data.user_id}"
-                )
-                status_messages = get_complaint_status_prompt(
-                    user_input=self.data.user_text
-                )
-                _, chat_completion_response = openai_manager.chat_completion(
-                    transaction_id=self.data.user_id,
-                    messages=status_messages,
-                )
-                status_response = json.loads(
-                    chat_completion_response["choices"][0]["message"]["content"]
-                )
+    @staticmethod
+    def _response_text(partial: dict) -> Optional[str]:
+        """
+        The user-facing text of a (partial) chatbot or single-call response.
+        """
+        if partial.get("followup_flag") is True:
+            return partial.get("followup_question")
+        if partial.get("followup_flag") is False:
+            return (partial.get("user_info") or {}).get("response")
+        return None
+
+    def _extract_with_details_model(
+        self, known_details: dict, followup_question: str
+    ) -> dict:
+        """
+        Extracts the user details of a follow-up reply with CHATBOT_DETAILS_MODEL.
+        """
+        config = ChatBotConfig()
+        messages = get_details_prompt(
+            user_input=self.data.user_text,
+            followup_question=followup_question,
+            known_details=json.dumps(known_details),
+        )
+        elapsed, chat_completion_response = openai_manager.chat_completion(
+            transaction_id=self.data.user_id,
+            messages=messages,
+            model=config.CHATBOT_DETAILS_MODEL or None,
+        )
+        self.trace.record("generation", elapsed)
+        return json.loads(chat_completion_response["choices"][0]["message"]["content"])
+
+    def _get_details_response(
+        self, session: SessionStateModel
+    ) -> Tuple[SessionStateModel, Optional[dict]]:
+        """
+        Handles a detail-collection turn without retrieval or the full prompt.
+
+        A turn collects details when the previous one ended with a follow-up
+        question of the complaint flow. The details are extracted with regular
+        expressions, or with CHATBOT_DETAILS_MODEL when none are found or when
+        the name was asked for and the rest of the reply is not one. While
+        some are still missing the next follow-up question is returned, in the
+        language of the user. Once
+        all are known, or the user asked something else, no response is
+        returned and the turn goes through the full pipeline, with the
+        collected details in the session.
+
+        Returns:
+            Tuple[SessionStateModel, Optional[dict]]: The session and the follow-up response, if any.
+        """
+        pending_complaint = session.pending_complaint
+        if not ChatBotConfig().CHATBOT_DETAILS_ROUTING or not pending_complaint:
+            return session, None
+        if COMPLAINT_ID_PATTERN.search(self.data.user_text):
+            return session, None
+
+        known_details = {
+            field: value
+            for field, value in {
+                **(session.user_details or {}),
+                "complaint_details": pending_complaint.get("complaint_details"),
+            }.items()
+            if value
+        }
+        followup_question = pending_complaint.get("followup_question") or ""
+        extracted = extract_user_details(self.data.user_text, followup_question)
+        route = "regex"
+        # e.g. "server down since morning" is not a name, nor a reply to ignore
+        unrecognised_name = (
+            asks_for_name(followup_question)
+            and "name" not in extracted
+            and unparsed_text(self.data.user_text)
+        )
+        if not extracted or unrecognised_name:
+            route = "details_model"
+            details_response = self._extract_with_details_model(
+                known_details, followup_question
+            )
+            if details_response.get("needs_answer"):
                 logger.info(
-                    f"[ChatBot] - Status response generated for user_id: {self.data.user_id}"
+                    f"[ChatBot] - Follow-up reply needs an answer for user_id: {self.data.user_id}"
                 )
-                if status_response["followup_flag"]:
+                return session, None
+            extracted = {
+                **extracted,
+                **{
+                    field: value
+                    for field, value in (details_response.get("user_info") or {}).items()
+                    if field in USER_DETAIL_FIELDS and value
+                },
+            }
 
-                    return status_response["followup_question"]
+        user_info = {**known_details, **extracted}
+        missing = missing_user_details(user_info)
+        logger.info(
+            f"[ChatBot] - Details collected for user_id: {self.data.user_id}, Route: {route}, Missing: {missing}"
+        )
+        if not missing:
+            # The completing turn answers the query, so it needs the full prompt
+            return (
+                session.model_copy(
+                    update={
+                        "user_details": {
+                            field: user_info[field]
+                            for field in ("name", "phone_number", "email")
+                        }
+                    }
+                ),
+                None,
+            )
+        return session, {
+            "followup_flag": True,
+            "followup_question": get_details_followup_question(
+                missing,
+                # The complaint carries the language when the reply is only a
+                # name or a phone number
+                query_translator.detect(
+                    f"{pending_complaint.get('complaint_details') or ''} {self.data.user_text}"
+                ),
+            ),
+            "user_info": user_info,
+        }
 
-                result = get_complaint_status(
-                    complaint_id=status_response["complaint_id"]
-                )
+    def _handle_status_response(self, status_response: dict) -> Union[str, dict]:
+        logger.info(
+            f"[ChatBot] - Status response generated for user_id: {self.data.user_id}"
+        )
+        if status_response["followup_flag"]:
+            return status_response["followup_question"]
+
+        with self.trace.span("persistence"):
+            result = get_complaint_status(
+                complaint_id=status_response["complaint_id"]
+            )
+
+        res = {
+            "response": "Here is the status of your complaint:",
+            "complaint_details": result,
+        }
+        return res
 
-                res = {
-                    "response": "Here is the status of your complaint:",
-                    "complaint_details": result,
-                }
-                return res
+    def _get_prompt_inputs(self, session: SessionStateModel) -> Tuple[str, str]:
+        """
+        Retrieves the relevant context and prefixes the known user details to the user's message.
 
-            user_details = get_user_detail(self.data.user_id)
+        Returns:
+            Tuple[str, str]: The user input and the relevant context.
+        """
+        user_details = session.user_details or None
 
-            _, embedding_response = openai_manager.create_embedding(
-                text=self.data.user_text, transaction_id=self.data.user_id
+        # The corpus is only indexed in English: other queries are searched translated
+        with self.trace.span("language"):
+            language, query_text = query_translator.to_corpus_language(
+                self.data.user_text, self.data.user_id
             )
-            query_embedding = embedding_response["data"][0]["embedding"]
-            logger.info(
-                f"[ChatBot] - Embedding created for user_id: {self.data.user_id}"
+        logger.info(
+            f"[ChatBot] - Query language for user_id: {self.data.user_id}, Language: {language}"
+        )
+
+        elapsed, embedding_response = openai_manager.create_embedding(
+            text=query_text, transaction_id=self.data.user_id
+        )
+        self.trace.record("embedding", elapsed)
+        query_embedding = embedding_response["data"][0]["embedding"]
+        logger.info(f"[ChatBot] - Embedding created for user_id: {self.data.user_id}")
+
+        milvus_config = MilvusConfig()
+        faq_match = None
+        if milvus_config.FAQ_MATCH_ENABLED:
+            elapsed, faq_match = milvus_manager.match_faq_question(
+                self.data.user_id, query_embedding
             )
+            self.trace.record("faq_match", elapsed)
 
-            _, retrieved_docs = milvus_manager.search_index(
+        if faq_match is not None:
+            # A known question: the chunk holding its answer is the whole context
+            context_docs = [faq_match]
+        else:
+            # Over-fetches candidates, only the best re-ranked ones go into the prompt
+            rerank_config = RerankConfig()
+            elapsed, retrieved_docs = milvus_manager.search_index(
                 transaction_id=self.data.user_id,
-                collection_name=MilvusConfig().MILVUS_COLLECTION_NAME,
+                collection_name=milvus_config.MILVUS_COLLECTION_NAME,
                 text_embedding=query_embedding,
-                return_fields=MilvusConfig().MILVUS_RETURN_FIELDS,
-                top_k=MilvusConfig().ENGLISH_MILVUS_KNN,
+                return_fields=milvus_config.MILVUS_RETURN_FIELDS,
+                top_k=(
+                    rerank_config.RERANK_CANDIDATES_BY_LANGUAGE.get(
+                        language, rerank_config.RERANK_CANDIDATES
+                    )
+                    if rerank_config.RERANK_ENABLED
+                    else milvus_config.MILVUS_KNN.get(
+                        language, milvus_config.MILVUS_KNN["en"]
+                    )
+                ),
             )
+            self.trace.record("retrieval", elapsed)
+            context_docs = retrieved_docs[0]
+            if rerank_config.RERANK_ENABLED:
+                with self.trace.span("rerank"):
+                    context_docs = reranker.rerank(
+                        query_text, context_docs, self.data.user_id
+                    )
 
-            relevant_context = ""
-            for record in retrieved_docs[0]:
-                relevant_context += record.entity["content"] + "\n\n"
+        relevant_context = ""
+        for record in context_docs:
+            relevant_context += record["entity"]["content"] + "\n\n"
 
-            if user_details is None:
-                user_input = self.data.user_text
+        if user_details is None:
+            user_input = self.data.user_text
+        else:
+            user_info_parts = []
+            if user_details.get("name"):
+                user_info_parts.append(f"I'm {user_details.get('name', '')}")
+            if user_details.get("phone_number"):
+                user_info_parts.append(
+                    f"my phone number is {user_details.get('phone_number', '')}"
+                )
+            if user_details.get("email"):
+                user_info_parts.append(f"my email is {user_details.get('email', '')}")
+            user_info_str = ", ".join(user_info_parts)
+            if user_info_str:
+                user_input = (
+                    f"""{user_info_str}.\nComplaint/Query: {self.data.user_text}"""
+                )
             else:
-                user_info_parts = []
-                if user_details.get("name"):
-                    user_info_parts.append(f"I'm {user_details.get('name', '')}")
-                if user_details.get("phone_number"):
-                    user_info_parts.append(
-                        f"my phone number is {user_details.get('phone_number', '')}"
-                    )
-                if user_details.get("email"):
-                    user_info_parts.append(
-                        f"my email is {user_details.get('email', '')}"
-                    )
-                user_info_str = ", ".join(user_info_parts)
-                if user_info_str:
-                    user_input = (
-                        f"""{user_info_str}.\nComplaint/Query: {self.data.user_text}"""
-                    )
-                else:
-                    user_input = self.data.user_text
+                user_input = self.data.user_text
 
-            prompt = get_chatbot_prompt(
-                user_input=user_input,
-                relevant_context=relevant_context,
-                past_conversations=previous_conversations,
-            )
-            _, chat_completion_response = openai_manager.chat_completion(
-                transaction_id=self.data.user_id,
-                messages=prompt,
-            )
-            gpt_response = json.loads(
-                chat_completion_response["choices"][0]["message"]["content"]
-            )
-            user_info = gpt_response.get("user_info", {})
+        return user_input, relevant_context
+
+    def _get_chatbot_messages(
+        self, session: SessionStateModel, previous_conversations: str
+    ) -> list:
+        """
+        Retrieves the relevant context and builds the chatbot prompt.
+        """
+        user_input, relevant_context = self._get_prompt_inputs(session)
+        return get_chatbot_prompt(
+            user_input=user_input,
+            relevant_context=relevant_context,
+            past_conversations=previous_conversations,
+        )
+
+    def _get_unified_messages(
+        self, session: SessionStateModel, previous_conversations: str
+    ) -> list:
+        """
+        Retrieves the relevant context and builds the single-call prompt, which
+        returns the category, complaint ID, user info and response together.
+        """
+        user_input, relevant_context = self._get_prompt_inputs(session)
+        return get_unified_prompt(
+            user_input=user_input,
+            relevant_context=relevant_context,
+            past_conversations=previous_conversations,
+        )
+
+    def _handle_unified_response(self, gpt_response: dict) -> Union[str, dict]:
+        """
+        Runs the status or complaint flow of a single-call response in code.
+        """
+        logger.info(
+            f"[ChatBot] - Single-call category for user_id: {self.data.user_id}, Intent: {gpt_response.get('category')}"
+        )
+        if gpt_response.get("category") == "status":
+            return self._handle_status_response(gpt_response)
+        return self._handle_chatbot_response(gpt_response)
+
+    def _handle_chatbot_response(self, gpt_response: dict) -> dict:
+        """
+        Persists the turn and the collected user details, and raises the
+        complaint once every detail is collected.
+        """
+        with self.trace.span("persistence"):
+            return self._persist_chatbot_response(gpt_response)
+
+    def _persist_chatbot_response(self, gpt_response: dict) -> dict:
+        user_info = gpt_response.get("user_info", {})
+        session_manager.save_user_details(
             UserDetailsModel(
                 user_id=self.data.user_id,
                 name=user_info.get("name", ""),
                 phone_number=user_info.get("phone_number", ""),
                 email=user_info.get("email", ""),
-            ).to_sql()
-            if gpt_response["followup_flag"]:
-                self.conversation_analytics.response = gpt_response["followup_question"]
-                self.conversation_analytics.followup_flag = 1
-                self.conversation_analytics.complaint_details = None
-                self.conversation_analytics.to_sql()
-                res = {
-                    "response": gpt_response["followup_question"],
-                    "complaint_details": None,
-                }
-                return res
-
-            self.conversation_analytics.response = gpt_response["user_info"]["response"]
-            self.conversation_analytics.complaint_details = user_info[
-                "complaint_details"
-            ]
-            self.conversation_analytics.followup_flag = 0
-            self.conversation_analytics.to_sql()
-            logger.info(
-                f"[ChatBot] - Response generated for user_id: {self.data.user_id}"
-            )
-            complaint_data = create_complaint(
-                ComplaintModel(
-                    name=user_info["name"],
-                    phone_number=user_info["phone_number"],
-                    email=user_info["email"],
-                    complaint_details=user_info["complaint_details"],
-                )
             )
-            logger.info(
-                f"[ChatBot] - Complaint created for user_id: {self.data.user_id}"
+        )
+        if gpt_response["followup_flag"]:
+            self.conversation_analytics.response = gpt_response["followup_question"]
+            self.conversation_analytics.followup_flag = 1
+            self.conversation_analytics.complaint_details = None
+            conversation_memory.record_turn(
+                self.conversation_analytics,
+                pending_complaint={
+                    "complaint_details": user_info.get("complaint_details") or "",
+                    "followup_question": gpt_response["followup_question"],
+                },
             )
             res = {
-                "response": self.conversation_analytics.response,
-                "complaint_details": complaint_data,
+                "response": gpt_response["followup_question"],
+                "complaint_details": None,
             }
             return res
+
+        self.conversation_analytics.response = gpt_response["user_info"]["response"]
+        self.conversation_analytics.complaint_details = user_info["complaint_details"]
+        self.conversation_analytics.followup_flag = 0
+        conversation_memory.record_turn(self.conversation_analytics)
+        logger.info(f"[ChatBot] - Response generated for user_id: {self.data.user_id}")
+        complaint_data = create_complaint(
+            ComplaintModel(
+                name=user_info["name"],
+                phone_number=user_info["phone_number"],
+                email=user_info["email"],
+                complaint_details=user_info["complaint_details"],
+            )
+        )
+        logger.info(f"[ChatBot] - Complaint created for user_id: {self.data.user_id}")
+        res = {
+            "response": self.conversation_analytics.response,
+            "complaint_details": complaint_data,
+        }
+        return res
+
+    def _get_single_call_response(
+        self, session: SessionStateModel, previous_conversations: str
+    ) -> Union[str, dict]:
+        messages = self._get_unified_messages(session, previous_conversations)
+        elapsed, chat_completion_response = openai_manager.chat_completion(
+            transaction_id=self.data.user_id,
+            messages=messages,
+        )
+        self.trace.record("generation", elapsed)
+        gpt_response = json.loads(
+            chat_completion_response["choices"][0]["message"]["content"]
+        )
+        return self._handle_unified_response(gpt_response)
+
+    def server_timing(self) -> str:
+        """
+        The stage timings of the turn as a Server-Timing header value, in milliseconds.
+        """
+        return self.trace.server_timing()
+
+    def get_response(self) -> Union[str, dict]:
+        try:
+            session, previous_conversations = self._load_memory()
+            session, details_response = self._get_details_response(session)
+            if details_response is not None:
+                return self._handle_chatbot_response(details_response)
+
+            if self.pipeline == "single":
+                return self._get_single_call_response(session, previous_conversations)
+
+            intent = self.get_intent(previous_conversations=previous_conversations)
+
+            if intent == "status":
+                logger.info(
+                    f"[ChatBot] - Status request received for user_id: {self.data.user_id}"
+                )
+                status_messages = get_complaint_status_prompt(
+                    user_input=self.data.user_text
+                )
+                elapsed, chat_completion_response = openai_manager.chat_completion(
+                    transaction_id=self.data.user_id,
+                    messages=status_messages,
+                )
+                self.trace.record("generation", elapsed)
+                status_response = json.loads(
+                    chat_completion_response["choices"][0]["message"]["content"]
+                )
+                return self._handle_status_response(status_response)
+
+            prompt = self._get_chatbot_messages(session, previous_conversations)
+            elapsed, chat_completion_response = openai_manager.chat_completion(
+                transaction_id=self.data.user_id,
+                messages=prompt,
+            )
+            self.trace.record("generation", elapsed)
+            gpt_response = json.loads(
+                chat_completion_response["choices"][0]["message"]["content"]
+            )
+            return self._handle_chatbot_response(gpt_response)
         except Exception as exc:
             logger.exception(
                 f"[ChatBot] - Error occurred for user_id: {self.data.user_id}, Error: {exc}"
             )
             raise exc
+        finally:
+            self.trace.finish()
+
+    def stream_response(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Streams the bot response as ("token", text) events while it is generated,
+        followed by one ("done", response) event with the same payload as
+        `get_response`. Side effects (user details, turn, complaint) run once
+        the completion has finished, before "done" is emitted.
+        """
+        try:
+            session, previous_conversations = self._load_memory()
+            session, details_response = self._get_details_response(session)
+            if details_response is not None:
+                yield "token", details_response["followup_question"]
+                yield "done", self._handle_chatbot_response(details_response)
+                return
+
+            if self.pipeline == "single":
+                gpt_response = yield from self._stream_json(
+                    self._get_unified_messages(session, previous_conversations),
+                    self._response_text,
+                )
+                yield "done", self._handle_unified_response(gpt_response)
+                return
+
+            intent = self.get_intent(previous_conversations=previous_conversations)
+
+            if intent == "status":
+                logger.info(
+                    f"[ChatBot] - Status request received for user_id: {self.data.user_id}"
+                )
+                status_response = yield from self._stream_json(
+                    get_complaint_status_prompt(user_input=self.data.user_text),
+                    lambda partial: (
+                        partial.get("followup_question")
+                        if partial.get("followup_flag") is True
+                        else None
+                    ),
+                )
+                yield "done", self._handle_status_response(status_response)
+                return
+
+            gpt_response = yield from self._stream_json(
+                self._get_chatbot_messages(session, previous_conversations),
+                self._response_text,
+            )
+            yield "done", self._handle_chatbot_response(gpt_response)
+        except Exception as exc:
+            logger.exception(
+                f"[ChatBot] - Error occurred while streaming for user_id: {self.data.user_id}, Error: {exc}"
+            )
+            yield "error", str(exc)
+        finally:
+            self.trace.finish()
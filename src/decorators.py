@@ -1,9 +1,13 @@
 import time
+from functools import wraps
+
+from src.metrics import function_duration
 
 
 def measure_time(func):
     """
-    A decorator that measures the execution time of a function.
+    A decorator that measures the execution time of a function, with the
+    monotonic clock, and records it in the cyfuture_function_duration_seconds histogram.
 
     Args:
         func (callable): The function whose execution time is to be measured.
@@ -22,10 +26,12 @@ def measure_time(func):
         print(f"Result: {result}")
     """
 
+    @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
+        start_time = time.perf_counter()
         result = func(*args, **kwargs)
-        end_time = time.time()
-        return end_time - start_time, result
+        elapsed_time = time.perf_counter() - start_time
+        function_duration.observe(elapsed_time, function=func.__qualname__)
+        return elapsed_time, result
 
     return wrapper
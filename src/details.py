@@ -0,0 +1,165 @@
+"""
+Deterministic extraction of the user details collected by the complaint flow.
+
+Follow-up turns mostly answer "what is your name / phone number / email?".
+These helpers pick such answers out of the message with regular expressions,
+so the bot can ask for the next missing detail without an LLM call, in the
+language of the user (English, Hindi or Hinglish).
+"""
+
+import re
+from typing import Dict, List
+
+USER_DETAIL_FIELDS = ("name", "phone_number", "email", "complaint_details")
+
+# language -> detail -> label, the languages detected by src.language
+DETAIL_LABELS = {
+    "en": {
+        "name": "your name",
+        "phone_number": "your phone number",
+        "email": "your email address",
+        "complaint_details": "the details of your complaint or query",
+    },
+    "hi": {
+        "name": "अपना नाम",
+        "phone_number": "अपना फ़ोन नंबर",
+        "email": "अपना ईमेल पता",
+        "complaint_details": "अपनी शिकायत या प्रश्न का विवरण",
+    },
+    "hinglish": {
+        "name": "apna naam",
+        "phone_number": "apna phone number",
+        "email": "apna email address",
+        "complaint_details": "apni complaint ya query ki details",
+    },
+}
+# language -> (question, "and")
+DETAILS_FOLLOWUP_TEMPLATES = {
+    "en": ("Thank you! Could you please share {asked}?", "and"),
+    "hi": ("धन्यवाद! कृपया {asked} बताएं।", "और"),
+    "hinglish": ("Dhanyavaad! Kripya {asked} share karein.", "aur"),
+}
+# A follow-up question asking for the name, in any of the languages
+NAME_QUESTION_PATTERN = re.compile(r"name|naam|नाम", re.IGNORECASE)
+
+EMAIL_PATTERN = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+PHONE_PATTERN = re.compile(r"(?<![\w@.])\+?\d[\d\s().-]{7,}\d(?![\w@])")
+COMPLAINT_ID_PATTERN = re.compile(
+    r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"
+)
+NAME_PATTERN = re.compile(
+    r"\b(?:my name is|name is|i am|i'm|this is|call me)\s+([A-Za-z][A-Za-z.'-]*(?:\s+[A-Za-z][A-Za-z.'-]*){0,3})",
+    re.IGNORECASE,
+)
+# A bare reply of a few words, e.g. "Rahul Sharma", to a question about the name
+BARE_NAME_PATTERN = re.compile(r"^\s*([A-Za-z][A-Za-z.'-]*(?:\s+[A-Za-z][A-Za-z.'-]*){0,3})\s*[.!]?\s*$")
+NAME_STOP_WORDS = {"and", "my", "phone", "email", "number", "mail", "here", "with"}
+# Replies containing these are questions, requests or complaints, not names
+NOT_A_NAME_WORDS = {
+    # Questions, greetings and acknowledgements
+    "what", "how", "why", "when", "where", "which", "who", "can", "could", "would",
+    "tell", "please", "thanks", "thank", "no", "yes", "ok", "okay", "hi", "hello", "hey",
+    # Function words
+    "i", "is", "am", "are", "was", "were", "be", "been", "it", "its", "the", "a", "an",
+    "not", "since", "from", "to", "in", "on", "at", "of", "for", "by", "again",
+    "still", "yet", "all", "any", "some", "very", "too", "but", "or", "so", "this", "that",
+    "me", "we", "our", "you", "your", "have", "has", "had", "do", "does", "did", "done",
+    "up", "down", "out", "off", "today", "yesterday", "morning", "evening", "night", "now",
+    # Complaint vocabulary
+    "issue", "issues", "problem", "problems", "error", "errors", "complaint", "query",
+    "status", "working", "work", "works", "broken", "slow", "failed", "failing", "fail",
+    "facing", "unable", "cannot", "cant", "help", "support", "service", "server",
+    "internet", "network", "connection", "website", "site", "login", "password", "account",
+    "billing", "bill", "invoice", "payment", "refund", "charge", "charged", "plan",
+    "hosting", "domain", "cloud", "vps", "backup", "email", "mail", "ticket", "outage", "urgent",
+}
+
+
+def unparsed_text(text: str) -> str:
+    """
+    The message without its email addresses, phone numbers and separators,
+    e.g. "Rahul Sharma" for "Rahul Sharma, 9876543210".
+    """
+    text = EMAIL_PATTERN.sub(" ", text)
+    text = PHONE_PATTERN.sub(" ", text)
+    return " ".join(re.sub(r"[,;:/|]+", " ", text).split()).strip(" .-")
+
+
+def _is_plausible_name(name: str) -> bool:
+    words = name.lower().replace(".", " ").split()
+    return bool(words) and not any(word in NOT_A_NAME_WORDS for word in words)
+
+
+def _clean_name(name: str) -> str:
+    words = []
+    for word in name.split():
+        if word.lower() in NAME_STOP_WORDS:
+            break
+        words.append(word)
+    return " ".join(words).strip(" .").title()
+
+
+def extract_user_details(text: str, followup_question: str = "") -> Dict[str, str]:
+    """
+    Extracts the email, phone number and name found in a message.
+
+    Args:
+        text (str): The message of the user.
+        followup_question (str): The question the message answers. Names are
+            only extracted when the question asked for the name, from the
+            message without its email and phone number, and only when none of
+            their words are in NOT_A_NAME_WORDS.
+
+    Returns:
+        Dict[str, str]: The details found, keyed by `name`, `phone_number` and `email`.
+    """
+    details = {}
+
+    email = EMAIL_PATTERN.search(text)
+    if email:
+        details["email"] = email.group(0)
+
+    for match in PHONE_PATTERN.finditer(text):
+        digits = re.sub(r"\D", "", match.group(0))
+        if 10 <= len(digits) <= 15:
+            details["phone_number"] = match.group(0).strip()
+            break
+
+    # "I am ..." is too ambiguous unless the name was asked for
+    if asks_for_name(followup_question):
+        remaining = unparsed_text(text)
+        name = NAME_PATTERN.search(remaining) or BARE_NAME_PATTERN.match(remaining)
+        if name and _is_plausible_name(_clean_name(name.group(1))):
+            details["name"] = _clean_name(name.group(1))
+
+    return details
+
+
+def asks_for_name(followup_question: str) -> bool:
+    """
+    Whether a follow-up question asked for the name of the user.
+    """
+    return bool(NAME_QUESTION_PATTERN.search(followup_question))
+
+
+def missing_user_details(details: Dict[str, str]) -> List[str]:
+    """
+    Returns the details of USER_DETAIL_FIELDS that are still empty, in the order they are collected.
+    """
+    return [field for field in USER_DETAIL_FIELDS if not details.get(field)]
+
+
+def get_details_followup_question(missing: List[str], language: str = "en") -> str:
+    """
+    Polite question asking for the next missing detail(s), in the language of
+    the user. Other languages are asked in English.
+    """
+    if language not in DETAILS_FOLLOWUP_TEMPLATES:
+        language = "en"
+    template, conjunction = DETAILS_FOLLOWUP_TEMPLATES[language]
+    labels = [DETAIL_LABELS[language][field] for field in missing]
+    if len(labels) > 1:
+        asked = ", ".join(labels[:-1]) + f" {conjunction} " + labels[-1]
+    else:
+        asked = labels[0]
+    return template.format(asked=asked)
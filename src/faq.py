@@ -0,0 +1,86 @@
+"""
+Question / answer pairs of FAQ documents.
+
+The FAQ PDF numbers its questions "1.", "2.", ... and every answer runs until
+the next question. Numbered lists inside the answers restart at 1, so a
+numbered line only starts a question if it carries the next expected number.
+"""
+
+import re
+from typing import List, Optional
+
+from src.types import FaqPair
+
+QUESTION_PATTERN = re.compile(r"^\s*(?:[-*•]\s*)?(\d{1,3})\s*[.)]\s+(\S.*)$")
+# A wrapped question spans at most this many lines
+QUESTION_MAX_LINES = 3
+# Length of the start of an answer looked up in the chunks
+ANSWER_PREFIX_CHARS = 80
+
+
+def match_key(text: str) -> str:
+    """
+    Lowercased words separated by single spaces, to find a text in a chunk
+    whatever its line breaks and punctuation.
+    """
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+def extract_faq_pairs(text: str) -> List[FaqPair]:
+    """
+    Extracts the numbered questions of an FAQ document and their answers.
+
+    Args:
+        text (str): The text of the document.
+
+    Returns:
+        List[FaqPair]: The pairs, in the order of the document.
+    """
+    lines = text.splitlines()
+    starts = []
+    for index, line in enumerate(lines):
+        match = QUESTION_PATTERN.match(line)
+        if match and int(match.group(1)) == len(starts) + 1:
+            starts.append((index, match.group(2).strip()))
+
+    pairs = []
+    for number, (index, first_line) in enumerate(starts, start=1):
+        end = starts[number][0] if number < len(starts) else len(lines)
+        # The question runs to a line ending with a question mark, or to the first blank line
+        question = [first_line]
+        cursor = index + 1
+        while (
+            not question[-1].endswith("?")
+            and cursor < end
+            and lines[cursor].strip()
+            and len(question) < QUESTION_MAX_LINES
+        ):
+            question.append(lines[cursor].strip())
+            cursor += 1
+        answer = "\n".join(line.strip() for line in lines[cursor:end]).strip()
+        if answer:
+            pairs.append(
+                FaqPair(number=number, question=" ".join(question), answer=answer)
+            )
+    return pairs
+
+
+def find_answer_chunk(pair: FaqPair, chunks: List[str]) -> Optional[int]:
+    """
+    The index of the chunk holding the answer of a pair: the chunk with the
+    question followed by its answer, else the start of the answer (the
+    question may end the previous chunk), else the question.
+    """
+    chunk_keys = [match_key(chunk) for chunk in chunks]
+    question, answer = match_key(pair.question), match_key(pair.answer)
+    for key in (
+        f"{question} {answer[:ANSWER_PREFIX_CHARS]}",
+        answer[:ANSWER_PREFIX_CHARS],
+        question,
+    ):
+        if not key:
+            continue
+        for index, chunk_key in enumerate(chunk_keys):
+            if key in chunk_key:
+                return index
+    return None
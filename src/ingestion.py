@@ -0,0 +1,291 @@
+"""
+Document ingestion as background jobs.
+
+`POST /upload_docs` only records a job in the ingestion jobs table and hands
+it to a pool of worker processes, so conversion and embedding never run on
+(or hold the GIL of) a serving worker. The table is the queue: a worker
+claims the job, reports its progress there and checks its cancellation flag
+at every progress update. A collection has at most one queued or running
+job at a time.
+"""
+
+import multiprocessing
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func, insert, literal, select, update
+
+from config import AppConfig, MilvusConfig
+from src.adapters.lazy import LazyAdapter
+from src.adapters.loggingmanager import logger
+from src.adapters.sqllitemanager import sql_manager
+from src.tables import ingestion_jobs_table as jobs_table
+
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """
+    Raised by the progress callback of a job whose cancellation was requested.
+    """
+
+
+def _create_executor() -> ProcessPoolExecutor:
+    # spawn: the workers must not inherit the threads and locks of the server
+    return ProcessPoolExecutor(
+        max_workers=AppConfig().INGESTION_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+executor = LazyAdapter(_create_executor)
+
+
+def _finish(job_id: str, status: str, message: str) -> int:
+    return sql_manager.update_rows(
+        transaction_id=job_id,
+        sql_query=update(jobs_table)
+        .where(
+            jobs_table.c.job_id == job_id,
+            jobs_table.c.status.in_(ACTIVE_STATUSES),
+        )
+        .values(
+            status=status,
+            message=message,
+            finished_at=func.current_timestamp(),
+            updated_at=func.current_timestamp(),
+        ),
+    )
+
+
+def _on_job_done(job_id: str, future: Future) -> None:
+    # The job records its own outcome, this only catches dead worker processes
+    if future.cancelled() or future.exception() is None:
+        return
+    logger.error(
+        f"[ingestion][{job_id}] - Worker process failed: {future.exception()}"
+    )
+    _finish(job_id, "failed", f"Worker process failed: {future.exception()}")
+
+
+def _dispatch(job_id: str) -> None:
+    future = executor.submit(run_ingestion_job, job_id)
+    future.add_done_callback(lambda done: _on_job_done(job_id, done))
+
+
+def get_ingestion_job(job_id: str) -> dict:
+    """
+    Fetches an ingestion job with its status and progress.
+
+    Args:
+        job_id (str): The unique identifier of the job.
+
+    Returns:
+        dict: The job row.
+
+    Raises:
+        LookupError: If the job does not exist.
+    """
+    rows = sql_manager.fetch_rows(
+        transaction_id=job_id,
+        sql_query=select(jobs_table).where(jobs_table.c.job_id == job_id),
+    )
+    if not rows:
+        raise LookupError(f"No ingestion job found for ID: {job_id}")
+    return rows[0]
+
+
+def list_ingestion_jobs(limit: int = 20) -> list:
+    """
+    Lists the most recent ingestion jobs, newest first.
+    """
+    return sql_manager.fetch_rows(
+        transaction_id="list_ingestion_jobs",
+        sql_query=select(jobs_table)
+        .order_by(jobs_table.c.id.desc())
+        .limit(max(1, min(limit, 100))),
+    )
+
+
+def submit_ingestion_job(source: Optional[str] = None) -> dict:
+    """
+    Queues a rebuild of the Milvus collection from a document.
+
+    The job is inserted only if the collection has no queued or running job,
+    in a single conditional INSERT, so concurrent submissions cannot start
+    two rebuilds of the same collection.
+
+    Args:
+        source (Optional[str]): Path of the PDF to ingest, INGESTION_SOURCE by default.
+
+    Returns:
+        dict: The queued job.
+
+    Raises:
+        ValueError: If the collection is already being rebuilt.
+    """
+    job_id = str(uuid.uuid4())
+    collection_name = MilvusConfig().MILVUS_COLLECTION_NAME
+    active_job = select(jobs_table.c.job_id).where(
+        jobs_table.c.collection_name == collection_name,
+        jobs_table.c.status.in_(ACTIVE_STATUSES),
+    )
+    inserted = sql_manager.update_rows(
+        transaction_id=job_id,
+        sql_query=insert(jobs_table).from_select(
+            ["job_id", "collection_name", "source", "status"],
+            select(
+                literal(job_id),
+                literal(collection_name),
+                literal(source or AppConfig().INGESTION_SOURCE),
+                literal("queued"),
+            ).where(~active_job.exists()),
+        ),
+    )
+    if not inserted:
+        current = sql_manager.fetch_rows(transaction_id=job_id, sql_query=active_job)
+        raise ValueError(
+            f"Collection {collection_name} is already being rebuilt"
+            + (f" by job {current[0]['job_id']}" if current else "")
+        )
+    logger.info(f"[ingestion][{job_id}] - Job queued for {collection_name}")
+    _dispatch(job_id)
+    return get_ingestion_job(job_id)
+
+
+def cancel_ingestion_job(job_id: str) -> dict:
+    """
+    Cancels an ingestion job. A queued job is cancelled at once, a running one
+    stops at its next progress update, before the collection is dropped if
+    it is still converting or embedding.
+
+    Args:
+        job_id (str): The unique identifier of the job.
+
+    Returns:
+        dict: The job after the request.
+
+    Raises:
+        LookupError: If the job does not exist.
+        ValueError: If the job has already finished.
+    """
+    job = get_ingestion_job(job_id)
+    if job["status"] in FINISHED_STATUSES:
+        raise ValueError(f"Job {job_id} has already {job['status']}")
+    sql_manager.update_rows(
+        transaction_id=job_id,
+        sql_query=update(jobs_table)
+        .where(jobs_table.c.job_id == job_id)
+        .values(cancel_requested=1, updated_at=func.current_timestamp()),
+    )
+    sql_manager.update_rows(
+        transaction_id=job_id,
+        sql_query=update(jobs_table)
+        .where(jobs_table.c.job_id == job_id, jobs_table.c.status == "queued")
+        .values(
+            status="cancelled",
+            message="Cancelled before it started",
+            finished_at=func.current_timestamp(),
+        ),
+    )
+    logger.info(f"[ingestion][{job_id}] - Cancellation requested")
+    return get_ingestion_job(job_id)
+
+
+def run_ingestion_job(job_id: str) -> None:
+    """
+    Runs a queued job, in a worker process.
+
+    Args:
+        job_id (str): The unique identifier of the job.
+    """
+    claimed = sql_manager.update_rows(
+        transaction_id=job_id,
+        sql_query=update(jobs_table)
+        .where(
+            jobs_table.c.job_id == job_id,
+            jobs_table.c.status == "queued",
+            jobs_table.c.cancel_requested == 0,
+        )
+        .values(
+            status="running",
+            started_at=func.current_timestamp(),
+            updated_at=func.current_timestamp(),
+        ),
+    )
+    if not claimed:
+        logger.info(f"[ingestion][{job_id}] - Job cancelled or already claimed")
+        return
+
+    def progress(stage: str, processed: int, total: int) -> None:
+        # Matches no row once a cancellation was requested
+        updated = sql_manager.update_rows(
+            transaction_id=job_id,
+            sql_query=update(jobs_table)
+            .where(
+                jobs_table.c.job_id == job_id,
+                jobs_table.c.cancel_requested == 0,
+            )
+            .values(
+                stage=stage,
+                processed=processed,
+                total=total,
+                updated_at=func.current_timestamp(),
+            ),
+        )
+        if not updated:
+            raise JobCancelled(f"Cancelled while {stage}")
+
+    job = get_ingestion_job(job_id)
+    try:
+        # Only the worker processes load the ingestion dependencies
+        from src.upload_helper import upload_docs
+
+        message = upload_docs(source=job["source"], progress=progress)
+        _finish(job_id, "succeeded", message)
+        logger.info(f"[ingestion][{job_id}] - Job succeeded: {message}")
+    except JobCancelled as cancelled:
+        _finish(job_id, "cancelled", str(cancelled))
+        logger.info(f"[ingestion][{job_id}] - {cancelled}")
+    except Exception as exc:
+        _finish(job_id, "failed", str(exc))
+        logger.exception(f"[ingestion][{job_id}] - Job failed: {str(exc)}")
+
+
+def resume_ingestion_jobs() -> None:
+    """
+    On startup, fails the running jobs left without progress for
+    INGESTION_STALE_SECONDS (their process died with the previous server)
+    and dispatches the queued ones again.
+    """
+    stale_before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+        seconds=AppConfig().INGESTION_STALE_SECONDS
+    )
+    sql_manager.update_rows(
+        transaction_id="resume_ingestion_jobs",
+        sql_query=update(jobs_table)
+        .where(
+            jobs_table.c.status == "running",
+            jobs_table.c.updated_at < stale_before,
+        )
+        .values(
+            status="failed",
+            message="Interrupted",
+            finished_at=func.current_timestamp(),
+        ),
+    )
+    queued = sql_manager.fetch_rows(
+        transaction_id="resume_ingestion_jobs",
+        sql_query=select(jobs_table.c.job_id).where(jobs_table.c.status == "queued"),
+    )
+    for row in queued:
+        _dispatch(row["job_id"])
+
+
+def shutdown_ingestion_workers() -> None:
+    # Queued jobs stay queued in the table and are resumed on the next startup
+    if executor.initialized:
+        executor.shutdown(wait=False, cancel_futures=True)
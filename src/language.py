@@ -0,0 +1,186 @@
+"""
+Language of the user queries.
+
+The documents are indexed once, in CORPUS_LANGUAGE (English). Queries in
+another language are detected here and translated into it before they are
+embedded, so Hindi (Devanagari) and Hinglish (Hindi in Latin script)
+questions are searched in the same collection, without a second index of the
+corpus per language:
+
+- "hi": at least HINDI_MIN_DEVANAGARI_SHARE of the letters are Devanagari,
+- "other": mostly letters of another non-Latin script,
+- "hinglish": Latin script with at least HINGLISH_MIN_MARKERS Hindi words,
+- "en": everything else.
+
+Translations are cached by text in the cache shared by the workers, and the
+texts missing from it are translated together, TRANSLATION_BATCH_SIZE per
+call. A failed translation falls back to the original text.
+"""
+
+import json
+import re
+from typing import Dict, List, Tuple
+
+from config import LanguageConfig
+from src.adapters.cachemanager import create_cache_store
+from src.adapters.lazy import LazyAdapter
+from src.adapters.loggingmanager import logger
+from src.adapters.openaimanager import openai_manager
+from src.adapters.singleflight import request_key
+from src.metrics import cache_requests
+from src.prompts import get_translation_prompt
+
+DEVANAGARI_PATTERN = re.compile(r"[\u0900-\u097F]")
+LATIN_PATTERN = re.compile(r"[A-Za-z]")
+LETTER_PATTERN = re.compile(r"[^\W\d_]")
+WORD_PATTERN = re.compile(r"[a-z]+")
+# Frequent Hindi words in Latin script that are not (common) English words
+HINGLISH_MARKERS = frozenset(
+    """
+    aap aapka aapke aapki abhi accha aur bahut batao bataye bataiye bhi chahiye
+    chahta chahte chahti diya dijiye gaya gayi hai hain hamara hamare hoga hogi
+    hona hota hoti hu hua hui hum humara humein hun hoon jaldi kab kahan kaise
+    kaisa kar karna karo karein kare kariye karne karu ke kerna ki kijiye kitna
+    kitne ko koi kuch kya kyu kyun lekin liye mein mera mere meri milega milegi
+    mila mili mujhe nahi nahin raha rahe rahi sakta sakte sakti se tha thi tum
+    wala wale wali woh yeh
+    """.split()
+)
+
+
+class QueryTranslator(LanguageConfig):
+    """
+    Detects the language of the queries and translates them into CORPUS_LANGUAGE.
+
+    Methods:
+        detect(text: str) -> str:
+            Returns the language of a text: "en", "hi", "hinglish" or "other".
+
+        translate(texts: List[str], transaction_id: str) -> List[str]:
+            Translates texts into CORPUS_LANGUAGE, from the cache or in batched calls.
+
+        to_corpus_language(text: str, transaction_id: str) -> Tuple[str, str]:
+            Returns the language of a query and the query in CORPUS_LANGUAGE.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.translation_cache = create_cache_store(
+            namespace="translations",
+            ttl_seconds=self.TRANSLATION_CACHE_TTL_SECONDS,
+            max_entries=self.TRANSLATION_CACHE_MAX_ENTRIES,
+        )
+        logger.info("[QueryTranslator] - Query translator initialized")
+
+    def detect(self, text: str) -> str:
+        letters = "".join(LETTER_PATTERN.findall(text))
+        devanagari = len(DEVANAGARI_PATTERN.findall(letters))
+        if devanagari and devanagari >= self.HINDI_MIN_DEVANAGARI_SHARE * len(letters):
+            return "hi"
+        if len(LATIN_PATTERN.findall(letters)) < len(letters) / 2:
+            return "other"
+        markers = sum(word in HINGLISH_MARKERS for word in WORD_PATTERN.findall(text.lower()))
+        return "hinglish" if markers >= self.HINGLISH_MIN_MARKERS else "en"
+
+    def _cache_key(self, text: str) -> str:
+        return self.TRANSLATION_CACHE_KEY_PREFIX + request_key(
+            "translation", self.TRANSLATION_MODEL, self.CORPUS_LANGUAGE, text
+        )
+
+    def _get_cached(self, texts: List[str], transaction_id: str) -> Dict[str, str]:
+        cached = {}
+        for text in texts:
+            # A cache outage only costs the upstream call
+            try:
+                translation = self.translation_cache.get(self._cache_key(text))
+            except Exception as cache_exc:
+                logger.warning(
+                    f"[QueryTranslator][translation_cache][{transaction_id}] - Cache read failed: {cache_exc}"
+                )
+                translation = None
+            cache_requests.inc(
+                cache="translation", result="miss" if translation is None else "hit"
+            )
+            if translation is not None:
+                cached[text] = translation
+        return cached
+
+    def _translate_batch(self, texts: List[str], transaction_id: str) -> Dict[str, str]:
+        try:
+            _, chat_completion_response = openai_manager.chat_completion(
+                transaction_id=transaction_id,
+                messages=get_translation_prompt(texts),
+                temperature=0,
+                model=self.TRANSLATION_MODEL or None,
+            )
+            translations = json.loads(
+                chat_completion_response["choices"][0]["message"]["content"]
+            ).get("translations")
+        except Exception as translate_exc:
+            logger.warning(
+                f"[QueryTranslator][translate][{transaction_id}] - Translation failed, the original texts are used: {translate_exc}"
+            )
+            return {}
+        if not isinstance(translations, list) or len(translations) != len(texts):
+            logger.warning(
+                f"[QueryTranslator][translate][{transaction_id}] - Expected {len(texts)} translations, the original texts are used"
+            )
+            return {}
+
+        translated = {}
+        for text, translation in zip(texts, translations):
+            if not isinstance(translation, str) or not translation.strip():
+                continue
+            translated[text] = translation.strip()
+            try:
+                self.translation_cache.set(self._cache_key(text), translated[text])
+            except Exception as cache_exc:
+                logger.warning(
+                    f"[QueryTranslator][translation_cache][{transaction_id}] - Cache write failed: {cache_exc}"
+                )
+        return translated
+
+    def translate(self, texts: List[str], transaction_id: str = "root") -> List[str]:
+        """
+        Translates texts into CORPUS_LANGUAGE.
+
+        Args:
+            texts (List[str]): The texts, in any language.
+            transaction_id (str): The ID of the transaction.
+
+        Returns:
+            List[str]: The translations, in the order of the texts. A text that
+                could not be translated is returned unchanged.
+        """
+        unique_texts = list(dict.fromkeys(texts))
+        translations = self._get_cached(unique_texts, transaction_id)
+        missing = [text for text in unique_texts if text not in translations]
+        for start in range(0, len(missing), self.TRANSLATION_BATCH_SIZE):
+            translations.update(
+                self._translate_batch(
+                    missing[start : start + self.TRANSLATION_BATCH_SIZE], transaction_id
+                )
+            )
+        logger.info(
+            f"[QueryTranslator][translate][{transaction_id}] - {len(unique_texts)} texts, {len(missing)} sent for translation"
+        )
+        return [translations.get(text, text) for text in texts]
+
+    def to_corpus_language(self, text: str, transaction_id: str = "root") -> Tuple[str, str]:
+        """
+        Detects the language of a query and translates it into CORPUS_LANGUAGE.
+
+        Args:
+            text (str): The query of the user.
+            transaction_id (str): The ID of the transaction.
+
+        Returns:
+            Tuple[str, str]: The language of the query and the query to search with.
+        """
+        language = self.detect(text)
+        if language == self.CORPUS_LANGUAGE or not self.QUERY_TRANSLATION_ENABLED:
+            return language, text
+        return language, self.translate([text], transaction_id)[0]
+
+
+query_translator = LazyAdapter(QueryTranslator)
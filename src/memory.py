@@ -0,0 +1,157 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from config import MemoryConfig, SessionConfig
+
+from src.adapters.loggingmanager import logger
+from src.adapters.openaimanager import openai_manager
+from src.adapters.sessionmanager import session_manager
+from src.prompts import get_summary_prompt
+from src.types import ConversationAnalyticsModel, SessionStateModel
+from src.utils import count_tokens
+
+
+class ConversationMemory(MemoryConfig):
+    """
+    Token-bounded conversation memory shared by the intent and chatbot prompts.
+
+    Recent turns are kept verbatim as long as they fit in MEMORY_TOKEN_BUDGET
+    (and SESSION_MAX_TURNS); older turns are folded into a running summary
+    that is stored alongside the session, so the prompt size stays bounded
+    however long the conversation gets. The summary LLM call runs on a
+    background thread, the turn does not wait for it.
+
+    Methods:
+        build_context(session: SessionStateModel, user_text: str) -> str:
+            Renders the summary, the recent turns and the current message.
+
+        record_turn(conversation_analytics: ConversationAnalyticsModel, pending_complaint: Optional[Dict[str, str]] = None) -> SessionStateModel:
+            Saves a turn and schedules the summary of the turns that no longer fit in the budget.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.max_turns = SessionConfig().SESSION_MAX_TURNS
+        self.summary_executor = ThreadPoolExecutor(
+            max_workers=self.MEMORY_SUMMARY_WORKERS, thread_name_prefix="memory-summary"
+        )
+        # Users with a fold in flight, a later turn does not schedule a second one
+        self._folding = set()
+        self._folding_lock = threading.Lock()
+
+    def _format_turn(self, turn: Dict[str, str]) -> str:
+        return f"User: {turn['user_text']}\nBot (You): {turn['response']}"
+
+    def _turn_tokens(self, turns: List[Dict[str, str]]) -> List[int]:
+        return [
+            count_tokens(self._format_turn(turn), self.MEMORY_TOKENIZER_MODEL)
+            for turn in turns
+        ]
+
+    def build_context(self, session: SessionStateModel, user_text: str) -> str:
+        """
+        Renders the conversation memory of a session for a prompt.
+
+        Args:
+            session (SessionStateModel): The session of the user.
+            user_text (str): The current message of the user.
+
+        Returns:
+            str: The summary, the recent turns that fit in the token budget and the current message.
+        """
+        if not session.turns and not session.summary:
+            return "No previous conversations found."
+
+        recent_turns, used_tokens = [], 0
+        for turn, tokens in zip(
+            reversed(session.turns), reversed(self._turn_tokens(session.turns))
+        ):
+            if used_tokens + tokens > self.MEMORY_TOKEN_BUDGET:
+                break
+            recent_turns.insert(0, self._format_turn(turn))
+            used_tokens += tokens
+
+        context = ""
+        if session.summary:
+            context += f"Summary of the earlier conversation: {session.summary}\n\n"
+        for turn in recent_turns:
+            context += f"{turn}\n\n"
+        context += f"User: {user_text}"
+        return context.strip()
+
+    def _fold_count(self, session: SessionStateModel) -> int:
+        """
+        Number of oldest turns to move into the summary so that the rest fits the budget.
+        """
+        turn_tokens = self._turn_tokens(session.turns)
+        total_tokens, fold = sum(turn_tokens), 0
+        while fold < len(session.turns) and (
+            total_tokens > self.MEMORY_TOKEN_BUDGET
+            or len(session.turns) - fold > self.max_turns
+        ):
+            total_tokens -= turn_tokens[fold]
+            fold += 1
+        return fold
+
+    def _summarize(self, session: SessionStateModel, fold: int) -> str:
+        conversation = "\n\n".join(
+            self._format_turn(turn) for turn in session.turns[:fold]
+        )
+        _, chat_completion_response = openai_manager.chat_completion(
+            transaction_id=session.user_id,
+            messages=get_summary_prompt(
+                previous_summary=session.summary,
+                conversation=conversation,
+            ),
+        )
+        return json.loads(
+            chat_completion_response["choices"][0]["message"]["content"]
+        )["summary"]
+
+    def _fold(self, session: SessionStateModel, fold: int) -> None:
+        try:
+            summary = self._summarize(session, fold)
+            # Applied to the current session, turns may have been added meanwhile
+            session_manager.save_summary(session, summary, fold)
+            logger.info(
+                f"[ConversationMemory][_fold][{session.user_id}] - Folded {fold} turns into the summary"
+            )
+        except Exception as exc:
+            # The turns are already persisted; the next turn retries the summary
+            logger.exception(f"[ConversationMemory][_fold][{session.user_id}] Error: {exc}")
+        finally:
+            with self._folding_lock:
+                self._folding.discard(session.user_id)
+
+    def record_turn(
+        self,
+        conversation_analytics: ConversationAnalyticsModel,
+        pending_complaint: Optional[Dict[str, str]] = None,
+    ) -> SessionStateModel:
+        """
+        Saves a conversation turn and, when the budget is exceeded, schedules
+        the fold of the oldest turns into the running summary.
+
+        Args:
+            conversation_analytics (ConversationAnalyticsModel): The turn to persist.
+            pending_complaint (Optional[Dict[str, str]]): The complaint still being collected, None once it is raised.
+
+        Returns:
+            SessionStateModel: The updated session state, before the fold.
+        """
+        session = session_manager.save_turn(
+            conversation_analytics, pending_complaint=pending_complaint
+        )
+        fold = self._fold_count(session)
+        if not fold:
+            return session
+        with self._folding_lock:
+            if session.user_id in self._folding:
+                return session
+            self._folding.add(session.user_id)
+        self.summary_executor.submit(self._fold, session, fold)
+        return session
+
+
+conversation_memory = ConversationMemory()
@@ -0,0 +1,290 @@
+"""
+In-process metrics and request tracing.
+
+Counters and histograms are rendered in the Prometheus text exposition
+format by `/metrics`. They are per process: with several workers, scrape
+each worker or aggregate them on the Prometheus side.
+
+A `Trace` collects the spans of one chatbot turn, tied to its user_id and to
+the pipeline arm that served it. Every span also feeds the
+`cyfuture_stage_duration_seconds` histogram, labelled with the arm so the A/B
+pipelines can be compared, and the trace is logged as a single line when the
+turn finishes.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from config import OpenAIConfig
+
+from src.adapters.loggingmanager import logger
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(
+                    f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+                )
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[key] += value
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for key, counts in sorted(self._counts.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    labels = _format_labels(self.labels, key, 'le="{}"'.format(le))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labels, key)
+                lines.append(f"{self.name}_sum{labels} {self._sums[key]}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    The metrics of the process, plus gauge collectors that read the state of
+    the adapters (rate limiter, deployment pool, ...) at scrape time.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: List = []
+        self.collectors: List[Callable[[], Dict[str, float]]] = []
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Dict[str, float]]) -> None:
+        """
+        Registers a callable returning {"metric_name": value} gauges.
+        """
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        for collector in self.collectors:
+            try:
+                gauges = collector()
+            except Exception as exc:
+                logger.warning(f"[MetricsRegistry] - Collector failed: {exc}")
+                continue
+            for name, value in gauges.items():
+                lines += [f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+stage_duration = registry.histogram(
+    "cyfuture_stage_duration_seconds",
+    "Duration of the chatbot pipeline stages, per A/B pipeline arm",
+    labels=("stage", "pipeline"),
+)
+function_duration = registry.histogram(
+    "cyfuture_function_duration_seconds",
+    "Duration of the functions decorated with measure_time",
+    labels=("function",),
+)
+http_request_duration = registry.histogram(
+    "cyfuture_http_request_duration_seconds",
+    "Duration of the HTTP requests",
+    labels=("method", "route", "status"),
+)
+llm_tokens = registry.counter(
+    "cyfuture_llm_tokens_total",
+    "LLM tokens used, by model and kind (prompt, cached_prompt, completion)",
+    labels=("model", "kind"),
+)
+llm_cost = registry.counter(
+    "cyfuture_llm_cost_usd_total",
+    "Estimated LLM cost in USD, from OPENAI_PRICING",
+    labels=("model",),
+)
+cache_requests = registry.counter(
+    "cyfuture_cache_requests_total",
+    "Cache lookups, by cache and result (hit, miss)",
+    labels=("cache", "result"),
+)
+
+
+def _pricing(model: str) -> Optional[Dict[str, float]]:
+    # Azure reports versioned model names, e.g. "gpt-4o-mini-2024-07-18"
+    pricing = OpenAIConfig().OPENAI_PRICING
+    matches = [name for name in pricing if model.startswith(name)]
+    return pricing[max(matches, key=len)] if matches else None
+
+
+def record_llm_usage(
+    model: str, prompt_tokens: int, cached_tokens: int = 0, completion_tokens: int = 0
+) -> None:
+    """
+    Counts the tokens of one LLM call and its estimated cost.
+    """
+    llm_tokens.inc(prompt_tokens - cached_tokens, model=model, kind="prompt")
+    if cached_tokens:
+        llm_tokens.inc(cached_tokens, model=model, kind="cached_prompt")
+    if completion_tokens:
+        llm_tokens.inc(completion_tokens, model=model, kind="completion")
+    pricing = _pricing(model)
+    if pricing:
+        llm_cost.inc(
+            (
+                (prompt_tokens - cached_tokens) * pricing.get("prompt", 0)
+                + cached_tokens * pricing.get("cached_prompt", pricing.get("prompt", 0))
+                + completion_tokens * pricing.get("completion", 0)
+            )
+            / 1_000_000,
+            model=model,
+        )
+
+
+class Trace:
+    """
+    The spans of one request, tied to its trace ID (the user_id of the turn)
+    and to the pipeline arm ("multi" or "single") that served it.
+
+    Methods:
+        span(stage: str) -> ContextManager:
+            Times a block as a span of the stage.
+
+        record(stage: str, seconds: float) -> None:
+            Adds an already measured span.
+
+        server_timing() -> str:
+            The time per stage and the pipeline arm as a Server-Timing header value.
+
+        finish() -> None:
+            Logs the spans of the request as one line.
+    """
+
+    def __init__(self, trace_id: str, pipeline: str = "") -> None:
+        self.trace_id = trace_id
+        self.pipeline = pipeline
+        self.started_at = time.perf_counter()
+        self.timings: Dict[str, float] = defaultdict(float)
+        self.spans: List[Tuple[str, float, float]] = []
+
+    def record(self, stage: str, seconds: float) -> None:
+        end_offset = time.perf_counter() - self.started_at
+        self.timings[stage] += seconds
+        self.spans.append((stage, end_offset - seconds, seconds))
+        stage_duration.observe(seconds, stage=stage, pipeline=self.pipeline)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start_time)
+
+    def server_timing(self) -> str:
+        entries = [
+            f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.timings.items()
+        ]
+        if self.pipeline:
+            entries.append(f'pipeline;desc="{self.pipeline}"')
+        return ", ".join(entries)
+
+    def finish(self) -> None:
+        total = time.perf_counter() - self.started_at
+        spans = ", ".join(
+            f"{stage}@{start * 1000:.0f}+{seconds * 1000:.1f}ms"
+            for stage, start, seconds in self.spans
+        )
+        logger.info(
+            f"[Trace][{self.trace_id}] - pipeline: {self.pipeline}, total: {total * 1000:.1f}ms, spans: {spans}",
+            extra={
+                "txn_id": self.trace_id,
+                "pipeline": self.pipeline,
+                "duration_ms": round(total * 1000, 1),
+                "spans": {
+                    stage: round(seconds * 1000, 1)
+                    for stage, seconds in self.timings.items()
+                },
+                # One line per turn, kept whatever the INFO sampling rate
+                "sampled": False,
+            },
+        )
@@ -0,0 +1,65 @@
+"""
+Compressed storage of the chunk embeddings (MILVUS_VECTOR_STORAGE).
+
+- "float32": the embeddings as returned, in an HNSW index.
+- "float16": half the memory, in an HNSW index, no rescoring needed.
+- "binary": the sign bit of every dimension (1/32 of the memory) in a
+  BIN_IVF_FLAT index searched by Hamming distance.
+- "pq": IVF_PQ codes of the float32 vectors (MILVUS_PQ_M bytes per vector).
+
+In the binary and pq modes the float32 vectors are kept in a memory-mapped
+field: the compressed index returns MILVUS_RESCORE_FACTOR times the
+requested hits and only those are rescored by exact cosine similarity.
+"""
+
+from typing import Dict
+
+import numpy as np
+
+VECTOR_STORAGES = ("float32", "float16", "binary", "pq")
+RESCORED_STORAGES = ("binary", "pq")
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    Scales float32 vectors (a vector or one per row) to unit length.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def binary_codes(vectors: np.ndarray) -> np.ndarray:
+    """
+    Packs the sign bits of the vectors, dim / 8 bytes per vector.
+    """
+    return np.packbits(np.asarray(vectors) > 0, axis=-1)
+
+
+def index_bytes_per_vector(
+    storage: str, dim: int, hnsw_m: int = 16, pq_m: int = 48, pq_nbits: int = 8
+) -> Dict[str, int]:
+    """
+    Estimated memory and disk footprint of one vector in a storage mode.
+
+    Args:
+        storage (str): One of VECTOR_STORAGES.
+        dim (int): Dimension of the embeddings.
+        hnsw_m (int): M of the HNSW graph (float32 and float16).
+        pq_m (int): Number of PQ sub-quantizers.
+        pq_nbits (int): Bits per PQ code.
+
+    Returns:
+        Dict[str, int]: "memory" (index resident in the query nodes) and
+        "disk" (memory-mapped full-precision copy used for rescoring).
+    """
+    # Layer 0 of an HNSW graph keeps 2 * M neighbour IDs per vector
+    graph = 2 * hnsw_m * 4
+    if storage == "float16":
+        return {"memory": dim * 2 + graph, "disk": 0}
+    if storage == "binary":
+        # IVF list entries carry the 8 byte row ID
+        return {"memory": dim // 8 + 8, "disk": dim * 4}
+    if storage == "pq":
+        return {"memory": pq_m * pq_nbits // 8 + 8, "disk": dim * 4}
+    return {"memory": dim * 4 + graph, "disk": 0}
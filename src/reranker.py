@@ -0,0 +1,136 @@
+"""
+Re-ranking of the retrieved chunks.
+
+Milvus is asked for RERANK_CANDIDATES chunks and only the RERANK_TOP_N best,
+as scored here, go into the prompt. Each re-ranker scores all candidates of
+a query in one vectorized call:
+
+- "lexical" (default): BM25 of the query over the candidates, blended with
+  their vector similarity. No model, well under a millisecond of numpy.
+- "cross_encoder": a small local cross-encoder (sentence-transformers),
+  loaded once per process, that scores every (query, chunk) pair in batches.
+"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List
+
+import numpy as np
+
+from config import RerankConfig
+from src.adapters.lazy import LazyAdapter
+from src.adapters.loggingmanager import logger
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+@lru_cache(maxsize=4096)
+def _term_counts(text: str) -> Counter:
+    # Popular chunks come back query after query, they are tokenized once
+    return Counter(tokenize(text))
+
+
+def _min_max(scores: np.ndarray) -> np.ndarray:
+    spread = scores.max() - scores.min()
+    return (scores - scores.min()) / spread if spread > 0 else np.ones_like(scores)
+
+
+class LexicalReranker(RerankConfig):
+    """
+    Scores the candidates with BM25 (IDF computed over the candidates) and
+    blends it with their vector similarity, weighted by RERANK_LEXICAL_WEIGHT.
+    """
+
+    def score(self, query: str, candidates: List[Dict[str, Any]]) -> np.ndarray:
+        terms = list(dict.fromkeys(tokenize(query)))
+        counts = [_term_counts(candidate["entity"]["content"]) for candidate in candidates]
+        similarity = _min_max(
+            np.array([candidate["distance"] for candidate in candidates], dtype=float)
+        )
+        if not terms:
+            return similarity
+        # (candidates x query terms) term frequencies
+        tf = np.array(
+            [[count.get(term, 0) for term in terms] for count in counts], dtype=float
+        )
+        lengths = np.array([sum(count.values()) for count in counts], dtype=float)
+        document_frequency = (tf > 0).sum(axis=0)
+        idf = np.log(
+            1 + (len(candidates) - document_frequency + 0.5) / (document_frequency + 0.5)
+        )
+        k1, b = self.RERANK_BM25_K1, self.RERANK_BM25_B
+        norm = k1 * (1 - b + b * lengths / max(lengths.mean(), 1.0))
+        bm25 = (idf * tf * (k1 + 1) / (tf + norm[:, None])).sum(axis=1)
+        weight = self.RERANK_LEXICAL_WEIGHT
+        return weight * _min_max(bm25) + (1 - weight) * similarity
+
+
+class CrossEncoderReranker(RerankConfig):
+    """
+    Scores (query, chunk) pairs with a local cross-encoder, e.g.
+    cross-encoder/ms-marco-MiniLM-L-6-v2, which runs on CPU in a few ms per pair.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as import_exc:
+            raise ImportError(
+                "RERANKER=cross_encoder requires the 'sentence-transformers' package"
+            ) from import_exc
+        self.model = CrossEncoder(self.RERANK_MODEL, device="cpu")
+        logger.info(f"[CrossEncoderReranker] - Model {self.RERANK_MODEL} loaded")
+
+    def score(self, query: str, candidates: List[Dict[str, Any]]) -> np.ndarray:
+        return np.asarray(
+            self.model.predict(
+                [(query, candidate["entity"]["content"]) for candidate in candidates],
+                batch_size=self.RERANK_BATCH_SIZE,
+                show_progress_bar=False,
+            ),
+            dtype=float,
+        )
+
+
+class Reranker(RerankConfig):
+    """
+    Keeps the best RERANK_TOP_N retrieved chunks of a query.
+
+    Methods:
+        rerank(query: str, candidates: List[Dict[str, Any]], transaction_id: str) -> List[Dict[str, Any]]:
+            Returns the best candidates, best first.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.scorer = (
+            CrossEncoderReranker()
+            if self.RERANKER == "cross_encoder"
+            else LexicalReranker()
+        )
+        logger.info(f"[Reranker] - Re-ranker initialized: {self.RERANKER}")
+
+    def rerank(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        transaction_id: str = "root",
+    ) -> List[Dict[str, Any]]:
+        if len(candidates) <= 1:
+            return candidates
+        scores = self.scorer.score(query, candidates)
+        best = np.argsort(-scores, kind="stable")[: self.RERANK_TOP_N]
+        logger.info(
+            f"[Reranker][rerank][{transaction_id}] - Kept {len(best)} of {len(candidates)} candidates"
+        )
+        return [candidates[index] for index in best]
+
+
+# The cross-encoder is loaded on first use (or by the startup warm-up)
+reranker = LazyAdapter(Reranker)
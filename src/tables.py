@@ -0,0 +1,126 @@
+"""
+Dialect-neutral definitions of the application tables.
+
+The same definitions are used to create the schema on SQLite (default) and
+PostgreSQL, so that `create_sql_tables` and the indexes behave identically on
+every backend.
+"""
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    Text,
+    func,
+)
+from config import SqlConfig
+
+metadata = MetaData()
+
+
+def _id_column() -> Column:
+    # INTEGER PRIMARY KEY AUTOINCREMENT on SQLite, SERIAL/IDENTITY on PostgreSQL
+    return Column("id", Integer, primary_key=True, autoincrement=True)
+
+
+def _created_at_column() -> Column:
+    return Column("created_at", DateTime, server_default=func.current_timestamp())
+
+
+complaints_table = Table(
+    SqlConfig().COMPLAINTS_TABLE,
+    metadata,
+    _id_column(),
+    Column("complaint_id", Text, nullable=False),
+    Column("name", Text, nullable=False),
+    Column("phone_number", Text, nullable=False),
+    Column("email", Text, nullable=False),
+    Column("complaint_details", Text, nullable=False),
+    Column("status", Text, nullable=False),
+    _created_at_column(),
+    Index("ix_complaints_complaint_id", "complaint_id", unique=True),
+    # Keyset-paginated listing filtered by status / email / date range
+    Index("ix_complaints_status_id", "status", "id"),
+    Index("ix_complaints_email_id", "email", "id"),
+    Index("ix_complaints_created_at", "created_at"),
+    sqlite_autoincrement=True,
+)
+
+user_details_table = Table(
+    SqlConfig().USER_DETAILS_TABLE,
+    metadata,
+    _id_column(),
+    Column("user_id", Text, nullable=False),
+    Column("name", Text, nullable=False),
+    Column("phone_number", Text, nullable=False),
+    Column("email", Text, nullable=False),
+    _created_at_column(),
+    Index("ix_user_details_user_id_created_at", "user_id", "created_at"),
+    sqlite_autoincrement=True,
+)
+
+conversation_analytics_table = Table(
+    SqlConfig().CONVERSATION_ANALYTICS_TABLE,
+    metadata,
+    _id_column(),
+    Column("user_id", Text, nullable=False),
+    Column("user_text", Text, nullable=False),
+    Column("complaint_details", Text),
+    Column("response", Text, nullable=False),
+    Column("followup_flag", Integer, nullable=False),
+    Column("pipeline", Text),
+    _created_at_column(),
+    Index("ix_conversation_analytics_user_id_created_at", "user_id", "created_at"),
+    sqlite_autoincrement=True,
+)
+
+ingestion_jobs_table = Table(
+    SqlConfig().INGESTION_JOBS_TABLE,
+    metadata,
+    _id_column(),
+    Column("job_id", Text, nullable=False),
+    Column("collection_name", Text, nullable=False),
+    Column("source", Text, nullable=False),
+    # queued -> running -> succeeded / failed / cancelled
+    Column("status", Text, nullable=False),
+    Column("stage", Text),
+    Column("processed", Integer, nullable=False, server_default="0"),
+    Column("total", Integer, nullable=False, server_default="0"),
+    Column("message", Text),
+    Column("cancel_requested", Integer, nullable=False, server_default="0"),
+    _created_at_column(),
+    Column("started_at", DateTime),
+    Column("updated_at", DateTime, server_default=func.current_timestamp()),
+    Column("finished_at", DateTime),
+    Index("ix_ingestion_jobs_job_id", "job_id", unique=True),
+    # The active job of a collection
+    Index("ix_ingestion_jobs_collection_name_status", "collection_name", "status"),
+    sqlite_autoincrement=True,
+)
+
+collection_versions_table = Table(
+    SqlConfig().COLLECTION_VERSIONS_TABLE,
+    metadata,
+    _id_column(),
+    Column("collection_name", Text, nullable=False),
+    # Bumped by every rebuild of the collection, part of the retrieval cache keys
+    Column("version", Integer, nullable=False),
+    Column("updated_at", DateTime, server_default=func.current_timestamp()),
+    Index("ix_collection_versions_collection_name", "collection_name", unique=True),
+    sqlite_autoincrement=True,
+)
+
+conversation_summary_table = Table(
+    SqlConfig().CONVERSATION_SUMMARY_TABLE,
+    metadata,
+    _id_column(),
+    Column("user_id", Text, nullable=False),
+    Column("summary", Text, nullable=False),
+    Column("summarized_turns", Integer, nullable=False),
+    _created_at_column(),
+    Index("ix_conversation_summaries_user_id_created_at", "user_id", "created_at"),
+    sqlite_autoincrement=True,
+)
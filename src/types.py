@@ -1,9 +1,8 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Dict, Optional
 import json
 from src.adapters.sqllitemanager import sql_manager
 from config import SqlConfig
-import pandas as pd
 
 
 class MilvusVectorRecord(BaseModel):
@@ -13,6 +12,7 @@ class MilvusVectorRecord(BaseModel):
     Attributes:
         content (str): The content of the record, typically a text or document.
         contentEmbeddings (List[float]): Embeddings for the content, represented as a list of floats.
+        contentBinary (Optional[bytes]): Sign bits of the embeddings, for the binary vector storage.
 
     Methods:
         __init__(self, **data): Initializes a new instance of the class.
@@ -24,6 +24,25 @@ class MilvusVectorRecord(BaseModel):
     contentEmbeddings: List[float] = Field(
         description="Embeddings for the content, represented as a list of floats.",
     )
+    contentBinary: Optional[bytes] = Field(
+        default=None,
+        description="Sign bits of the embeddings, only stored with MILVUS_VECTOR_STORAGE=binary.",
+    )
+
+
+class FaqPair(BaseModel):
+    """
+    FaqPair is a numbered question of an FAQ document with its answer.
+
+    Attributes:
+        number (int): The number of the question in the document.
+        question (str): The question, on one line.
+        answer (str): The text between the question and the next one.
+    """
+
+    number: int = Field(description="The number of the question in the document.")
+    question: str = Field(description="The question, on one line.")
+    answer: str = Field(description="The text between the question and the next one.")
 
 
 class ComplaintModel(BaseModel):
@@ -82,6 +101,8 @@ class ComplaintAnalyticsModel(ComplaintModel):
             BBBOTException: If there is an error while inserting the data into the database.
 
         """
+        import pandas as pd
+
         try:
             sql_manager.insert_data(
                 transaction_id=self.complaint_id,
@@ -92,6 +113,34 @@ class ComplaintAnalyticsModel(ComplaintModel):
             raise custom_exc
 
 
+class ComplaintStatusUpdateModel(BaseModel):
+    """
+    ComplaintStatusUpdateModel represents a status transition request for a complaint.
+
+    Attributes:
+        status (str): The new status of the complaint.
+    """
+
+    status: str = Field(
+        description="The new status of the complaint, e.g., 'In Progress', 'Resolved'.",
+    )
+
+
+class ComplaintBatchLookupModel(BaseModel):
+    """
+    ComplaintBatchLookupModel represents a lookup of many complaints in one call.
+
+    Attributes:
+        complaint_ids (List[str]): Unique identifiers of the complaints to fetch.
+    """
+
+    complaint_ids: List[str] = Field(
+        min_length=1,
+        max_length=SqlConfig().BATCH_LOOKUP_MAX_IDS,
+        description="Unique identifiers of the complaints to fetch.",
+    )
+
+
 class ChatBotModel(BaseModel):
     user_id: str = Field(
         description="Unique identifier for the user interacting with the chatbot.",
@@ -114,6 +163,10 @@ class ConversationAnalyticsModel(ChatBotModel):
         default=0,
         description="Flag indicating if a follow-up is needed.",
     )
+    pipeline: str = Field(
+        default="",
+        description="A/B pipeline arm that served the turn, multi or single.",
+    )
 
     def to_dict(self):
         """
@@ -135,6 +188,8 @@ class ConversationAnalyticsModel(ChatBotModel):
         Raises:
             Exception: If there is an error while inserting the data into the database.
         """
+        import pandas as pd
+
         try:
             sql_manager.insert_data(
                 transaction_id=self.user_id,
@@ -182,6 +237,8 @@ class UserDetailsModel(BaseModel):
         Raises:
             Exception: If there is an error while inserting the data into the database.
         """
+        import pandas as pd
+
         try:
             sql_manager.insert_data(
                 transaction_id=self.user_id,
@@ -192,4 +249,81 @@ class UserDetailsModel(BaseModel):
             raise custom_exc
 
 
+class SessionStateModel(BaseModel):
+    """
+    SessionStateModel represents the cached conversation state of a single user.
+
+    Attributes:
+        user_id (str): Unique identifier for the user.
+        turns (List[Dict[str, str]]): Most recent turns, oldest first, each with "user_text" and "response".
+        user_details (Dict[str, str]): Latest collected user details (name, phone_number, email).
+        pending_complaint (Optional[Dict[str, str]]): Complaint being collected through follow-up questions, if any.
+        summary (str): Running summary of the turns that are no longer kept verbatim.
+        summarized_turns (int): Number of turns folded into the summary.
+    """
+
+    user_id: str = Field(
+        description="Unique identifier for the user.",
+    )
+    turns: List[Dict[str, str]] = Field(
+        default_factory=list,
+        description="Most recent conversation turns, oldest first.",
+    )
+    user_details: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Latest collected user details.",
+    )
+    pending_complaint: Optional[Dict[str, str]] = Field(
+        default=None,
+        description="Complaint currently being collected through follow-up questions.",
+    )
+    summary: str = Field(
+        default="",
+        description="Running summary of the turns that are no longer kept verbatim.",
+    )
+    summarized_turns: int = Field(
+        default=0,
+        description="Number of turns folded into the summary.",
+    )
+
+
+class ConversationSummaryModel(BaseModel):
+    """
+    ConversationSummaryModel represents a stored running summary of a user's conversation.
+
+    Attributes:
+        user_id (str): Unique identifier for the user.
+        summary (str): Summary of the oldest turns of the conversation.
+        summarized_turns (int): Number of turns, counted from the start of the conversation, covered by the summary.
+    """
+
+    user_id: str = Field(
+        description="Unique identifier for the user.",
+    )
+    summary: str = Field(
+        description="Summary of the oldest turns of the conversation.",
+    )
+    summarized_turns: int = Field(
+        description="Number of turns covered by the summary.",
+    )
+
+    def to_sql(self):
+        """
+        Converts the conversation summary to SQL format and inserts it into the database.
+
+        Raises:
+            Exception: If there is an error while inserting the data into the database.
+        """
+        import pandas as pd
+
+        try:
+            sql_manager.insert_data(
+                transaction_id=self.user_id,
+                table_name=SqlConfig().CONVERSATION_SUMMARY_TABLE,
+                df=pd.DataFrame([self.model_dump()]),
+            )
+        except Exception as custom_exc:
+            raise custom_exc
+
+
 # type: ignore
@@ -1,6 +1,8 @@
-from docling.document_converter import DocumentConverter
-import re
-import tiktoken
+import unicodedata
+from functools import lru_cache
+from typing import Callable, List, Optional
+import numpy as np
+from config import AppConfig, MilvusConfig
 from pymilvus import (
     CollectionSchema,
     FieldSchema,
@@ -11,12 +13,9 @@ from src.adapters.milvusmanager import milvus_manager
 from src.types import MilvusVectorRecord
 from src.adapters.openaimanager import openai_manager
 from src.adapters.loggingmanager import logger
-
-
-def count_tokens(text: str):
-    encoding = tiktoken.encoding_for_model("gpt-4o-mini")
-    tokens = encoding.encode(text)
-    return len(tokens)
+from src.faq import extract_faq_pairs, find_answer_chunk
+from src.quantization import RESCORED_STORAGES, binary_codes
+from src.utils import count_tokens
 
 
 def split_text(text: str):
@@ -31,6 +30,7 @@ def split_text(text: str):
             " ",
             ".",
             ",",
+            "\u0964",  # Devanagari danda
             "\u200b",  # Zero-width space
             "\uff0c",  # Fullwidth comma
             "\u3001",  # Ideographic comma
@@ -42,19 +42,23 @@ def split_text(text: str):
     return text_splitter.split_text(text)
 
 
-converter = DocumentConverter()
+@lru_cache(maxsize=1)
+def get_converter():
+    # docling (and its models) is only loaded when documents are ingested
+    from docling.document_converter import DocumentConverter
 
+    return DocumentConverter()
 
-def upload_docs():
-    logger.info("Starting document upload process.")
-    result = converter.convert("data/Frequently-asked-questions-2022-15092022.pdf")
-    logger.info("PDF converted to text.")
-    pdf_text = result.document.export_to_text()
-    pdf_text = re.sub(r"[^\x00-\x7F]+", " ", pdf_text)
-    documentation_chunks = split_text(pdf_text)
-    logger.info(f"Document split into {len(documentation_chunks)} chunks.")
 
-    milvus_records = list(MilvusVectorRecord.model_fields.keys())
+def build_schema(config: Optional[MilvusConfig] = None) -> CollectionSchema:
+    """
+    The collection schema of the configured MILVUS_VECTOR_STORAGE.
+
+    The full-precision vectors of the binary and pq modes are memory-mapped:
+    they are only read to rescore the candidates of the compressed index.
+    """
+    config = config or milvus_manager
+    storage = config.MILVUS_VECTOR_STORAGE
     fields = []
     fields.append(
         FieldSchema(
@@ -65,16 +69,29 @@ def upload_docs():
             description="Unique ID for each record",
         )
     )
-    for field in milvus_records:
-        if field == "contentEmbeddings":
+    for field in MilvusVectorRecord.model_fields.keys():
+        if field == config.MILVUS_VECTOR_FIELD:
             fields.append(
                 FieldSchema(
                     name=field,
-                    dtype=DataType.FLOAT_VECTOR,
-                    dim=1536,
+                    dtype=DataType.FLOAT16_VECTOR
+                    if storage == "float16"
+                    else DataType.FLOAT_VECTOR,
+                    dim=config.MILVUS_VECTOR_DIM,
                     description="Embeddings for content",
+                    **({"mmap_enabled": True} if storage in RESCORED_STORAGES else {}),
                 )
             )
+        elif field == config.MILVUS_BINARY_FIELD:
+            if storage == "binary":
+                fields.append(
+                    FieldSchema(
+                        name=field,
+                        dtype=DataType.BINARY_VECTOR,
+                        dim=config.MILVUS_VECTOR_DIM,
+                        description="Sign bits of the embeddings",
+                    )
+                )
         else:
             fields.append(
                 FieldSchema(
@@ -85,47 +102,313 @@ def upload_docs():
                 )
             )
 
-    logger.info("Dropping existing Milvus collection if it exists.")
-    milvus_manager.milvus_client.drop_collection(
-        collection_name=milvus_manager.MILVUS_COLLECTION_NAME,
-    )
-    schema = CollectionSchema(
+    return CollectionSchema(
         fields=fields,
         description="Collection schema for storing vectorized documents",
     )
+
+
+def build_index_params(config: Optional[MilvusConfig] = None):
+    """
+    The vector indexes of the configured MILVUS_VECTOR_STORAGE, with
+    MILVUS_INDEX_TYPE and MILVUS_INDEX_PARAMS for the float32 and float16 storages.
+    """
+    config = config or milvus_manager
+    storage = config.MILVUS_VECTOR_STORAGE
     index_params = milvus_manager.milvus_client.prepare_index_params()
-    index_params.add_index(
-        field_name="contentEmbeddings",
-        index_type=milvus_manager.MILVUS_INDEX_TYPE,
-        metric_type=milvus_manager.MILVUS_DISTANCE_METRIC,
-        index_name=milvus_manager.MILVUS_INDEX_NAME,
+    if storage == "pq":
+        index_params.add_index(
+            field_name=config.MILVUS_VECTOR_FIELD,
+            index_type="IVF_PQ",
+            metric_type=config.MILVUS_DISTANCE_METRIC,
+            index_name=config.MILVUS_INDEX_NAME,
+            params={
+                "nlist": config.MILVUS_IVF_NLIST,
+                "m": config.MILVUS_PQ_M,
+                "nbits": config.MILVUS_PQ_NBITS,
+            },
+        )
+    elif storage == "binary":
+        index_params.add_index(
+            field_name=config.MILVUS_BINARY_FIELD,
+            index_type="BIN_IVF_FLAT",
+            metric_type="HAMMING",
+            index_name=config.MILVUS_INDEX_NAME,
+            params={"nlist": config.MILVUS_IVF_NLIST},
+        )
+        # Every vector field needs an index to load, this one is never searched
+        index_params.add_index(
+            field_name=config.MILVUS_VECTOR_FIELD,
+            index_type="FLAT",
+            metric_type=config.MILVUS_DISTANCE_METRIC,
+            index_name=f"{config.MILVUS_INDEX_NAME}_rescore",
+            params={"mmap.enabled": "true"},
+        )
+    else:
+        index_params.add_index(
+            field_name=config.MILVUS_VECTOR_FIELD,
+            index_type=config.MILVUS_INDEX_TYPE,
+            metric_type=config.MILVUS_DISTANCE_METRIC,
+            index_name=config.MILVUS_INDEX_NAME,
+            params=config.MILVUS_INDEX_PARAMS,
+        )
+    return index_params
+
+
+def to_records(
+    contents: List[str], embeddings: np.ndarray, config: Optional[MilvusConfig] = None
+) -> List[dict]:
+    """
+    Milvus records of a batch of chunks, with their vectors encoded for the
+    configured MILVUS_VECTOR_STORAGE.
+    """
+    config = config or milvus_manager
+    storage = config.MILVUS_VECTOR_STORAGE
+    vectors = embeddings.astype(np.float16) if storage == "float16" else embeddings
+    records = [
+        {"content": content, config.MILVUS_VECTOR_FIELD: vector}
+        for content, vector in zip(contents, vectors)
+    ]
+    if storage == "binary":
+        for record, code in zip(records, binary_codes(embeddings)):
+            record[config.MILVUS_BINARY_FIELD] = code.tobytes()
+    return records
+
+
+def load_document(source: Optional[str] = None) -> str:
+    """
+    Converts a PDF to the text that is chunked and indexed.
+
+    Args:
+        source (Optional[str]): Path of the PDF, INGESTION_SOURCE by default.
+
+    Returns:
+        str: The text of the document.
+    """
+    result = get_converter().convert(source or AppConfig().INGESTION_SOURCE)
+    logger.info("PDF converted to text.")
+    pdf_text = result.document.export_to_text()
+    # Non-ASCII text (Hindi, symbols) is kept, only compatibility forms such as
+    # ligatures and full-width characters are folded
+    return unicodedata.normalize("NFKC", pdf_text)
+
+
+def embed_chunks(
+    chunks: List[str],
+    progress: Optional[Callable[[str, int, int], None]] = None,
+    stage: str = "embedding",
+) -> np.ndarray:
+    """
+    Embeds the chunks (or any texts) into one float32 matrix, one row per
+    chunk, instead of a list of Python floats per chunk (~8x smaller).
+    """
+    progress = progress or (lambda stage, processed, total: None)
+    embeddings = np.empty(
+        (len(chunks), milvus_manager.MILVUS_VECTOR_DIM), dtype=np.float32
     )
-    logger.info("Creating new Milvus collection and index.")
-    milvus_manager.milvus_client.create_collection(
-        collection_name=milvus_manager.MILVUS_COLLECTION_NAME,
-        schema=schema,
-        index_params=index_params,
+    logger.info(f"Generating embeddings ({stage}) for {len(chunks)} texts.")
+    for idx, doc in enumerate(chunks):
+        progress(stage, idx, len(chunks))
+        embeddings[idx] = openai_manager.create_embedding(doc, f"{stage}_{idx}")[1][
+            "data"
+        ][0]["embedding"]
+    return embeddings
+
+
+def build_collection(
+    collection_name: str,
+    chunks: List[str],
+    embeddings: np.ndarray,
+    config: Optional[MilvusConfig] = None,
+    progress: Optional[Callable[[str, int, int], None]] = None,
+) -> int:
+    """
+    Replaces a collection by the embedded chunks, with the schema and indexes
+    of `config` (the Milvus settings of the app by default).
+
+    Returns:
+        int: The number of inserted records.
+    """
+    config = config or milvus_manager
+    progress = progress or (lambda stage, processed, total: None)
+    schema = build_schema(config)
+    index_params = build_index_params(config)
+    logger.info(f"Dropping Milvus collection {collection_name} if it exists.")
+    milvus_manager.milvus_client.drop_collection(collection_name=collection_name)
+    try:
+        logger.info(
+            f"Creating Milvus collection {collection_name} and index ({config.MILVUS_VECTOR_STORAGE} vectors)."
+        )
+        milvus_manager.milvus_client.create_collection(
+            collection_name=collection_name,
+            schema=schema,
+            index_params=index_params,
+        )
+        logger.info(f"Inserting {len(chunks)} records into Milvus.")
+        insert_count = 0
+        batch_size = config.MILVUS_INSERT_BATCH_SIZE
+        for start in range(0, len(chunks), batch_size):
+            batch = milvus_manager.milvus_client.insert(
+                collection_name=collection_name,
+                data=to_records(
+                    chunks[start : start + batch_size],
+                    embeddings[start : start + batch_size],
+                    config,
+                ),
+            )
+            insert_count += batch["insert_count"]
+            progress("inserting", insert_count, len(chunks))
+    finally:
+        # Cached search results of the dropped collection stop matching
+        milvus_manager.bump_collection_version(collection_name)
+    return insert_count
+
+
+def build_faq_collection(
+    questions: List[str],
+    answer_chunks: List[int],
+    chunks: List[str],
+    embeddings: np.ndarray,
+) -> int:
+    """
+    Replaces the companion collection of the FAQ questions: every question
+    with its embedding, the index of the chunk holding its answer and that
+    chunk's text, so a match needs no second lookup. A document without
+    numbered questions only drops it. Either way the collection moves to a
+    new version, so the cached matches of the previous one are not served.
+
+    Returns:
+        int: The number of indexed questions.
+    """
+    collection_name = milvus_manager.MILVUS_FAQ_COLLECTION_NAME
+    milvus_manager.milvus_client.drop_collection(collection_name=collection_name)
+    try:
+        if not questions:
+            logger.info("No FAQ questions found, FAQ collection dropped.")
+            return 0
+        schema = CollectionSchema(
+            fields=[
+                FieldSchema(
+                    name="id",
+                    dtype=DataType.INT64,
+                    is_primary=True,
+                    auto_id=True,
+                    description="Unique ID for each record",
+                ),
+                FieldSchema(
+                    name="question",
+                    dtype=DataType.VARCHAR,
+                    max_length=2000,
+                    description="The FAQ question",
+                ),
+                FieldSchema(
+                    name="content",
+                    dtype=DataType.VARCHAR,
+                    max_length=10000,
+                    description="The chunk holding the answer",
+                ),
+                FieldSchema(
+                    name="chunk_index",
+                    dtype=DataType.INT64,
+                    description="Position of the answer chunk in the document",
+                ),
+                FieldSchema(
+                    name=milvus_manager.MILVUS_FAQ_VECTOR_FIELD,
+                    dtype=DataType.FLOAT_VECTOR,
+                    dim=milvus_manager.MILVUS_VECTOR_DIM,
+                    description="Embeddings for the question",
+                ),
+            ],
+            description="FAQ questions linked to their answer chunk",
+        )
+        index_params = milvus_manager.milvus_client.prepare_index_params()
+        # A few hundred questions at most, searched exactly
+        index_params.add_index(
+            field_name=milvus_manager.MILVUS_FAQ_VECTOR_FIELD,
+            index_type="FLAT",
+            metric_type=milvus_manager.MILVUS_DISTANCE_METRIC,
+            index_name=f"{collection_name}_index",
+        )
+        milvus_manager.milvus_client.create_collection(
+            collection_name=collection_name,
+            schema=schema,
+            index_params=index_params,
+        )
+        res = milvus_manager.milvus_client.insert(
+            collection_name=collection_name,
+            data=[
+                {
+                    "question": question,
+                    "content": chunks[chunk_index],
+                    "chunk_index": chunk_index,
+                    milvus_manager.MILVUS_FAQ_VECTOR_FIELD: embedding,
+                }
+                for question, chunk_index, embedding in zip(
+                    questions, answer_chunks, embeddings
+                )
+            ],
+        )
+        logger.info(f"Indexed {res['insert_count']} FAQ questions.")
+        return res["insert_count"]
+    finally:
+        # Cached FAQ matches, and whether the collection exists, stop matching
+        milvus_manager.bump_collection_version(collection_name)
+
+
+def upload_docs(
+    source: Optional[str] = None,
+    progress: Optional[Callable[[str, int, int], None]] = None,
+):
+    """
+    Rebuilds the Milvus collection from a PDF, and the companion collection
+    of its FAQ questions.
+
+    The chunks and questions are embedded before the existing collection is dropped, so the
+    collection keeps serving searches for most of the rebuild and a rebuild
+    stopped during conversion or embedding leaves it untouched.
+
+    Args:
+        source (Optional[str]): Path of the PDF to ingest, INGESTION_SOURCE by default.
+        progress (Optional[Callable[[str, int, int], None]]): Called with
+            (stage, processed, total) as the rebuild advances. It may raise
+            to stop the rebuild.
+
+    Returns:
+        str: A summary of the insertion.
+    """
+    progress = progress or (lambda stage, processed, total: None)
+    logger.info("Starting document upload process.")
+    progress("converting", 0, 0)
+    pdf_text = load_document(source)
+    documentation_chunks = [doc.strip() for doc in split_text(pdf_text)]
+    logger.info(f"Document split into {len(documentation_chunks)} chunks.")
+
+    embeddings = embed_chunks(documentation_chunks, progress)
+    # The FAQ questions, linked to the chunk holding their answer
+    questions, answer_chunks = [], []
+    for pair in extract_faq_pairs(pdf_text):
+        chunk_index = find_answer_chunk(pair, documentation_chunks)
+        if chunk_index is not None:
+            questions.append(pair.question)
+            answer_chunks.append(chunk_index)
+    question_embeddings = embed_chunks(questions, progress, stage="embedding_questions")
+
+    progress("inserting", 0, len(documentation_chunks))
+    insert_count = build_collection(
+        milvus_manager.MILVUS_COLLECTION_NAME,
+        documentation_chunks,
+        embeddings,
+        progress=progress,
     )
-    data_list = []
-    logger.info("Generating embeddings and preparing data for insertion.")
-    for idx, doc in enumerate(documentation_chunks):
-        doc = doc.strip()
-        temp = {
-            "content": doc,
-            "contentEmbeddings": openai_manager.create_embedding(doc, f"chunk_{idx}")[
-                1
-            ]["data"][0]["embedding"],
-        }
-        data_list.append(MilvusVectorRecord(**temp).model_dump())
-    logger.info(f"Inserting {len(data_list)} records into Milvus.")
-    res = milvus_manager.milvus_client.insert(
-        collection_name=milvus_manager.MILVUS_COLLECTION_NAME,
-        data=data_list,
+    question_count = build_faq_collection(
+        questions, answer_chunks, documentation_chunks, question_embeddings
     )
 
-    if res["insert_count"] > 0:
-        logger.info(f"Successfully inserted {res["insert_count"]} records into Milvus.")
-        return f"Successfully inserted {res["insert_count"]} records into Milvus."
+    if insert_count > 0:
+        logger.info(
+            f"Successfully inserted {insert_count} records ({question_count} FAQ questions) into Milvus."
+        )
+        return f"Successfully inserted {insert_count} records ({question_count} FAQ questions) into Milvus."
     else:
         logger.info("No records were inserted into Milvus.")
         return "No records were inserted into Milvus."
@@ -1,13 +1,25 @@
+import json
 import uuid
-import requests
+import tiktoken
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import select, update
 from src.adapters.sqllitemanager import sql_manager
 
 from src.adapters.loggingmanager import logger
 from src.types import ComplaintModel, ComplaintAnalyticsModel
 from src.decorators import measure_time
+from src.tables import metadata, complaints_table
 from config import SqlConfig
 
 
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    encoding = tiktoken.encoding_for_model(model)
+    tokens = encoding.encode(text)
+    return len(tokens)
+
+
 @measure_time
 def generate_complaint(complaint: ComplaintModel):
     complaint_analytics = ComplaintAnalyticsModel(**complaint.model_dump())
@@ -24,11 +36,96 @@ def generate_complaint(complaint: ComplaintModel):
         raise e
 
 
+def insert_complaint_chunk(lines: List[Tuple[int, str]]) -> List[dict]:
+    """
+    Validates a chunk of NDJSON complaint lines and inserts the valid ones in one transaction.
+
+    Args:
+        lines (List[Tuple[int, str]]): (line number, raw JSON line) pairs.
+
+    Returns:
+        List[dict]: One result per line, with either the new "complaint_id" or an "error".
+    """
+    results, rows = [], []
+    for line_number, line in lines:
+        try:
+            complaint_analytics = ComplaintAnalyticsModel(
+                **ComplaintModel.model_validate_json(line).model_dump(),
+                complaint_id=str(uuid.uuid4()),
+                status="Pending",
+            )
+        except ValidationError as validation_exc:
+            results.append(
+                {
+                    "line": line_number,
+                    "status": "failed",
+                    "error": validation_exc.errors(include_url=False),
+                }
+            )
+            continue
+        rows.append(complaint_analytics.to_dict())
+        results.append(
+            {
+                "line": line_number,
+                "status": "created",
+                "complaint_id": complaint_analytics.complaint_id,
+            }
+        )
+    try:
+        sql_manager.insert_rows(
+            transaction_id=f"bulk_{lines[0][0]}",
+            table=complaints_table,
+            rows=rows,
+        )
+    except Exception as e:
+        logger.exception(f"[insert_complaint_chunk] - Error inserting chunk: {str(e)}")
+        # The whole chunk was rolled back
+        for result in results:
+            if result["status"] == "created":
+                result.pop("complaint_id")
+                result.update({"status": "failed", "error": "Chunk insert failed"})
+    return results
+
+
+def iter_complaints_export(
+    page_size: int = SqlConfig().EXPORT_PAGE_SIZE,
+) -> Iterator[str]:
+    """
+    Streams every complaint as NDJSON, paging through the table by primary key.
+
+    Keyset pagination keeps every page an index range scan, and only one page
+    is held in memory at a time.
+
+    Args:
+        page_size (int): Number of rows fetched per page.
+
+    Yields:
+        str: One JSON encoded complaint per line.
+    """
+    query = f"SELECT id, complaint_id, name, phone_number, email, complaint_details, status, created_at FROM {SqlConfig().COMPLAINTS_TABLE} WHERE id > :last_id ORDER BY id LIMIT :page_size;"
+    last_id = 0
+    while True:
+        rows = sql_manager.fetch_rows(
+            transaction_id="export",
+            sql_query=query,
+            params={"last_id": last_id, "page_size": page_size},
+        )
+        for row in rows:
+            yield json.dumps(row, default=str) + "\n"
+        if len(rows) < page_size:
+            break
+        last_id = rows[-1]["id"]
+
+
 @measure_time
 def get_complaint_client(complaint_id: str) -> ComplaintAnalyticsModel:
     try:
-        query = f"SELECT * FROM {SqlConfig().COMPLAINTS_TABLE} WHERE complaint_id = '{complaint_id}';"
-        result = sql_manager.fetch_data(transaction_id=complaint_id, sql_query=query)
+        query = f"SELECT * FROM {SqlConfig().COMPLAINTS_TABLE} WHERE complaint_id = :complaint_id;"
+        result = sql_manager.fetch_data(
+            transaction_id=complaint_id,
+            sql_query=query,
+            params={"complaint_id": complaint_id},
+        )
         if result.empty:
             logger.info(
                 f"[get_complaint_client] - No complaint found for ID: {complaint_id}"
@@ -50,6 +147,132 @@ def get_complaint_client(complaint_id: str) -> ComplaintAnalyticsModel:
         raise e
 
 
+def update_complaint_status(complaint_id: str, status: str) -> dict:
+    """
+    Moves a complaint to a new status if the transition is allowed by
+    `SqlConfig.COMPLAINT_STATUS_TRANSITIONS`.
+
+    The check and the write happen in a single conditional UPDATE, so
+    concurrent transitions of the same complaint cannot both succeed.
+
+    Args:
+        complaint_id (str): The unique identifier of the complaint.
+        status (str): The new status.
+
+    Returns:
+        dict: The complaint ID and its new status.
+
+    Raises:
+        LookupError: If the complaint does not exist.
+        ValueError: If the status is unknown or the transition is not allowed.
+    """
+    transitions = SqlConfig().COMPLAINT_STATUS_TRANSITIONS
+    if status not in transitions:
+        raise ValueError(
+            f"Unknown status '{status}', expected one of {list(transitions)}"
+        )
+    allowed_from = [
+        current for current, nexts in transitions.items() if status in nexts
+    ]
+    rowcount = sql_manager.update_rows(
+        transaction_id=complaint_id,
+        sql_query=update(complaints_table)
+        .where(
+            complaints_table.c.complaint_id == complaint_id,
+            complaints_table.c.status.in_(allowed_from),
+        )
+        .values(status=status),
+    )
+    if rowcount:
+        logger.info(
+            f"[update_complaint_status] - Complaint {complaint_id} moved to {status}"
+        )
+        return {"complaint_id": complaint_id, "status": status}
+
+    current = sql_manager.fetch_rows(
+        transaction_id=complaint_id,
+        sql_query=select(complaints_table.c.status).where(
+            complaints_table.c.complaint_id == complaint_id
+        ),
+    )
+    if not current:
+        raise LookupError(f"No complaint found for ID: {complaint_id}")
+    raise ValueError(
+        f"Cannot move complaint from '{current[0]['status']}' to '{status}'"
+    )
+
+
+def get_complaints_batch(complaint_ids: List[str]) -> dict:
+    """
+    Fetches many complaints with a single indexed IN query.
+
+    Args:
+        complaint_ids (List[str]): The unique identifiers of the complaints.
+
+    Returns:
+        dict: The found complaints and the IDs that were not found.
+    """
+    unique_ids = list(dict.fromkeys(complaint_ids))
+    rows = sql_manager.fetch_rows(
+        transaction_id="batch_lookup",
+        sql_query=select(complaints_table).where(
+            complaints_table.c.complaint_id.in_(unique_ids)
+        ),
+    )
+    found = {row["complaint_id"] for row in rows}
+    return {
+        "complaints": rows,
+        "not_found": [
+            complaint_id for complaint_id in unique_ids if complaint_id not in found
+        ],
+    }
+
+
+def list_complaints(
+    status: Optional[str] = None,
+    email: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = 50,
+) -> dict:
+    """
+    Lists complaints, newest first, filtered by status, email and creation date range.
+
+    Pages are keyset-paginated on the primary key: pass the returned
+    `next_cursor` to fetch the following page.
+
+    Args:
+        status (Optional[str]): Only complaints with this status.
+        email (Optional[str]): Only complaints filed with this email.
+        created_from (Optional[datetime]): Only complaints created at or after this time.
+        created_to (Optional[datetime]): Only complaints created before this time.
+        cursor (Optional[int]): The `next_cursor` of the previous page.
+        limit (int): Page size, capped at `SqlConfig.LIST_PAGE_MAX_SIZE`.
+
+    Returns:
+        dict: The complaints of the page and the cursor of the next page (None on the last page).
+    """
+    limit = max(1, min(limit, SqlConfig().LIST_PAGE_MAX_SIZE))
+    query = select(complaints_table)
+    if status:
+        query = query.where(complaints_table.c.status == status)
+    if email:
+        query = query.where(complaints_table.c.email == email)
+    if created_from:
+        query = query.where(complaints_table.c.created_at >= created_from)
+    if created_to:
+        query = query.where(complaints_table.c.created_at < created_to)
+    if cursor:
+        query = query.where(complaints_table.c.id < cursor)
+    rows = sql_manager.fetch_rows(
+        transaction_id="list_complaints",
+        sql_query=query.order_by(complaints_table.c.id.desc()).limit(limit + 1),
+    )
+    next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+    return {"complaints": rows[:limit], "next_cursor": next_cursor}
+
+
 def get_user_detail(user_id: str):
     """
     Fetches the most recent user details for a given user ID from the database.
@@ -64,9 +287,11 @@ def get_user_detail(user_id: str):
     Logs:
         Issues a warning if no user details are found for the given user ID.
     """
-    query = f"SELECT * FROM {SqlConfig().USER_DETAILS_TABLE} WHERE user_id = '{user_id}' ORDER BY created_at DESC LIMIT 1;"
+    query = f"SELECT * FROM {SqlConfig().USER_DETAILS_TABLE} WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 1;"
     result = (
-        sql_manager.fetch_data(transaction_id=user_id, sql_query=query)
+        sql_manager.fetch_data(
+            transaction_id=user_id, sql_query=query, params={"user_id": user_id}
+        )
         .iloc[::-1]
         .reset_index(drop=True)
     )
@@ -86,80 +311,35 @@ def get_complaint_status(complaint_id: str) -> dict:
         complaint_id (str): The unique identifier of the complaint.
 
     Returns:
-        dict: A dictionary containing the status of the complaint.
+        dict: A dictionary containing the status of the complaint, as returned
+            by the GET /complaints/{complaint_id} endpoint.
     """
-    # Fetch details via the GET /complaints/{complaint_id} endpoint.
-    url = f"http://localhost:8083/complaints/{complaint_id}"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        complaint_data = response.json()
-        return complaint_data
-    except requests.RequestException as e:
-        logger.exception(
-            f"[get_complaint_status] - Error fetching complaint status for {complaint_id}: {str(e)}"
-        )
-        raise e
+    # In-process, the worker does not call its own HTTP API
+    _, complaint = get_complaint_client(complaint_id)
+    return complaint.model_dump(mode="json")
 
 
-def create_complaint(complaint: ComplaintModel) -> ComplaintAnalyticsModel:
+def create_complaint(complaint: ComplaintModel) -> dict:
     """
-    Creates a new complaint and returns the complaint analytics model.
+    Creates a new complaint.
 
     Args:
         complaint (ComplaintModel): The complaint model containing the details of the complaint.
 
     Returns:
-        ComplaintAnalyticsModel: The created complaint analytics model.
+        dict: The ID of the created complaint and a message, as returned by
+            the POST /complaints endpoint.
     """
-    url = "http://localhost:8083/complaints"
-    try:
-        response = requests.post(url, json=complaint.model_dump())
-        response.raise_for_status()
-        complaint_data = response.json()
-        return complaint_data
-    except requests.RequestException as e:
-        logger.exception(f"[create_complaint] - Error creating complaint: {str(e)}")
-        raise e
+    _, complaint_analytics = generate_complaint(complaint)
+    return {
+        "complaint_id": complaint_analytics.complaint_id,
+        "message": "Complaint created successfully",
+    }
 
 
 def create_sql_tables():
     try:
-        complaint_table_schema = """
-CREATE TABLE IF NOT EXISTS cyfuture_complaints (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    complaint_id TEXT NOT NULL,
-    name TEXT NOT NULL,
-    phone_number TEXT NOT NULL,
-    email TEXT NOT NULL,
-    complaint_details TEXT NOT NULL,
-    status TEXT NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
-    """
-        sql_manager.execute_query("test", complaint_table_schema)
-
-        user_table_schema = """CREATE TABLE IF NOT EXISTS cyfuture_user_details (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id TEXT NOT NULL,
-    name TEXT NOT NULL,
-    phone_number TEXT NOT NULL,
-    email TEXT NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);"""
-        sql_manager.execute_query("test", user_table_schema)
-
-        conversation_analytics_table_schema = """CREATE TABLE IF NOT EXISTS cyfuture_conversation_analytics (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id TEXT NOT NULL,
-    user_text TEXT NOT NULL,
-    complaint_details TEXT,
-    response TEXT NOT NULL,
-    followup_flag INTEGER NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);"""
-
-        sql_manager.execute_query("test", conversation_analytics_table_schema)
+        sql_manager.create_schema("test", metadata)
         logger.info("[create_sql_tables] - SQL tables created successfully")
 
         return True
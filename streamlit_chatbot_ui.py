@@ -19,7 +19,7 @@ Launch with:
 # -----------------------------------------------------------------------------
 # Configuration
 # -----------------------------------------------------------------------------
-API_URL = "http://localhost:8083/chatbot"  # Adjust if FastAPI host/port differ
+STREAM_API_URL = "http://localhost:8083/chatbot/stream"  # Adjust if FastAPI host/port differ
 
 # -----------------------------------------------------------------------------
 # Poly‑fill: Streamlit 1.32+ renamed experimental_rerun() → rerun()
@@ -74,6 +74,26 @@ def _extract_bot_text(payload) -> str:
     return json.dumps(payload, indent=2)
 
 
+# -----------------------------------------------------------------------------
+# 📡 Helper – server-sent events from /chatbot/stream
+# -----------------------------------------------------------------------------
+
+
+def _iter_sse(resp):
+    event, data = "message", []
+    for line in resp.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:") :].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:") :].strip())
+
+
 # -----------------------------------------------------------------------------
 # Sidebar – session controls
 # -----------------------------------------------------------------------------
@@ -104,22 +124,45 @@ if prompt := st.chat_input("Ask me anything …"):
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    try:
-        resp = requests.post(
-            API_URL,
-            json={"user_id": st.session_state.user_id, "user_text": prompt},
-            timeout=60,
-        )
-        resp.raise_for_status()
-        raw_data = resp.json()
-    except requests.exceptions.RequestException as exc:
-        raw_data = {"error": str(exc)}
+    raw_data, streamed = {}, []
+
+    def _stream_tokens():
+        try:
+            with requests.post(
+                STREAM_API_URL,
+                json={"user_id": st.session_state.user_id, "user_text": prompt},
+                stream=True,
+                timeout=60,
+            ) as resp:
+                resp.raise_for_status()
+                for event, payload in _iter_sse(resp):
+                    if event == "token":
+                        streamed.append(payload)
+                        yield payload
+                    elif event == "done":
+                        raw_data["bot_response"] = payload
+                    elif event == "error":
+                        raw_data["error"] = payload
+        except requests.exceptions.RequestException as exc:
+            raw_data["error"] = str(exc)
 
-    bot_text = _extract_bot_text(raw_data)
+    with st.chat_message("assistant"):
+        # Tokens are rendered as they arrive; the final payload adds complaint details
+        if hasattr(st, "write_stream"):
+            st.write_stream(_stream_tokens())
+        else:
+            st.markdown("".join(_stream_tokens()), unsafe_allow_html=True)
+        bot_text = _extract_bot_text(raw_data)
+        bot = raw_data.get("bot_response")
+        if not streamed:
+            st.markdown(bot_text, unsafe_allow_html=True)
+        elif isinstance(bot, dict):
+            st.markdown(
+                _fmt_complaint_details(bot.get("complaint_details")),
+                unsafe_allow_html=True,
+            )
 
     st.session_state.messages.append({"role": "assistant", "content": bot_text})
-    with st.chat_message("assistant"):
-        st.markdown(bot_text, unsafe_allow_html=True)
 
 # -----------------------------------------------------------------------------
 # Footer
@@ -127,6 +170,7 @@ if prompt := st.chat_input("Ask me anything …"):
 with st.expander("ℹ️ How it works"):
     st.markdown(
         """
+        * Responses are streamed token by token from `/chatbot/stream`.
         * Supports both old and new backend schemas.
         * `Complaint details` rendered only when present.
         * Compatible with Streamlit versions **<1.32** (experimental_rerun) and **≥1.32** (rerun).
@@ -0,0 +1,18 @@
+import os
+import sys
+import tempfile
+
+# The adapters read their configuration at import, so the test environment is set first
+TEST_DIR = tempfile.mkdtemp(prefix="cyfuture-tests-")
+os.environ.update(
+    {
+        "DB_URL": f"sqlite:///{os.path.join(TEST_DIR, 'cyfuture.db')}",
+        "CACHE_BACKEND": "memory",
+        "CACHE_SQLITE_PATH": os.path.join(TEST_DIR, "cache.db"),
+        "LOG_FILE": os.path.join(TEST_DIR, "logs.log"),
+        "STARTUP_WARMUP": "false",
+        "OPENAI_API_KEY": "test",
+        "OPENAI_ENDPOINT": "http://localhost:8090",
+    }
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
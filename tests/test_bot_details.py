@@ -0,0 +1,64 @@
+from src.bot import ChatBot
+from src.types import ChatBotModel, SessionStateModel
+
+NAME_QUESTION = "Thank you! Could you please share your name, your phone number and your email address?"
+
+
+def details_turn(monkeypatch, user_text, model_response):
+    chatbot = ChatBot(ChatBotModel(user_id="user-1", user_text=user_text))
+    calls = []
+
+    def extract_with_details_model(known_details, followup_question):
+        calls.append(user_text)
+        return model_response
+
+    monkeypatch.setattr(chatbot, "_extract_with_details_model", extract_with_details_model)
+    session = SessionStateModel(
+        user_id="user-1",
+        pending_complaint={"complaint_details": "VPS unreachable", "followup_question": NAME_QUESTION},
+    )
+    _, response = chatbot._get_details_response(session)
+    return calls, response
+
+
+def test_replies_that_are_not_names_go_to_the_details_model(monkeypatch):
+    calls, response = details_turn(
+        monkeypatch, "9876543210 server down since morning", {"needs_answer": True}
+    )
+
+    assert calls == ["9876543210 server down since morning"]
+    assert response is None
+
+
+def test_details_model_results_are_merged_with_the_regex_ones(monkeypatch):
+    calls, response = details_turn(
+        monkeypatch, "9876543210 it is Bill", {"user_info": {"name": "Bill"}}
+    )
+
+    assert calls
+    assert response["user_info"]["name"] == "Bill"
+    assert response["user_info"]["phone_number"] == "9876543210"
+    assert "your email address" in response["followup_question"]
+
+
+def test_recognised_names_skip_the_details_model(monkeypatch):
+    calls, response = details_turn(monkeypatch, "Rahul Sharma 9876543210", {})
+
+    assert calls == []
+    assert response["user_info"]["name"] == "Rahul Sharma"
+
+
+def test_followup_questions_follow_the_language_of_the_complaint(monkeypatch):
+    chatbot = ChatBot(ChatBotModel(user_id="user-2", user_text="9876543210"))
+    session = SessionStateModel(
+        user_id="user-2",
+        pending_complaint={
+            "complaint_details": "सर्वर सुबह से बंद है",
+            "followup_question": "कृपया अपना नाम और अपना फ़ोन नंबर बताएं।",
+        },
+    )
+
+    _, response = chatbot._get_details_response(session)
+
+    assert response["user_info"]["phone_number"] == "9876543210"
+    assert response["followup_question"] == "धन्यवाद! कृपया अपना नाम और अपना ईमेल पता बताएं।"
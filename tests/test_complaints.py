@@ -0,0 +1,66 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from src.types import ComplaintModel
+from src.utils import create_complaint, create_sql_tables, get_complaint_status
+
+
+@pytest.fixture(scope="module")
+def client():
+    create_sql_tables()
+    # Without the lifespan: no adapter warm-up or ingestion workers
+    return TestClient(app)
+
+
+def complaint(name: str) -> dict:
+    return {
+        "name": name,
+        "phone_number": "9876543210",
+        "email": "rahul@example.com",
+        "complaint_details": "सर्वर सुबह से बंद है",
+    }
+
+
+def test_bulk_import_of_a_chunked_non_ascii_body(client):
+    body = (
+        json.dumps(complaint("राहुल शर्मा"), ensure_ascii=False)
+        + "\n\n"
+        + '{"name": "missing fields"}\n'
+        + json.dumps(complaint("Priya Verma"), ensure_ascii=False)
+    ).encode("utf-8")
+    # Chunks of 7 bytes split the 3-byte Devanagari characters
+    chunks = [body[start : start + 7] for start in range(0, len(body), 7)]
+
+    response = client.post(
+        "/complaints/bulk",
+        content=iter(chunks),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [(result["line"], result["status"]) for result in results] == [
+        (1, "created"),
+        (3, "failed"),
+        (4, "created"),
+    ]
+    created = client.get(f"/complaints/{results[0]['complaint_id']}").json()
+    assert created["name"] == "राहुल शर्मा"
+    assert created["complaint_details"] == "सर्वर सुबह से बंद है"
+
+
+def test_bulk_import_rejects_invalid_utf8(client):
+    response = client.post("/complaints/bulk", content=b'{"name": "\xff"}\n')
+    assert response.status_code == 400
+
+
+def test_chatbot_complaint_helpers_match_the_http_endpoints(client):
+    created = create_complaint(ComplaintModel(**complaint("Rahul Sharma")))
+
+    assert created["message"] == "Complaint created successfully"
+    assert get_complaint_status(created["complaint_id"]) == client.get(
+        f"/complaints/{created['complaint_id']}"
+    ).json()
@@ -0,0 +1,66 @@
+import json
+
+import httpx
+import pytest
+from openai import APIConnectionError
+
+from src.adapters.deploymentpool import DeploymentPool
+
+DEPLOYMENTS = [
+    {"name": "eastus", "chat_deployment": "gpt-4o", "models": {"gpt-4o-mini": "mini-eastus"}},
+    {"name": "westeurope", "chat_deployment": "gpt-4o"},
+]
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setenv("OPENAI_DEPLOYMENTS", json.dumps(DEPLOYMENTS))
+    return DeploymentPool()
+
+
+def connection_error() -> APIConnectionError:
+    return APIConnectionError(request=httpx.Request("POST", "https://example.com"))
+
+
+def test_override_models_only_go_to_the_deployments_serving_them(pool):
+    calls = []
+
+    def call(deployment):
+        calls.append((deployment.name, deployment.chat_deployment("gpt-4o-mini")))
+        return "ok"
+
+    result, deployment = pool.execute(call, estimated_tokens=0, model="gpt-4o-mini")
+
+    assert result == "ok"
+    assert calls == [("eastus", "mini-eastus")]
+    assert [deployment.name for deployment in pool.serving()] == ["eastus", "westeurope"]
+
+
+def test_override_models_do_not_fail_over_to_deployments_without_them(pool, monkeypatch):
+    monkeypatch.setattr(pool, "MAX_RETRIES", 1)
+    monkeypatch.setattr(pool.deployments[0].rate_limiter, "backoff", lambda attempt: 0)
+    calls = []
+
+    def call(deployment):
+        calls.append(deployment.name)
+        raise connection_error()
+
+    with pytest.raises(APIConnectionError):
+        pool.execute(call, estimated_tokens=0, model="gpt-4o-mini")
+
+    assert calls == ["eastus", "eastus"]
+    assert pool.metrics["failovers"] == 0
+    assert pool.deployments[1].failures == 0
+
+
+def test_unknown_override_models_are_rejected(pool):
+    with pytest.raises(ValueError):
+        pool.execute(lambda deployment: "ok", estimated_tokens=0, model="gpt-35-turbo")
+
+
+def test_single_endpoint_sends_override_names_unchanged(monkeypatch):
+    monkeypatch.delenv("OPENAI_DEPLOYMENTS", raising=False)
+    deployment = DeploymentPool().deployments[0]
+
+    assert deployment.chat_deployment("gpt-4o-mini") == "gpt-4o-mini"
+    assert deployment.chat_deployment() == deployment.chat_model
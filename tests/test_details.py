@@ -0,0 +1,71 @@
+import pytest
+
+from src.details import (
+    asks_for_name,
+    extract_user_details,
+    get_details_followup_question,
+    unparsed_text,
+)
+
+NAME_QUESTION = "Thank you! Could you please share your name, your phone number and your email address?"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "server down since morning",
+        "internet not working",
+        "billing issue",
+        "I am facing issues with my VPS",
+        "what is the status of my complaint",
+    ],
+)
+def test_complaints_are_not_taken_as_names(text):
+    assert "name" not in extract_user_details(text, NAME_QUESTION)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Rahul Sharma", {"name": "Rahul Sharma"}),
+        ("Rahul Sharma 9876543210", {"name": "Rahul Sharma", "phone_number": "9876543210"}),
+        (
+            "rahul sharma, 9876543210, rahul@example.com",
+            {"name": "Rahul Sharma", "phone_number": "9876543210", "email": "rahul@example.com"},
+        ),
+        (
+            "my name is Rahul and my phone is +91 98765 43210",
+            {"name": "Rahul", "phone_number": "+91 98765 43210"},
+        ),
+    ],
+)
+def test_names_are_found_next_to_the_contact_details(text, expected):
+    assert extract_user_details(text, NAME_QUESTION) == expected
+
+
+def test_names_are_only_extracted_when_asked_for():
+    assert extract_user_details("Rahul Sharma 9876543210", "Could you share your phone number?") == {
+        "phone_number": "9876543210"
+    }
+
+
+def test_unparsed_text_drops_the_contact_details():
+    assert unparsed_text("9876543210, rahul@example.com") == ""
+    assert unparsed_text("9876543210 server down since morning") == "server down since morning"
+
+
+@pytest.mark.parametrize(
+    "language, question",
+    [
+        ("en", "Thank you! Could you please share your name and your email address?"),
+        ("hi", "धन्यवाद! कृपया अपना नाम और अपना ईमेल पता बताएं।"),
+        ("hinglish", "Dhanyavaad! Kripya apna naam aur apna email address share karein."),
+        ("other", "Thank you! Could you please share your name and your email address?"),
+    ],
+)
+def test_followup_questions_are_asked_in_the_language_of_the_user(language, question):
+    followup_question = get_details_followup_question(["name", "email"], language)
+
+    assert followup_question == question
+    assert asks_for_name(followup_question)
+    assert extract_user_details("Rahul Sharma", followup_question) == {"name": "Rahul Sharma"}
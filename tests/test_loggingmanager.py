@@ -0,0 +1,26 @@
+from config import LoggingConfig
+from src.adapters import loggingmanager
+from src.adapters.loggingmanager import _claim_worker_slot, log_file_path
+
+
+def test_single_worker_writes_the_configured_log_file(monkeypatch):
+    monkeypatch.setenv("WORKERS", "1")
+    monkeypatch.setenv("LOG_FILE", "logs/app.log")
+
+    assert log_file_path(LoggingConfig()) == "logs/app.log"
+
+
+def test_workers_write_to_a_bounded_set_of_slots(tmp_path, monkeypatch):
+    log_file = str(tmp_path / "app.log")
+    monkeypatch.setenv("WORKERS", "4")
+    monkeypatch.setenv("LOG_FILE", log_file)
+    monkeypatch.setattr(loggingmanager, "_worker_slot_lock", None)
+
+    # Slot 0 held by a live worker
+    slot, live_worker = _claim_worker_slot(log_file)
+    assert slot == 0
+    assert log_file_path(LoggingConfig()) == str(tmp_path / "app.1.log")
+
+    # Its replacement, once it exited, takes over its slot and files
+    live_worker.close()
+    assert log_file_path(LoggingConfig()) == str(tmp_path / "app.0.log")
@@ -0,0 +1,68 @@
+import threading
+import uuid
+
+import pytest
+
+from src.adapters.sessionmanager import session_manager
+from src.memory import ConversationMemory
+from src.types import ConversationAnalyticsModel
+from src.utils import create_sql_tables
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tables():
+    create_sql_tables()
+
+
+def turn(user_id: str, index: int) -> ConversationAnalyticsModel:
+    return ConversationAnalyticsModel(
+        user_id=user_id, user_text=f"question {index}", response=f"answer {index}"
+    )
+
+
+def memory_of(max_turns: int) -> ConversationMemory:
+    memory = ConversationMemory()
+    memory.max_turns = max_turns
+    # Folds on the turn count only, without loading a tokenizer
+    memory._turn_tokens = lambda turns: [1] * len(turns)
+    return memory
+
+
+def test_summary_runs_off_the_request_path():
+    memory = memory_of(2)
+    release, summarized = threading.Event(), threading.Event()
+
+    def summarize(session, fold):
+        release.wait(5)
+        summarized.set()
+        return "summary"
+
+    memory._summarize = summarize
+    user_id = str(uuid.uuid4())
+    for index in range(3):
+        session = memory.record_turn(turn(user_id, index))
+    # The turn returned while the summary call is still blocked
+    assert not summarized.is_set()
+    assert len(session.turns) == 3
+    release.set()
+    memory.summary_executor.shutdown(wait=True)
+    session = session_manager.get_session(user_id)
+    assert session.summary == "summary"
+    assert [t["user_text"] for t in session.turns] == ["question 1", "question 2"]
+
+
+def test_failing_summaries_keep_the_session_bounded():
+    memory = memory_of(2)
+
+    def summarize(session, fold):
+        raise RuntimeError("summary down")
+
+    memory._summarize = summarize
+    user_id = str(uuid.uuid4())
+    for index in range(session_manager.SESSION_HARD_MAX_TURNS + 5):
+        memory.record_turn(turn(user_id, index))
+    memory.summary_executor.shutdown(wait=True)
+    session = session_manager.get_session(user_id)
+    assert len(session.turns) == session_manager.SESSION_HARD_MAX_TURNS
+    assert session.summarized_turns == 5
+    assert session.turns[-1]["user_text"] == f"question {session_manager.SESSION_HARD_MAX_TURNS + 4}"
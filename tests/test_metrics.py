@@ -0,0 +1,19 @@
+from src.metrics import Trace, registry
+
+
+def test_trace_labels_the_stages_and_server_timing_with_the_pipeline_arm():
+    trace = Trace("user-1", pipeline="single")
+    trace.record("generation", 0.25)
+
+    assert trace.server_timing() == 'generation;dur=250.0, pipeline;desc="single"'
+    assert (
+        'cyfuture_stage_duration_seconds_count{stage="generation",pipeline="single"} 1'
+        in registry.render()
+    )
+
+
+def test_trace_without_a_pipeline_keeps_the_plain_server_timing():
+    trace = Trace("user-2")
+    trace.record("memory", 0.001)
+
+    assert trace.server_timing() == "memory;dur=1.0"
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from config import MilvusConfig
+from src.adapters import milvusmanager
+from src.adapters.milvusmanager import MilvusManager
+
+
+class FakeMilvusClient:
+    def __init__(self, **kwargs):
+        self.calls = []
+
+    def has_collection(self, collection_name):
+        self.calls.append(("has_collection", collection_name))
+        return True
+
+    def search(self, collection_name, **kwargs):
+        self.calls.append(("search", collection_name))
+        return [[{"id": 1, "distance": 0.95, "entity": {"question": "What is CDN?", "content": "A CDN..."}}]]
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    # No Milvus server: the client only records the calls
+    monkeypatch.setattr(milvusmanager, "MilvusClient", FakeMilvusClient)
+    manager = MilvusManager()
+    manager.version = 1
+    monkeypatch.setattr(manager, "collection_version", lambda collection_name: manager.version)
+    return manager
+
+
+def embedding(seed: int) -> list:
+    return np.random.default_rng(seed).standard_normal(MilvusConfig().MILVUS_VECTOR_DIM).tolist()
+
+
+def cache_key(manager) -> str:
+    query = np.ones(manager.MILVUS_VECTOR_DIM)
+    return manager._retrieval_cache_key("documents", query, ["text"], "", 5)
+
+
+@pytest.mark.parametrize(
+    "setting, value",
+    [
+        ("MILVUS_VECTOR_STORAGE", "binary"),
+        ("MILVUS_SEARCH_PARAMS", {"ef": 128}),
+        ("MILVUS_IVF_NPROBE", 64),
+        ("MILVUS_RESCORE_FACTOR", 8),
+    ],
+)
+def test_retrieval_cache_key_changes_with_the_search_settings(manager, monkeypatch, setting, value):
+    key = cache_key(manager)
+    assert cache_key(manager) == key
+
+    monkeypatch.setattr(manager, setting, value)
+    assert cache_key(manager) != key
+
+
+def test_collection_existence_is_checked_once_per_version(manager):
+    query = embedding(0)
+    manager.search_index("test", "documents", query, ["text"])
+    manager.search_index("test", "documents", query, ["text"])
+    manager.search_index("test", "documents", embedding(1), ["text"])
+    assert manager.milvus_client.calls == [
+        ("has_collection", "documents"),
+        ("search", "documents"),
+        ("search", "documents"),
+    ]
+
+    manager.version = 2
+    manager.search_index("test", "documents", query, ["text"])
+    assert manager.milvus_client.calls[3:] == [
+        ("has_collection", "documents"),
+        ("search", "documents"),
+    ]
+
+
+def test_faq_matches_are_served_from_the_retrieval_cache(manager):
+    faq_collection = manager.MILVUS_FAQ_COLLECTION_NAME
+    query = embedding(0)
+
+    _, first = manager.match_faq_question("test", query)
+    _, second = manager.match_faq_question("test", query)
+
+    assert first == second
+    assert first["entity"]["question"] == "What is CDN?"
+    assert manager.milvus_client.calls == [
+        ("has_collection", faq_collection),
+        ("search", faq_collection),
+    ]
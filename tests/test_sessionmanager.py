@@ -0,0 +1,80 @@
+import threading
+import uuid
+
+import pytest
+
+from src.adapters.cachemanager import SqliteCacheStore
+from src.adapters.sessionmanager import SessionManager
+from src.types import ConversationAnalyticsModel
+from src.utils import create_sql_tables
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tables():
+    create_sql_tables()
+
+
+def turn(user_id: str, index: int) -> ConversationAnalyticsModel:
+    return ConversationAnalyticsModel(
+        user_id=user_id, user_text=f"question {index}", response=f"answer {index}"
+    )
+
+
+def test_cold_session_does_not_duplicate_the_saved_turn():
+    user_id = str(uuid.uuid4())
+    turn(user_id, 0).to_sql()
+    # A new manager has an empty store, so the session is hydrated from SQL
+    session = SessionManager().save_turn(turn(user_id, 1))
+    assert [t["user_text"] for t in session.turns] == ["question 0", "question 1"]
+
+
+def test_concurrent_turns_of_a_user_are_all_kept():
+    manager = SessionManager()
+    user_id = str(uuid.uuid4())
+    manager.get_session(user_id)
+    threads = [
+        threading.Thread(target=manager.save_turn, args=(turn(user_id, index),))
+        for index in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    session = manager.get_session(user_id)
+    assert sorted(t["user_text"] for t in session.turns) == [
+        f"question {index}" for index in range(8)
+    ]
+
+
+def test_stale_summary_is_applied_to_the_current_session():
+    manager = SessionManager()
+    user_id = str(uuid.uuid4())
+    for index in range(3):
+        manager.save_turn(turn(user_id, index))
+    stale = manager.get_session(user_id)
+    manager.save_turn(turn(user_id, 3))
+    session = manager.save_summary(stale, "summary of 0 and 1", 2)
+    assert [t["user_text"] for t in session.turns] == ["question 2", "question 3"]
+    assert session.summarized_turns == 2
+    # The same fold computed from the old session is not applied twice
+    assert manager.save_summary(stale, "again", 2).summary == "summary of 0 and 1"
+
+
+def test_sqlite_lock_serializes_and_expires(tmp_path):
+    store = SqliteCacheStore(str(tmp_path / "cache.db"), "test", 60, 100)
+    store.LOCK_WAIT_SECONDS = 0.2
+    with store.lock("key"):
+        waiter = SqliteCacheStore(str(tmp_path / "cache.db"), "test", 60, 100)
+        waiter.LOCK_WAIT_SECONDS = 0.1
+        with pytest.raises(TimeoutError):
+            with waiter.lock("key"):
+                pass
+        with waiter.lock("other"):
+            pass
+    with waiter.lock("key"):
+        pass
+    # A lease left behind (e.g. by a dead worker) is taken over once expired
+    waiter.LOCK_LEASE_SECONDS = -1
+    with waiter.lock("stale"):
+        with store.lock("stale"):
+            pass
@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import inspect, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.adapters.sqllitemanager import SQLiteManager
+from src.tables import complaints_table, conversation_analytics_table, metadata
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    manager = SQLiteManager()
+    manager.create_schema("test", metadata)
+    return manager
+
+
+def complaint(index: int, status: str = "Pending") -> dict:
+    return {
+        "complaint_id": f"id-{index}",
+        "name": "Rahul Sharma",
+        "phone_number": "9876543210",
+        "email": f"user{index}@example.com",
+        "complaint_details": "Server down",
+        "status": status,
+    }
+
+
+def test_create_schema_is_idempotent_and_creates_the_indexes(manager):
+    assert manager.dialect == "sqlite"
+    assert manager.create_schema("test", metadata)
+    indexes = {index["name"] for index in inspect(manager.engine).get_indexes(complaints_table.name)}
+    assert {"ix_complaints_complaint_id", "ix_complaints_status_id"} <= indexes
+
+
+def test_insert_fetch_and_update_rows(manager):
+    assert manager.insert_rows("test", complaints_table, [complaint(1), complaint(2)]) == 2
+    assert manager.insert_rows("test", complaints_table, []) == 0
+
+    rows = manager.fetch_rows(
+        "test",
+        select(complaints_table.c.complaint_id, complaints_table.c.status).order_by(
+            complaints_table.c.id
+        ),
+    )
+    assert rows == [
+        {"complaint_id": "id-1", "status": "Pending"},
+        {"complaint_id": "id-2", "status": "Pending"},
+    ]
+
+    updated = manager.update_rows(
+        "test",
+        update(complaints_table)
+        .where(complaints_table.c.complaint_id == "id-2")
+        .values(status="Resolved"),
+    )
+    assert updated == 1
+    assert manager.fetch_rows(
+        "test",
+        f"SELECT status FROM {complaints_table.name} WHERE complaint_id = :complaint_id",
+        {"complaint_id": "id-2"},
+    ) == [{"status": "Resolved"}]
+
+
+def test_insert_rows_is_all_or_nothing(manager):
+    manager.insert_rows("test", complaints_table, [complaint(1)])
+    with pytest.raises(IntegrityError):
+        # The second row violates the unique complaint_id index
+        manager.insert_rows("test", complaints_table, [complaint(2), complaint(1)])
+    rows = manager.fetch_rows("test", f"SELECT complaint_id FROM {complaints_table.name}")
+    assert rows == [{"complaint_id": "id-1"}]
+
+
+def test_create_schema_adds_new_nullable_columns_to_existing_tables(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_URL", f"sqlite:///{tmp_path / 'old.db'}")
+    manager = SQLiteManager()
+    manager.execute_query(
+        "test",
+        f"CREATE TABLE {conversation_analytics_table.name} (id INTEGER PRIMARY KEY, user_id TEXT NOT NULL, "
+        "user_text TEXT NOT NULL, complaint_details TEXT, response TEXT NOT NULL, "
+        "followup_flag INTEGER NOT NULL, created_at DATETIME)",
+    )
+
+    assert manager.create_schema("test", metadata)
+    columns = {
+        column["name"] for column in inspect(manager.engine).get_columns(conversation_analytics_table.name)
+    }
+    assert "pipeline" in columns
@@ -0,0 +1,280 @@
+"""
+Memory-vs-recall benchmark of the vector storage modes (MILVUS_VECTOR_STORAGE).
+
+For every mode, simulates its first-pass search in numpy over the same
+embeddings: float32 and float16 exact cosine, binary Hamming distance over
+the sign bits and PQ (MILVUS_PQ_M sub-quantizers of MILVUS_PQ_NBITS bits,
+trained with k-means on the corpus) asymmetric distances. Reports, against
+exact float32 search:
+- recall@k of the first pass alone,
+- recall@k after rescoring its best MILVUS_RESCORE_FACTOR * k candidates at
+  full precision (what `MilvusManager.search_index` does for binary and pq),
+- the estimated index memory and memory-mapped disk per vector, for the
+  corpus and projected to `--project-vectors` vectors.
+The IVF partitioning of the binary and pq indexes (nprobe) and the HNSW
+graph search are not simulated, they cost some more recall in Milvus.
+
+Embeddings come from the collection (`--from-milvus`), a `.npy` matrix
+(`--embeddings`) or, by default, a synthetic corpus with the anisotropy of
+ada-002 embeddings (use real ones for numbers to act on):
+    python vector_benchmark.py --from-milvus --k 5
+    python vector_benchmark.py --synthetic 20000 --queries 500
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict
+
+import numpy as np
+
+from benchmark import git_commit
+from config import MilvusConfig
+from src.quantization import (
+    RESCORED_STORAGES,
+    VECTOR_STORAGES,
+    binary_codes,
+    index_bytes_per_vector,
+    normalize,
+)
+
+# Number of set bits of every byte value
+POPCOUNT = (
+    np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.int32)
+)
+
+
+def synthetic_embeddings(count: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Unit vectors sharing a common direction and grouped in topics, so that
+    (like ada-002 embeddings) most pairs have a cosine similarity of 0.6-0.9.
+    """
+    common = normalize(rng.standard_normal(dim))
+    topics = normalize(rng.standard_normal((max(count // 50, 1), dim)))
+    noise = normalize(rng.standard_normal((count, dim)))
+    return normalize(
+        0.6 * common + 0.6 * topics[rng.integers(len(topics), size=count)] + 0.5 * noise
+    )
+
+
+def milvus_embeddings(limit: int) -> np.ndarray:
+    """
+    The full-precision vectors of the configured collection.
+    """
+    from src.adapters.milvusmanager import milvus_manager
+
+    field = milvus_manager.MILVUS_VECTOR_FIELD
+    iterator = milvus_manager.milvus_client.query_iterator(
+        collection_name=milvus_manager.MILVUS_COLLECTION_NAME,
+        batch_size=1000,
+        limit=limit,
+        output_fields=[field],
+    )
+    vectors = []
+    try:
+        while batch := iterator.next():
+            for row in batch:
+                vector = row[field]
+                # FLOAT16_VECTOR fields are returned as raw bytes
+                if isinstance(vector, (list, tuple)) and vector and isinstance(vector[0], bytes):
+                    vector = vector[0]
+                if isinstance(vector, bytes):
+                    vector = np.frombuffer(vector, dtype=np.float16)
+                vectors.append(np.asarray(vector, dtype=np.float32))
+    finally:
+        iterator.close()
+    return normalize(np.stack(vectors))
+
+
+def train_pq(
+    vectors: np.ndarray, m: int, nbits: int, iterations: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    k-means codebooks of the m sub-vectors, shape (m, 2 ** nbits, dim / m).
+    """
+    count, dim = vectors.shape
+    centroids = min(2**nbits, count)
+    subvectors = vectors.reshape(count, m, dim // m)
+    codebooks = np.empty((m, centroids, dim // m), dtype=np.float32)
+    for sub in range(m):
+        points = subvectors[:, sub]
+        codebook = points[rng.choice(count, centroids, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = _nearest(points, codebook)
+            sums = np.zeros_like(codebook)
+            np.add.at(sums, assignment, points)
+            sizes = np.bincount(assignment, minlength=centroids)[:, None]
+            codebook = np.where(sizes > 0, sums / np.maximum(sizes, 1), codebook)
+        codebooks[sub] = codebook
+    return codebooks
+
+
+def _nearest(points: np.ndarray, codebook: np.ndarray) -> np.ndarray:
+    # Squared L2 distances, without the constant |point|^2
+    distances = -2 * points @ codebook.T + (codebook**2).sum(axis=1)[None, :]
+    return distances.argmin(axis=1)
+
+
+def pq_encode(vectors: np.ndarray, codebooks: np.ndarray) -> np.ndarray:
+    m, _, sub_dim = codebooks.shape
+    subvectors = vectors.reshape(len(vectors), m, sub_dim)
+    return np.stack(
+        [_nearest(subvectors[:, sub], codebooks[sub]) for sub in range(m)], axis=1
+    )
+
+
+def first_pass_scores(
+    storage: str, corpus: np.ndarray, queries: np.ndarray, pq_m: int, pq_nbits: int, rng
+) -> np.ndarray:
+    """
+    (queries x corpus) scores of the first pass of a storage mode, higher is closer.
+    """
+    if storage == "float16":
+        return queries.astype(np.float16).astype(np.float32) @ corpus.astype(
+            np.float16
+        ).astype(np.float32).T
+    if storage == "binary":
+        corpus_codes = binary_codes(corpus)
+        return np.stack(
+            [
+                -POPCOUNT[np.bitwise_xor(corpus_codes, code)].sum(axis=1)
+                for code in binary_codes(queries)
+            ]
+        ).astype(np.float32)
+    if storage == "pq":
+        codebooks = train_pq(corpus, pq_m, pq_nbits, iterations=10, rng=rng)
+        codes = pq_encode(corpus, codebooks)
+        sub_dim = codebooks.shape[2]
+        scores = []
+        for query in queries:
+            # Inner products of every sub-vector of the query with its codebook
+            table = np.einsum(
+                "mkd,md->mk", codebooks, query.reshape(pq_m, sub_dim)
+            )
+            scores.append(table[np.arange(pq_m), codes].sum(axis=1))
+        return np.stack(scores)
+    return queries @ corpus.T
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(
+        np.mean(
+            [len(set(row) & set(expected)) / len(expected) for row, expected in zip(found, truth)]
+        )
+    )
+
+
+def top(scores: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+def bench_storages(
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    rescore_factor: int,
+    project_vectors: int,
+    config: MilvusConfig,
+    rng: np.random.Generator,
+) -> Dict[str, Any]:
+    truth = top(queries @ corpus.T, k)
+    hnsw_m = config.MILVUS_INDEX_PARAMS.get("M", 16)
+    float32_bytes = index_bytes_per_vector("float32", corpus.shape[1], hnsw_m=hnsw_m)
+    results = {}
+    for storage in VECTOR_STORAGES:
+        scores = first_pass_scores(
+            storage, corpus, queries, config.MILVUS_PQ_M, config.MILVUS_PQ_NBITS, rng
+        )
+        candidates = top(scores, k * rescore_factor)
+        # Full-precision rescoring of the candidates
+        exact = np.einsum("qd,qcd->qc", queries, corpus[candidates])
+        rescored = np.take_along_axis(candidates, top(exact, k), axis=1)
+        footprint = index_bytes_per_vector(
+            storage,
+            corpus.shape[1],
+            hnsw_m=hnsw_m,
+            pq_m=config.MILVUS_PQ_M,
+            pq_nbits=config.MILVUS_PQ_NBITS,
+        )
+        results[storage] = {
+            f"recall@{k}": round(recall(top(scores, k), truth), 4),
+            f"recall@{k}_rescored": round(recall(rescored, truth), 4)
+            if storage in RESCORED_STORAGES
+            else None,
+            "memory_bytes_per_vector": footprint["memory"],
+            "disk_bytes_per_vector": footprint["disk"],
+            "memory_mb": round(footprint["memory"] * len(corpus) / 2**20, 2),
+            f"memory_gb_at_{project_vectors}": round(
+                footprint["memory"] * project_vectors / 2**30, 2
+            ),
+            "memory_ratio_vs_float32": round(
+                footprint["memory"] / float32_bytes["memory"], 4
+            ),
+        }
+        print(f"{storage:>8}: {json.dumps(results[storage])}")
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--from-milvus", action="store_true")
+    source.add_argument("--embeddings", help=".npy matrix of embeddings, one per row")
+    source.add_argument("--synthetic", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=100000, help="Vectors read from Milvus")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument(
+        "--query-noise",
+        type=float,
+        default=0.6,
+        help="Queries are corpus vectors plus this much random noise",
+    )
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rescore-factor", type=int)
+    parser.add_argument("--project-vectors", type=int, default=10_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Results JSON path")
+    args = parser.parse_args()
+
+    config = MilvusConfig()
+    rng = np.random.default_rng(args.seed)
+    if args.from_milvus:
+        corpus, source_name = milvus_embeddings(args.limit), config.MILVUS_COLLECTION_NAME
+    elif args.embeddings:
+        corpus, source_name = normalize(np.load(args.embeddings)), args.embeddings
+    else:
+        corpus = synthetic_embeddings(args.synthetic, config.MILVUS_VECTOR_DIM, rng)
+        source_name = "synthetic"
+    queries = normalize(
+        corpus[rng.integers(len(corpus), size=args.queries)]
+        + args.query_noise * normalize(rng.standard_normal((args.queries, corpus.shape[1])))
+    )
+    rescore_factor = args.rescore_factor or config.MILVUS_RESCORE_FACTOR
+    results = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "source": source_name,
+        "vectors": len(corpus),
+        "dim": corpus.shape[1],
+        "queries": args.queries,
+        "k": args.k,
+        "rescore_factor": rescore_factor,
+        "storages": bench_storages(
+            corpus, queries, args.k, rescore_factor, args.project_vectors, config, rng
+        ),
+    }
+    output = args.output or os.path.join(
+        "data",
+        "benchmarks",
+        f"vector-storage-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())